@@ -3,20 +3,34 @@ FareShare API - Main Application
 FastAPI application entry point with health checks and database connectivity.
 """
 from datetime import datetime
-from fastapi import FastAPI, status
+from fastapi import FastAPI, Request, Response, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 import os
-from sqlalchemy import text, select
+from sqlalchemy import select
 
 from src.config.db import init_db, close_db, get_async_session
+from src.config.logging_config import setup_logging
+from src.config.partitions import ensure_future_partitions
+from src.services.seat_holds import seat_hold_sweeper
+from src.services.avatars import shutdown_avatar_pool
+from src.services.seat_updates import seat_update_hub
+from src.services.jobs import JOB_WORKER_ENABLED, ensure_periodic_jobs, job_worker
+from src.services.health import health_prober
+from src.services.metrics import render_metrics
+from src.services.etags import etag_matches, not_modified, set_etag, version_etag
 from src.models import User, Ride, Booking, Review
-from src.routes import auth_router, users_router
+from src.middleware import (
+    CompressionMiddleware, IdempotencyMiddleware, MetricsMiddleware, RequestIdMiddleware,
+    build_idempotency_store, UploadStaticFiles
+)
+from src.routes import auth_router, users_router, rides_router, bookings_router, reviews_router
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging: JSON lines written by a background thread (never blocks the event loop)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -32,10 +46,38 @@ async def lifespan(app: FastAPI):
     await init_db()
     logger.info("✅ Database connection pool initialized")
     
+    # Background DB prober behind /readyz and /health
+    health_prober.start()
+    
+    # Make sure upcoming monthly partitions exist for rides/bookings
+    try:
+        await ensure_future_partitions()
+    except Exception as e:
+        logger.warning(f"Partition maintenance skipped: {e}")
+    
+    # Release pending bookings whose seat holds lapse
+    seat_hold_sweeper.start()
+    
+    # Fan-out of seat changes to live WebSocket subscribers
+    seat_update_hub.start()
+    
+    # Background jobs: exports, account deletion, avatar GC, maintenance
+    if JOB_WORKER_ENABLED:
+        try:
+            await ensure_periodic_jobs()
+        except Exception as e:
+            logger.warning(f"Periodic jobs not scheduled: {e}")
+        job_worker.start()
+    
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down FareShare API...")
+    await health_prober.stop()  # /readyz answers 503 from here on
+    await seat_hold_sweeper.stop()
+    await job_worker.stop()
+    await seat_update_hub.stop()
+    await asyncio.to_thread(shutdown_avatar_pool)
     await close_db()
     logger.info("✅ Database connections closed")
 
@@ -48,6 +90,14 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Idempotency-Key replay for retried POST/PATCH requests
+# Added before CORS so CORS stays outermost and replayed responses still get CORS headers
+app.add_middleware(IdempotencyMiddleware, store=build_idempotency_store())
+
+# zstd/br/gzip for large JSON responses (outside idempotency so stored
+# responses stay uncompressed, inside CORS)
+app.add_middleware(CompressionMiddleware)
+
 # CORS middleware - configure based on your frontend URL
 app.add_middleware(
     CORSMiddleware,
@@ -56,16 +106,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
 
+# Request latency/status/in-flight metrics - wraps everything but the request id
+app.add_middleware(MetricsMiddleware)
+
+# Request id for every log line - outermost
+app.add_middleware(RequestIdMiddleware)
+
 # Mount static files for avatar uploads
 # Create uploads directory if it doesn't exist
 os.makedirs("uploads/avatars", exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# Content-addressed avatar variants are served with immutable caching headers
+app.mount("/uploads", UploadStaticFiles(directory="uploads"), name="uploads")
 
 # Include API routers
 app.include_router(auth_router, prefix="/api")
 app.include_router(users_router, prefix="/api")
+app.include_router(rides_router, prefix="/api")
+app.include_router(bookings_router, prefix="/api")
+app.include_router(reviews_router, prefix="/api")
 
 
 @app.get("/", tags=["Root"])
@@ -78,37 +139,58 @@ async def root():
     }
 
 
+@app.get("/livez", tags=["Health"], status_code=status.HTTP_200_OK)
+async def liveness():
+    """
+    Liveness probe: the process is up and its event loop answers.
+    Never touches the database, so a DB outage does not get workers restarted.
+    """
+    return {"status": "alive"}
+
+
+@app.get("/readyz", tags=["Health"])
+async def readiness():
+    """
+    Readiness probe: 200 when this worker should get traffic, 503 otherwise.
+    Served from the background prober's cached snapshot (DB round trip,
+    pool saturation, event-loop lag) - no query per probe.
+    """
+    ready, body = health_prober.readiness()
+    return JSONResponse(
+        body,
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """Prometheus metrics (all workers when PROMETHEUS_MULTIPROC_DIR is set)"""
+    body, content_type = await render_metrics()
+    return Response(body, media_type=content_type)
+
+
 @app.get("/health", tags=["Health"], status_code=status.HTTP_200_OK)
 async def health_check():
     """
-    Health check endpoint with database connectivity test.
-    Returns 200 if API and database are healthy, 503 otherwise.
+    Health check with database connectivity, from the prober's cached snapshot.
+    Always 200 (the status is in the body); use /readyz for load balancers.
     """
-    try:
-        # Test database connection with a simple query
-        async with get_async_session() as session:
-            result = await session.execute(text("SELECT 1 as health_check"))
-            row = result.fetchone()
-            
-            if row and row[0] == 1:
-                return {
-                    "status": "healthy",
-                    "database": "connected",
-                    "message": "API and database are operational"
-                }
-            else:
-                return {
-                    "status": "unhealthy",
-                    "database": "error",
-                    "message": "Database query returned unexpected result"
-                }
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
+    snapshot = health_prober.snapshot
+    if snapshot.database == "connected":
         return {
-            "status": "unhealthy",
-            "database": "disconnected",
-            "error": str(e)
+            "status": "healthy",
+            "database": "connected",
+            "message": "API and database are operational",
+            "round_trip_ms": snapshot.round_trip_ms,
+            "checked_at": snapshot.checked_at,
         }
+    return {
+        "status": "unhealthy",
+        "database": "unknown" if snapshot.database == "unknown" else "disconnected",
+        "error": snapshot.database_error or snapshot.reason,
+        "checked_at": snapshot.checked_at,
+    }
 
 
 
@@ -116,16 +198,35 @@ async def health_check():
 # API Endpoints
 # These demonstrate the toJson functionality for model serialization
 
+async def _load_in_order(session, model, versions):
+    """Load full rows for the ids of a version query, keeping its order"""
+    ids = [row.id for row in versions]
+    if not ids:
+        return []
+    result = await session.execute(select(model).where(model.id.in_(ids)))
+    by_id = {item.id: item for item in result.scalars().all()}
+    return [by_id[row_id] for row_id in ids if row_id in by_id]
+
+
 @app.get("/api/users", tags=["Users"])
-async def get_users():
+async def get_users(request: Request, response: Response):
     """
     Get all users with JSON serialization.
     Demonstrates the toJson functionality.
+    
+    Conditional GET: the ETag comes from the listed users' ids and
+    updated_at, so a matching If-None-Match gets 304 before the full query.
     """
     try:
         async with get_async_session() as session:
-            result = await session.execute(select(User).limit(5))
-            users = result.scalars().all()
+            result = await session.execute(select(User.id, User.updated_at).order_by(User.id).limit(5))
+            versions = result.all()
+            etag = version_etag("users-list", *versions)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            
+            users = await _load_in_order(session, User, versions)
+            set_etag(response, etag)
             
             # Use the toJson method to serialize users
             return {"users": [user.toJson() for user in users]}
@@ -137,12 +238,18 @@ async def get_users():
         }
 
 @app.get("/api/rides", tags=["Rides"])
-async def get_rides():
-    """Get all rides with JSON serialization."""
+async def get_rides(request: Request, response: Response):
+    """Get all rides with JSON serialization (conditional GET like /api/users)."""
     try:
         async with get_async_session() as session:
-            result = await session.execute(select(Ride).limit(5))
-            rides = result.scalars().all()
+            result = await session.execute(select(Ride.id, Ride.updated_at).order_by(Ride.id).limit(5))
+            versions = result.all()
+            etag = version_etag("rides-list", *versions)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            
+            rides = await _load_in_order(session, Ride, versions)
+            set_etag(response, etag)
             
             # Use the toJson method to serialize rides
             return {"rides": [ride.toJson() for ride in rides]}
@@ -200,6 +307,8 @@ async def test_api():
     }
 
 
+# Development server. In production run `gunicorn app:app` (gunicorn.conf.py):
+# one preloaded uvicorn worker per CPU core with a graceful drain on SIGTERM.
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
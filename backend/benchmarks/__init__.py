@@ -0,0 +1,5 @@
+"""
+Benchmarks Package
+Standalone performance scripts for the backend. Run them as modules from the
+backend directory, e.g. `python -m benchmarks.bench_ranking`.
+"""
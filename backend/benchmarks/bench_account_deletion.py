@@ -0,0 +1,143 @@
+"""
+Account Deletion Benchmark
+Seeds an account with ~200k dependent rows, hard-deletes it through the
+batched deletion job and checks the result:
+
+    - rides as driver, other passengers' bookings on those rides,
+      bookings of its own on another driver's ride, and reviews both ways
+    - reports total time, number of transactions and the slowest batch
+      (the longest time any lock was held)
+    - verifies nothing referencing the account is left, the other
+      passenger's rating aggregate matches their remaining reviews, and the
+      seat the account held on another driver's ride (plus its waitlist
+      entry there) went back to that ride
+
+Usage (from the backend directory, against a disposable database):
+    python -m benchmarks.bench_account_deletion --rides 1000 --bookings-per-ride 150 --own-bookings 47000
+"""
+import argparse
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from benchmarks.common import Timer, database, throwaway_user
+from benchmarks.bench_seat_contention import create_ride
+from src.config import db as db_config
+from src.services.account_deletion import DeletionReport, delete_account
+from src.services.ride_bulk import insert_rides
+
+SEED_BOOKINGS_SQL = text("""
+    INSERT INTO bookings (ride_id, ride_departure_time, passenger_id, seats_reserved, amount_paid, status, booked_at)
+    SELECT r.id, r.departure_time, :passenger_id, 1, 10.00, 'completed', now() - make_interval(mins => n)
+    FROM rides r, generate_series(1, :per_ride) AS n
+    WHERE r.driver_id = :driver_id
+""")
+
+# One review each way between the account (driver) and the passenger per ride
+SEED_REVIEWS_SQL = text("""
+    INSERT INTO reviews (ride_id, ride_departure_time, reviewer_id, reviewee_id, rating, created_at)
+    SELECT r.id, r.departure_time, pair.reviewer_id, pair.reviewee_id, 1 + (row_number() OVER () % 5), now()
+    FROM rides r,
+         LATERAL (VALUES (CAST(:driver_id AS uuid), CAST(:passenger_id AS uuid)),
+                         (CAST(:passenger_id AS uuid), CAST(:driver_id AS uuid))) AS pair(reviewer_id, reviewee_id)
+    WHERE r.driver_id = :driver_id
+""")
+
+SYNC_AGGREGATES_SQL = text("""
+    UPDATE users SET
+        rating_sum = COALESCE((SELECT sum(rating) FROM reviews WHERE reviewee_id = users.id), 0),
+        rating_count = (SELECT count(*) FROM reviews WHERE reviewee_id = users.id),
+        rating_avg = COALESCE((SELECT round(avg(rating), 2) FROM reviews WHERE reviewee_id = users.id), 0)
+    WHERE id = ANY(CAST(:user_ids AS uuid[]))
+""")
+
+
+async def seed(account_id, passenger_id, other_driver_id, args) -> tuple[int, uuid.UUID]:
+    departure = datetime.now(timezone.utc) - timedelta(days=30)
+    rows = [
+        (
+            uuid.uuid4(), account_id, None, None, None, None, "A", "B",
+            -80.52, 43.46, -79.38, 43.65, departure + timedelta(hours=i), 4, 4, Decimal("10.00"), "completed",
+        )
+        for i in range(args.rides)
+    ]
+    other_ride = await create_ride(other_driver_id, 4)
+    async with db_config.get_async_session() as session:
+        await insert_rides(session, rows)
+        await session.execute(SEED_BOOKINGS_SQL, {
+            "passenger_id": passenger_id, "per_ride": args.bookings_per_ride, "driver_id": account_id,
+        })
+        await session.execute(text("""
+            INSERT INTO bookings (ride_id, ride_departure_time, passenger_id, seats_reserved, amount_paid, status)
+            SELECT id, departure_time, :account_id, 1, 10.00, 'completed'
+            FROM rides, generate_series(1, :count)
+            WHERE id = :ride_id
+        """), {"account_id": account_id, "count": args.own_bookings, "ride_id": other_ride})
+        # One active seat and a waitlist entry: deletion must give the seat back
+        await session.execute(text("""
+            WITH held AS (
+                UPDATE rides SET seats_available = seats_available - 1
+                WHERE id = :ride_id
+                RETURNING id, departure_time
+            ), waiting AS (
+                INSERT INTO ride_waitlist (ride_id, ride_departure_time, passenger_id, seats_requested)
+                SELECT id, departure_time, :account_id, 1 FROM held
+            )
+            INSERT INTO bookings (ride_id, ride_departure_time, passenger_id, seats_reserved, amount_paid, status)
+            SELECT id, departure_time, :account_id, 1, 10.00, 'confirmed' FROM held
+        """), {"account_id": account_id, "ride_id": other_ride})
+        await session.execute(SEED_REVIEWS_SQL, {"driver_id": account_id, "passenger_id": passenger_id})
+        await session.execute(SYNC_AGGREGATES_SQL, {"user_ids": [account_id, passenger_id]})
+        await session.execute(
+            text("UPDATE users SET status = 'suspended', deletion_requested_at = now() WHERE id = :id"),
+            {"id": account_id}
+        )
+    return args.rides * (1 + args.bookings_per_ride + 2) + args.own_bookings + 2, other_ride
+
+
+async def main(args) -> None:
+    async with database(), throwaway_user() as account, throwaway_user() as passenger, throwaway_user() as other:
+        with Timer() as seeding:
+            total, other_ride = await seed(account.id, passenger.id, other.id, args)
+        print(f"seeded {total} dependent rows in {seeding.elapsed:.1f}s")
+
+        report = DeletionReport()
+        with Timer() as timer:
+            deleted = await delete_account(account.id, report, args.batch_size)
+
+        async with db_config.get_async_session() as session:
+            leftovers = (await session.execute(text("""
+                SELECT (SELECT count(*) FROM rides WHERE driver_id = :id)
+                     + (SELECT count(*) FROM bookings WHERE passenger_id = :id)
+                     + (SELECT count(*) FROM reviews WHERE reviewer_id = :id OR reviewee_id = :id)
+                     + (SELECT count(*) FROM ride_waitlist WHERE passenger_id = :id)
+            """), {"id": account.id})).scalar()
+            seats = (await session.execute(
+                text("SELECT seats_available, seats_total FROM rides WHERE id = :id"), {"id": other_ride}
+            )).one()
+            aggregate = (await session.execute(text("""
+                SELECT u.rating_count, (SELECT count(*) FROM reviews WHERE reviewee_id = u.id)
+                FROM users u WHERE u.id = :id
+            """), {"id": passenger.id})).one()
+
+        print(f"account deleted:   {deleted}")
+        print(f"elapsed:           {timer.elapsed:.1f}s ({total / timer.elapsed:,.0f} rows/s)")
+        print(f"transactions:      {report.batches}")
+        print(f"slowest batch:     {report.max_batch_seconds * 1000:.0f} ms")
+        print(f"rows by step:      {report.rows_deleted}")
+        print(f"leftover rows:     {leftovers}")
+        print(f"passenger ratings: count={aggregate[0]} actual={aggregate[1]}")
+        print(f"other ride seats:  available={seats[0]} total={seats[1]}")
+        assert deleted and leftovers == 0 and aggregate[0] == aggregate[1] and seats[0] == seats[1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rides", type=int, default=1000)
+    parser.add_argument("--bookings-per-ride", type=int, default=150)
+    parser.add_argument("--own-bookings", type=int, default=47_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
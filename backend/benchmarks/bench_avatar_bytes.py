@@ -0,0 +1,81 @@
+"""
+Avatar Bytes per Page View Benchmark
+Estimates avatar bytes transferred for typical page views, serving the
+original upload in every slot (before) versus the fitting WebP variant (after).
+
+A synthetic camera-style JPEG is generated (or pass --image to use a real one),
+run through render_avatar_variants, and each page's avatar slots are summed:
+
+    header:  one 40px avatar
+    search:  header + N driver cards at 96px (each a different avatar of similar size)
+    profile: header + one 256px avatar
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_avatar_bytes
+    python -m benchmarks.bench_avatar_bytes --image photo.jpg --cards 20
+"""
+import argparse
+import io
+import os
+import random
+import shutil
+import tempfile
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from src.services.avatar_images import render_avatar_variants
+
+
+def synthetic_photo(width: int = 3024, height: int = 4032, seed: int = 7) -> bytes:
+    """Smooth shapes plus sensor-like noise, saved as a quality-90 JPEG with EXIF"""
+    rng = random.Random(seed)
+    image = Image.new("RGB", (width, height), (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(60):
+        x, y = rng.randrange(width), rng.randrange(height)
+        radius = rng.randrange(100, 900)
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius),
+                     fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    image = image.filter(ImageFilter.GaussianBlur(40))
+    noise = Image.effect_noise((width, height), 18).convert("RGB")
+    image = Image.blend(image, noise, 0.12)
+    exif = image.getexif()
+    exif[0x010F] = "Benchmark Camera"
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90, exif=exif)
+    return buffer.getvalue()
+
+
+def main(image_path: str | None, cards: int):
+    original = open(image_path, "rb").read() if image_path else synthetic_photo()
+    workdir = tempfile.mkdtemp(prefix="avatar-bytes-")
+    try:
+        source = os.path.join(workdir, "upload")
+        with open(source, "wb") as handle:
+            handle.write(original)
+        variants = render_avatar_variants(source, workdir, "0" * 64)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    pages = {
+        "header": {40: 1},
+        f"search ({cards} cards)": {40: 1, 96: cards},
+        "profile": {40: 1, 256: 1},
+    }
+    print(f"original upload: {len(original) / 1024:10.1f} KB")
+    for size, nbytes in sorted(variants.items()):
+        print(f"{size:>4}px variant:  {nbytes / 1024:10.1f} KB")
+    print()
+    print(f"{'page':<20}{'before':>12}{'after':>12}{'saved':>10}")
+    for page, slots in pages.items():
+        before = sum(count * len(original) for count in slots.values())
+        after = sum(count * variants[size] for size, count in slots.items())
+        print(f"{page:<20}{before / 1024:>10.1f}KB{after / 1024:>10.1f}KB{100 * (1 - after / before):>9.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--image", help="Use this image instead of a synthetic photo")
+    parser.add_argument("--cards", type=int, default=20)
+    args = parser.parse_args()
+    main(args.image, args.cards)
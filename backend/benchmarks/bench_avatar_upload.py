@@ -0,0 +1,186 @@
+"""
+Avatar Upload Concurrency Benchmark
+Sends N simultaneous multipart uploads of SIZE bytes through the streaming
+avatar receiver (in-process ASGI, no network or database) and reports peak
+Python heap usage measured with tracemalloc.
+
+The "buffered" mode reads each body into memory first, as the old
+`await file.read()` handler did, for comparison. Request bodies are generated
+lazily on the client side, so the peak reflects the server path only.
+
+The "route" mode posts to the real POST /api/users/me/avatar of app:app
+instead, authenticated as a throwaway user, with a JPEG padded to SIZE
+(unique bytes per upload, so every one is rendered). While the uploads run,
+the DB pool's checked-out connections are sampled and GET /api/users/me is
+polled, showing whether slow uploads starve other endpoints of connections.
+It needs DATABASE_URL (see benchmarks.common); the variants are written to
+AVATAR_UPLOAD_DIR and left to the avatar GC.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_avatar_upload --clients 200 --size-mb 5
+    python -m benchmarks.bench_avatar_upload --mode buffered
+    python -m benchmarks.bench_avatar_upload --mode route --clients 200
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import httpx
+from fastapi import FastAPI, Request
+
+from src.services.avatars import receive_avatar_upload
+
+BOUNDARY = "benchmarkboundary7d1f"
+CHUNK = 64 * 1024
+
+
+def build_app(mode: str, upload_dir: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/avatar")
+    async def upload(request: Request):
+        if mode == "buffered":
+            body = await request.body()
+            return {"size": len(body)}
+        upload = await receive_avatar_upload(request, upload_dir)
+        await asyncio.to_thread(os.unlink, upload.temp_path)
+        return {"size": upload.size}
+
+    return app
+
+
+def multipart_body(size: int, image: bytes = b"\x89PNG\r\n\x1a\n", content_type: str = "image/png"):
+    """
+    Lazily generated multipart body: `image` followed by zero filler up to
+    `size` bytes (decoders ignore data after the end of a JPEG).
+    """
+    head = (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="avatar"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{BOUNDARY}--\r\n".encode()
+    size = max(size, len(image))
+
+    async def generate():
+        yield head + image
+        remaining = size - len(image)
+        while remaining > 0:
+            # A fresh object per chunk, like bytes read off a socket
+            yield bytes(min(CHUNK, remaining))
+            remaining -= CHUNK
+            await asyncio.sleep(0)  # interleave clients like a real network would
+        yield tail
+
+    return generate(), len(head) + size + len(tail)
+
+
+async def run_route(clients: int, size: int):
+    """Uploads through the real route, with pool sampling and /me probes"""
+    from app import app
+    from src.auth import create_access_token
+    from src.config import db as db_config
+    from benchmarks.bench_avatar_bytes import synthetic_photo
+    from benchmarks.common import database, percentile, throwaway_user
+
+    photo = synthetic_photo(1280, 960)
+    async with database(), throwaway_user(full_name="Avatar Benchmark") as user:
+        pool = db_config.async_engine.pool
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=None) as client:
+
+            async def one(number: int) -> int:
+                # A unique comment segment after SOI makes each upload's hash unique
+                marker = f"bench-{user.id}-{number}-{time.time_ns()}".encode()
+                image = photo[:2] + b"\xff\xfe" + (len(marker) + 2).to_bytes(2, "big") + marker + photo[2:]
+                body, length = multipart_body(size, image, "image/jpeg")
+                response = await client.post("/api/users/me/avatar", content=body, headers={
+                    "content-type": f"multipart/form-data; boundary={BOUNDARY}",
+                    "content-length": str(length),
+                })
+                return response.status_code
+
+            uploads_done = asyncio.Event()
+            peak_checked_out = 0
+            probe_latencies: list[float] = []
+            probe_errors = 0
+
+            async def sample_pool() -> None:
+                nonlocal peak_checked_out
+                while not uploads_done.is_set():
+                    peak_checked_out = max(peak_checked_out, pool.checkedout())
+                    await asyncio.sleep(0.005)
+
+            async def probe() -> None:
+                nonlocal probe_errors
+                while not uploads_done.is_set():
+                    started = time.perf_counter()
+                    response = await client.get("/api/users/me")
+                    probe_latencies.append(time.perf_counter() - started)
+                    probe_errors += response.status_code != 200
+                    await asyncio.sleep(0.05)
+
+            background = [asyncio.create_task(sample_pool()), asyncio.create_task(probe())]
+            started = time.perf_counter()
+            statuses = await asyncio.gather(*(one(number) for number in range(clients)))
+            elapsed = time.perf_counter() - started
+            uploads_done.set()
+            await asyncio.gather(*background)
+
+    ok = sum(1 for code in statuses if code == 200)
+    print("mode:            route")
+    print(f"uploads:         {ok}/{clients} succeeded ({size / 1024 / 1024:.1f}MB each)")
+    print(f"elapsed:         {elapsed:8.2f} s ({clients / elapsed:.1f} uploads/s)")
+    print(f"pool:            peak {peak_checked_out} connections checked out "
+          f"(limit {db_config.DB_POOL_SIZE} + {db_config.DB_MAX_OVERFLOW} overflow)")
+    print(f"/me during load: {len(probe_latencies)} requests, {probe_errors} errors, "
+          f"p50 {percentile(probe_latencies, 50) * 1000:.1f} ms, p99 {percentile(probe_latencies, 99) * 1000:.1f} ms")
+
+
+async def main(clients: int, size: int, mode: str):
+    if mode == "route":
+        await run_route(clients, size)
+        return
+    upload_dir = tempfile.mkdtemp(prefix="avatar-bench-")
+    app = build_app(mode, upload_dir)
+    transport = httpx.ASGITransport(app=app)
+
+    async def one(client: httpx.AsyncClient) -> int:
+        body, length = multipart_body(size)
+        response = await client.post("/avatar", content=body, headers={
+            "content-type": f"multipart/form-data; boundary={BOUNDARY}",
+            "content-length": str(length),
+        })
+        return response.status_code
+
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            tracemalloc.start()
+            started = time.perf_counter()
+            statuses = await asyncio.gather(*(one(client) for _ in range(clients)))
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    finally:
+        shutil.rmtree(upload_dir, ignore_errors=True)
+
+    ok = sum(1 for code in statuses if code == 200)
+    total_mb = clients * size / 1024 / 1024
+    print(f"mode:            {mode}")
+    print(f"uploads:         {ok}/{clients} succeeded ({size / 1024 / 1024:.1f}MB each)")
+    print(f"elapsed:         {elapsed:8.2f} s ({total_mb / elapsed:.0f} MB/s)")
+    print(f"peak heap:       {peak / 1024 / 1024:8.1f} MB ({peak / clients / 1024:.0f} KB per upload)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--size-mb", type=float, default=4.9)
+    parser.add_argument("--mode", choices=["streaming", "buffered", "route"], default="streaming")
+    args = parser.parse_args()
+    asyncio.run(main(args.clients, int(args.size_mb * 1024 * 1024), args.mode))
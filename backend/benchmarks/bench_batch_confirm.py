@@ -0,0 +1,54 @@
+"""
+Batch Booking Confirmation Benchmark
+Confirms N pending bookings on a ride one at a time (one transaction and
+commit each) and compares it with a single batch decision.
+
+Usage (from the backend directory, against a disposable database):
+    python -m benchmarks.bench_batch_confirm --bookings 50
+"""
+import argparse
+import asyncio
+
+from benchmarks.bench_seat_contention import create_ride
+from benchmarks.common import Timer, database, throwaway_user
+from src.config import db as db_config
+from src.services.bookings import batch_decide_bookings, confirm_booking, reserve_seats
+
+
+async def pending_bookings(ride_id, passenger_id, n: int) -> list:
+    ids = []
+    for _ in range(n):
+        async with db_config.get_async_session() as session:
+            ids.append((await reserve_seats(session, ride_id, passenger_id, 1)).id)
+    return ids
+
+
+async def main(n: int):
+    async with database():
+        async with throwaway_user(full_name="Driver") as driver, throwaway_user(full_name="Passenger") as passenger:
+            one_ride = await create_ride(driver.id, n)
+            batch_ride = await create_ride(driver.id, n)
+            one_ids = await pending_bookings(one_ride, passenger.id, n)
+            batch_ids = await pending_bookings(batch_ride, passenger.id, n)
+
+            with Timer() as one_at_a_time:
+                for booking_id in one_ids:
+                    async with db_config.get_async_session() as session:
+                        assert await confirm_booking(session, booking_id, driver.id) is not None
+
+            with Timer() as batch:
+                async with db_config.get_async_session() as session:
+                    result = await batch_decide_bookings(session, batch_ride, driver.id, batch_ids, [])
+
+    assert len(result["confirmed"]) == n and result["ride_seats_available"] == 0
+    print(f"bookings:        {n}")
+    print(f"one at a time:   {one_at_a_time.elapsed * 1000:8.1f} ms ({n} transactions)")
+    print(f"batch:           {batch.elapsed * 1000:8.1f} ms (1 transaction)")
+    print(f"speedup:         {one_at_a_time.elapsed / batch.elapsed:8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bookings", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.bookings))
@@ -0,0 +1,153 @@
+"""
+Response Compression Benchmark
+CPU cost against bytes saved for ride search responses, per encoding and level.
+
+Payloads mimic GET /api/rides/search: full ride JSON (GeoJSON points,
+vehicle, labels, timestamps) plus the ranking block and the driver's star
+breakdown, for 20 and 100 results.
+
+Two sections:
+    - codecs:     compressed size and compression time of each codec/level
+    - middleware: requests per second through CompressionMiddleware over ASGI
+                  (no network) for identity, gzip, br and zstd
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_compression
+    python -m benchmarks.bench_compression --results 100 --repeat 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from src.middleware.compression import (
+    BrotliCodec, CompressionMiddleware, GzipCodec, ZstdCodec, available_codecs
+)
+
+LABELS = [
+    ("University of Waterloo, Waterloo, ON", "Union Station, Toronto, ON"),
+    ("Wilfrid Laurier University, Waterloo, ON", "Pearson Airport, Mississauga, ON"),
+    ("Fairview Park Mall, Kitchener, ON", "Yorkdale Shopping Centre, Toronto, ON"),
+    ("Conestoga College, Kitchener, ON", "Square One, Mississauga, ON"),
+]
+VEHICLES = [("Honda", "Civic", "Blue"), ("Toyota", "Corolla", "Silver"), ("Mazda", "3", "Red"), ("Kia", "Soul", "White")]
+
+
+def search_payload(results: int, seed: int = 7) -> bytes:
+    """JSON body shaped like a ride search response with `results` rides"""
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 6, 8, 0, tzinfo=timezone.utc)
+    rides = []
+    for _ in range(results):
+        origin_label, destination_label = rng.choice(LABELS)
+        make, model, color = rng.choice(VEHICLES)
+        driver_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        departure = base + timedelta(minutes=rng.uniform(-720, 720))
+        stars = [rng.randint(0, 40) for _ in range(5)]
+        rides.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "driver_id": driver_id,
+            "vehicle_make": make, "vehicle_model": model, "vehicle_color": color,
+            "vehicle_year": rng.randint(2012, 2024),
+            "origin_label": origin_label,
+            "destination_label": destination_label,
+            "origin_geom": {"type": "Point", "coordinates": [
+                round(-80.52 + rng.uniform(-0.05, 0.05), 6), round(43.46 + rng.uniform(-0.05, 0.05), 6)]},
+            "destination_geom": {"type": "Point", "coordinates": [
+                round(-79.38 + rng.uniform(-0.05, 0.05), 6), round(43.65 + rng.uniform(-0.05, 0.05), 6)]},
+            "departure_time": departure.isoformat(),
+            "seats_total": 4,
+            "seats_available": rng.randint(1, 4),
+            "price_share": f"{rng.uniform(8, 30):.2f}",
+            "status": "open",
+            "created_at": (departure - timedelta(days=rng.randint(1, 10))).isoformat(),
+            "updated_at": (departure - timedelta(hours=rng.randint(1, 48))).isoformat(),
+            "ranking": {
+                "score": round(rng.uniform(0, 5), 4),
+                "pickup_km": round(rng.uniform(0, 10), 3),
+                "dropoff_km": round(rng.uniform(0, 10), 3),
+                "time_diff_minutes": round(rng.uniform(0, 720), 1),
+            },
+            "driver_rating": {
+                "user_id": driver_id, "stars": stars, "count": sum(stars),
+                "average": round(rng.uniform(3, 5), 2), "recent_score": round(rng.uniform(3, 5), 3),
+            },
+        })
+    return json.dumps({"rides": rides, "candidates": results * 7}).encode()
+
+
+def bench_codecs(payload: bytes, repeat: int) -> None:
+    codecs = [GzipCodec(level) for level in (1, 6, 9)]
+    if "br" in available_codecs():
+        codecs += [BrotliCodec(quality) for quality in (1, 4, 6, 11)]
+    if "zstd" in available_codecs():
+        codecs += [ZstdCodec(level) for level in (1, 3, 9, 19)]
+
+    print(f"{'codec':<10} {'level':>5} {'bytes':>9} {'ratio':>7} {'us/body':>9} {'MB/s':>8}")
+    for codec in codecs:
+        level = getattr(codec, "level", getattr(codec, "quality", None))
+        compressed = codec.compress(payload)
+        runs = max(1, repeat // 20) if level in (11, 19) else repeat
+        started = time.perf_counter()
+        for _ in range(runs):
+            codec.compress(payload)
+        per_body = (time.perf_counter() - started) / runs
+        print(f"{codec.name:<10} {level:>5} {len(compressed):>9,} {len(payload) / len(compressed):>6.1f}x "
+              f"{per_body * 1e6:>9.0f} {len(payload) / per_body / 1e6:>8.1f}")
+
+
+async def bench_middleware(payload: bytes, requests: int) -> None:
+    async def endpoint(scope, receive, send):
+        await send({
+            "type": "http.response.start", "status": 200,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())],
+        })
+        await send({"type": "http.response.body", "body": payload})
+
+    app = CompressionMiddleware(endpoint)
+
+    async def call(accept_encoding: str) -> int:
+        scope = {
+            "type": "http", "method": "GET", "path": "/api/rides/search",
+            "headers": [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else [],
+        }
+        sent = 0
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            nonlocal sent
+            sent += len(message.get("body", b""))
+
+        await app(scope, receive, send)
+        return sent
+
+    print(f"{'encoding':<10} {'req/s':>8} {'bytes/resp':>11}")
+    for encoding in ["", "gzip", "br", "zstd"]:
+        if encoding and encoding not in app.codecs:
+            continue
+        started = time.perf_counter()
+        for _ in range(requests):
+            sent = await call(encoding)
+        elapsed = time.perf_counter() - started
+        print(f"{encoding or 'identity':<10} {requests / elapsed:>8,.0f} {sent:>11,}")
+
+
+def main(args) -> None:
+    for results in args.results:
+        payload = search_payload(results)
+        print(f"\n=== search response with {results} rides: {len(payload):,} bytes ===")
+        bench_codecs(payload, args.repeat)
+        print()
+        asyncio.run(bench_middleware(payload, args.repeat))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark response compression on ride search payloads")
+    parser.add_argument("--results", type=int, nargs="+", default=[20, 100])
+    parser.add_argument("--repeat", type=int, default=300)
+    main(parser.parse_args())
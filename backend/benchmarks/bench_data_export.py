@@ -0,0 +1,56 @@
+"""
+Data Export Memory Benchmark
+Seeds a throwaway passenger with N bookings, builds their export archive and
+reports wall time, archive size and peak Python heap usage (tracemalloc).
+Peak heap should stay roughly constant as N grows.
+
+Usage (from the backend directory, DATABASE_URL set):
+    python -m benchmarks.bench_data_export --bookings 100000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import tracemalloc
+
+from sqlalchemy import text
+
+from benchmarks.common import Timer, database, throwaway_user
+from benchmarks.bench_seat_contention import create_ride
+from src.config import db as db_config
+from src.services.data_export import build_export_archive
+
+SEED_BOOKINGS_SQL = text("""
+    INSERT INTO bookings (ride_id, ride_departure_time, passenger_id, seats_reserved, amount_paid, status, booked_at)
+    SELECT r.id, r.departure_time, :passenger_id, 1, 10.00, 'completed', now() - make_interval(mins => n)
+    FROM rides r, generate_series(1, :count) AS n
+    WHERE r.id = :ride_id
+""")
+
+
+async def main(args) -> None:
+    async with database(), throwaway_user() as driver, throwaway_user() as passenger:
+        ride_id = await create_ride(driver.id, 4)
+        async with db_config.get_async_session() as session:
+            await session.execute(
+                SEED_BOOKINGS_SQL, {"passenger_id": passenger.id, "count": args.bookings, "ride_id": ride_id}
+            )
+
+        path = os.path.join(tempfile.mkdtemp(), "export.zip")
+        tracemalloc.start()
+        with Timer() as timer:
+            size = await build_export_archive(passenger.id, path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        os.unlink(path)
+
+        print(f"bookings:     {args.bookings}")
+        print(f"elapsed:      {timer.elapsed:.2f}s")
+        print(f"archive size: {size / 1024 / 1024:.1f} MB")
+        print(f"peak heap:    {peak / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--bookings", type=int, default=100_000)
+    asyncio.run(main(parser.parse_args()))
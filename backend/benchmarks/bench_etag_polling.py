@@ -0,0 +1,129 @@
+"""
+Conditional GET Polling Benchmark
+Bandwidth and CPU for a frontend that polls /api/users/me, /api/users and
+/api/rides every POLL_INTERVAL seconds, with and without If-None-Match.
+
+Requests go through the full FastAPI app over ASGI (httpx ASGITransport), so
+the numbers include routing, auth, queries and serialization but no network.
+Polls run back to back; results are scaled to the polling interval.
+Every --change-every rounds the user's profile is touched, so some polls
+still get a full 200 in conditional mode.
+
+CPU time is process time of this process, which also includes the httpx
+client - the same client work happens in both modes, so the difference is
+the server-side saving.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_etag_polling --rounds 500 --change-every 30
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import text
+
+from app import app
+from src.auth import create_access_token
+from src.config import db as db_config
+from src.services.ride_bulk import insert_rides
+from benchmarks.common import database, percentile, throwaway_user
+
+ENDPOINTS = ["/api/users/me", "/api/users", "/api/rides"]
+POLL_INTERVAL = 10.0
+
+
+def response_bytes(response: httpx.Response) -> int:
+    """Bytes on the wire for a response (status line, headers, body)"""
+    header_bytes = sum(len(name) + len(value) + 4 for name, value in response.headers.raw)
+    status_line = f"HTTP/1.1 {response.status_code} {response.reason_phrase}\r\n"
+    return len(status_line) + header_bytes + 2 + len(response.content)
+
+
+async def seed_rides(driver, count: int) -> None:
+    departure = datetime.now(timezone.utc) + timedelta(days=3)
+    rows = [
+        (
+            uuid.uuid4(), driver.id, "Honda", "Civic", "Blue", 2020,
+            "Waterloo", "Toronto", -80.52, 43.46, -79.38, 43.65,
+            departure + timedelta(hours=i), 4, 4, 15, "open",
+        )
+        for i in range(count)
+    ]
+    async with db_config.get_async_session() as session:
+        await insert_rides(session, rows)
+
+
+async def poll(client: httpx.AsyncClient, rounds: int, conditional: bool, user_id, change_every: int) -> dict:
+    etags: dict[str, str] = {}
+    stats = {"requests": 0, "not_modified": 0, "bytes": 0, "latencies": []}
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+
+    for round_number in range(rounds):
+        if change_every and round_number and round_number % change_every == 0:
+            async with db_config.get_async_session() as session:
+                await session.execute(
+                    text("UPDATE users SET updated_at = now() WHERE id = :id"), {"id": user_id}
+                )
+
+        for path in ENDPOINTS:
+            headers = {"If-None-Match": etags[path]} if conditional and path in etags else {}
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            stats["latencies"].append(time.perf_counter() - started)
+            if response.status_code not in (200, 304):
+                raise RuntimeError(f"{path} returned {response.status_code}: {response.text[:200]}")
+            if "etag" in response.headers:
+                etags[path] = response.headers["etag"]
+            stats["requests"] += 1
+            stats["not_modified"] += response.status_code == 304
+            stats["bytes"] += response_bytes(response)
+
+    stats["cpu"] = time.process_time() - cpu_started
+    stats["wall"] = time.perf_counter() - wall_started
+    return stats
+
+
+def report(label: str, stats: dict) -> None:
+    requests = stats["requests"]
+    polls_per_hour = 3600 / POLL_INTERVAL * len(ENDPOINTS)
+    print(f"{label}")
+    print(f"  304s:                 {stats['not_modified']}/{requests}")
+    print(f"  bytes per request:    {stats['bytes'] / requests:,.0f}")
+    print(f"  cpu ms per request:   {stats['cpu'] / requests * 1000:.2f}")
+    print(f"  latency ms:           p50={percentile(stats['latencies'], 50) * 1000:.2f} "
+          f"p99={percentile(stats['latencies'], 99) * 1000:.2f}")
+    print(f"  per client per hour:  {stats['bytes'] / requests * polls_per_hour / 1024:,.0f} KiB, "
+          f"{stats['cpu'] / requests * polls_per_hour:.2f} cpu-s")
+
+
+async def main(args) -> None:
+    async with database():
+        async with throwaway_user(full_name="Polling Driver") as user:
+            await seed_rides(user, args.rides)
+            token = create_access_token({"sub": str(user.id)})
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench", headers={"Authorization": f"Bearer {token}"}
+            ) as client:
+                await poll(client, 5, False, user.id, 0)  # warm up
+                full = await poll(client, args.rounds, False, user.id, args.change_every)
+                conditional = await poll(client, args.rounds, True, user.id, args.change_every)
+
+    print(f"{args.rounds} polling rounds x {len(ENDPOINTS)} endpoints, profile changes every {args.change_every} rounds")
+    report("without If-None-Match", full)
+    report("with If-None-Match", conditional)
+    print(f"bandwidth saved: {1 - conditional['bytes'] / full['bytes']:.0%}, "
+          f"cpu saved: {1 - conditional['cpu'] / full['cpu']:.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark conditional GET for polling clients")
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument("--rides", type=int, default=5, help="Rides to seed for the driver")
+    parser.add_argument("--change-every", type=int, default=30,
+                        help="Touch the profile every N rounds (30 = every 5 minutes at 10s polling)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,67 @@
+"""
+Job Queue Throughput Benchmark
+Enqueues N no-op jobs in bulk, then drains them with W in-process workers
+(each claiming batches with SKIP LOCKED) and reports enqueue and drain rates.
+
+Run several copies at once to measure multi-process throughput; each copy
+only counts the jobs it drained.
+
+Usage (from the backend directory, against a disposable database):
+    python -m benchmarks.bench_job_queue --jobs 100000 --workers 4 --batch-size 500
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import text
+
+from benchmarks.common import Timer, database
+from src.config import db as db_config
+from src.services.jobs import JobWorker, enqueue_many, job_handler
+
+ENQUEUE_CHUNK = 10_000
+
+
+@job_handler("bench.noop")
+async def noop(payload: dict) -> None:
+    return None
+
+
+async def main(args) -> None:
+    async with database():
+        with Timer() as enqueueing:
+            for start in range(0, args.jobs, ENQUEUE_CHUNK):
+                count = min(ENQUEUE_CHUNK, args.jobs - start)
+                async with db_config.get_async_session() as session:
+                    await enqueue_many(session, "bench.noop", [{"n": start + i} for i in range(count)])
+        print(f"enqueued {args.jobs} jobs in {enqueueing.elapsed:.2f}s ({args.jobs / enqueueing.elapsed:,.0f} jobs/s)")
+
+        workers = [
+            JobWorker(concurrency=args.concurrency, batch_size=args.batch_size, poll_interval=0.05)
+            for _ in range(args.workers)
+        ]
+        with Timer() as draining:
+            for worker in workers:
+                worker._task = asyncio.create_task(worker.run())
+            while True:
+                await asyncio.sleep(0.1)
+                async with db_config.get_async_session() as session:
+                    remaining = (await session.execute(
+                        text("SELECT count(*) FROM jobs WHERE kind = 'bench.noop'")
+                    )).scalar()
+                if remaining == 0:
+                    break
+        for worker in workers:
+            await worker.stop()
+
+        processed = sum(worker.processed for worker in workers)
+        print(f"drained {processed} jobs in {draining.elapsed:.2f}s ({processed / draining.elapsed:,.0f} jobs/s)")
+        print("per worker: " + ", ".join(str(worker.processed) for worker in workers))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--jobs", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=500, help="Jobs in flight per worker")
+    parser.add_argument("--batch-size", type=int, default=500, help="Jobs claimed per query")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,123 @@
+"""
+Logging Pipeline Benchmark
+Request latency at a fixed arrival rate (default 5k req/s) with logging done
+synchronously on the event loop versus through the bounded queue pipeline
+(src.config.logging_config).
+
+Requests arrive open-loop: each is scheduled at its arrival time, logs
+--lines JSON records (with a request id and extras, like a handler plus the
+access log) and finishes. Latency is finish time minus scheduled arrival, so
+a sink that blocks the loop shows up as queueing delay for every request
+behind it.
+
+The sink writes to /dev/null after sleeping --sink-delay-us per line, to
+model a slow terminal, pipe or log shipper.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_logging --rate 5000 --seconds 5 --sink-delay-us 0 50 200
+"""
+import argparse
+import asyncio
+import io
+import logging
+import logging.handlers
+import os
+import queue
+import time
+
+from src.config.logging_config import BoundedQueueHandler, JsonFormatter, LOG_QUEUE_SIZE, request_id_var
+from benchmarks.common import percentile
+
+
+class SlowSink(io.TextIOBase):
+    """Text stream that takes `delay` seconds per write"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.target = open(os.devnull, "w")
+        self.lines = 0
+
+    def write(self, text: str) -> int:
+        if self.delay:
+            time.sleep(self.delay)
+        self.lines += 1
+        return self.target.write(text)
+
+    def flush(self) -> None:
+        self.target.flush()
+
+
+def install(mode: str, sink: SlowSink):
+    """Point the root logger at the sink, directly or through the queue; returns (handler, listener)"""
+    stream_handler = logging.StreamHandler(sink)
+    stream_handler.setFormatter(JsonFormatter())
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    if mode == "sync":
+        root.handlers[:] = [stream_handler]
+        return stream_handler, None
+    queue_handler = BoundedQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    listener = logging.handlers.QueueListener(queue_handler.queue, stream_handler)
+    listener.start()
+    root.handlers[:] = [queue_handler]
+    return queue_handler, listener
+
+
+async def run(mode: str, rate: int, seconds: float, lines: int, sink_delay: float) -> dict:
+    sink = SlowSink(sink_delay)
+    handler, listener = install(mode, sink)
+    logger = logging.getLogger("bench.request")
+    loop = asyncio.get_running_loop()
+    latencies: list[float] = []
+    total = int(rate * seconds)
+    done = asyncio.Event()
+
+    async def request(number: int, scheduled: float) -> None:
+        request_id_var.set(f"req-{number}")
+        for line in range(lines):
+            logger.info("GET /api/rides/search 200", extra={"line": line, "duration_ms": 12.5})
+        await asyncio.sleep(0)
+        latencies.append(loop.time() - scheduled)
+        if len(latencies) == total:
+            done.set()
+
+    start = loop.time() + 0.05
+    for number in range(total):
+        scheduled = start + number / rate
+        loop.call_at(scheduled, lambda n=number, s=scheduled: asyncio.ensure_future(request(n, s)))
+    await done.wait()
+    elapsed = loop.time() - start
+
+    if listener is not None:
+        listener.stop()  # drains whatever is still queued
+    logging.getLogger().handlers[:] = []
+    return {
+        "latencies": latencies,
+        "elapsed": elapsed,
+        "written": sink.lines,
+        "dropped": getattr(handler, "total_dropped", 0),
+        "sampled_out": getattr(handler, "total_sampled_out", 0),
+    }
+
+
+def main(args) -> None:
+    print(f"{args.rate} req/s for {args.seconds}s, {args.lines} log line(s) per request")
+    print(f"{'sink us/line':>12} {'mode':<6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>9} "
+          f"{'achieved/s':>10} {'written':>9} {'dropped':>8} {'sampled':>8}")
+    for delay_us in args.sink_delay_us:
+        for mode in ("sync", "queue"):
+            result = asyncio.run(run(mode, args.rate, args.seconds, args.lines, delay_us / 1e6))
+            latencies = result["latencies"]
+            print(f"{delay_us:>12} {mode:<6} {percentile(latencies, 50) * 1000:>8.2f} "
+                  f"{percentile(latencies, 99) * 1000:>8.2f} {max(latencies) * 1000:>9.1f} "
+                  f"{len(latencies) / result['elapsed']:>10,.0f} {result['written']:>9,} "
+                  f"{result['dropped']:>8,} {result['sampled_out']:>8,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark logging latency impact at a fixed request rate")
+    parser.add_argument("--rate", type=int, default=5000)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--lines", type=int, default=2, help="Log records per request")
+    parser.add_argument("--sink-delay-us", type=int, nargs="+", default=[0, 50, 200])
+    main(parser.parse_args())
@@ -0,0 +1,99 @@
+"""
+Metrics Overhead Benchmark
+Per-request cost of MetricsMiddleware and the cost of rendering /metrics,
+in single-process mode and in multiprocess mode (PROMETHEUS_MULTIPROC_DIR,
+mmap-backed files).
+
+The middleware wraps a trivial ASGI endpoint called directly (no server), so
+the difference between the two timings is the whole per-request overhead:
+in-flight gauge, send wrapper, route template lookup, histogram and counter.
+
+Each mode runs in a fresh interpreter because prometheus_client picks its
+storage when it is first imported.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_metrics_overhead --requests 200000
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+async def run_mode(requests: int) -> None:
+    from starlette.routing import Route
+
+    from src.middleware.metrics import MetricsMiddleware
+    from src.services.metrics import record_cache_lookup, render_metrics
+
+    route = Route("/rides/{ride_id}/waitlist", endpoint=lambda request: None)
+
+    async def endpoint(scope, receive, send):
+        scope["route"] = route  # what the router would set
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    def make_scope(i: int) -> dict:
+        return {"type": "http", "method": "GET", "path": f"/api/rides/{i}/waitlist", "headers": []}
+
+    scopes = [make_scope(i) for i in range(1000)]
+    results = {}
+    for label, app in (("bare endpoint", endpoint), ("with metrics", MetricsMiddleware(endpoint))):
+        for scope in scopes[:100]:
+            await app(dict(scope), receive, send)  # warm up label children
+        started = time.perf_counter()
+        for i in range(requests):
+            await app(dict(scopes[i % 1000]), receive, send)
+        results[label] = (time.perf_counter() - started) / requests
+
+    started = time.perf_counter()
+    for i in range(requests):
+        record_cache_lookup("idempotency", i % 3 == 0)
+    cache_cost = (time.perf_counter() - started) / requests
+
+    started = time.perf_counter()
+    for _ in range(50):
+        body, _ = await render_metrics()
+    render_cost = (time.perf_counter() - started) / 50
+
+    for label, seconds in results.items():
+        print(f"  {label:<16} {seconds * 1e6:8.2f} us/request")
+    print(f"  overhead         {(results['with metrics'] - results['bare endpoint']) * 1e6:8.2f} us/request")
+    print(f"  cache counter    {cache_cost * 1e6:8.2f} us/lookup")
+    print(f"  /metrics render  {render_cost * 1e3:8.2f} ms ({len(body):,} bytes)")
+
+
+def main(args) -> None:
+    if args.mode:
+        asyncio.run(run_mode(args.requests))
+        return
+
+    for mode in ("single", "multiprocess"):
+        env = dict(os.environ)
+        with tempfile.TemporaryDirectory() as multiproc_dir:
+            if mode == "multiprocess":
+                env["PROMETHEUS_MULTIPROC_DIR"] = multiproc_dir
+            else:
+                env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+            print(f"{mode}:", flush=True)
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_metrics_overhead",
+                 "--mode", mode, "--requests", str(args.requests)],
+                env=env, check=True,
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark per-request metrics overhead")
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--mode", choices=["single", "multiprocess"], help=argparse.SUPPRESS)
+    main(parser.parse_args())
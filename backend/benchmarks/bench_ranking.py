@@ -0,0 +1,99 @@
+"""
+Ride Ranking Benchmark
+Compares the vectorized ranking stage against a per-row Python loop.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_ranking
+    python -m benchmarks.bench_ranking --candidates 50000 --k 20 --repeat 20
+"""
+import argparse
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from src.services.ranking import (
+    DEFAULT_WEIGHTS, EARTH_RADIUS_KM, RideCandidates, rank_candidates
+)
+
+
+def make_rows(n: int, seed: int = 42) -> list[tuple]:
+    """Generate candidate rows scattered around Toronto"""
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 6, 8, 0, tzinfo=timezone.utc)
+    return [
+        (
+            i,
+            -79.38 + rng.uniform(-0.1, 0.1),
+            43.65 + rng.uniform(-0.1, 0.1),
+            -79.61 + rng.uniform(-0.1, 0.1),
+            43.68 + rng.uniform(-0.1, 0.1),
+            base + timedelta(minutes=rng.uniform(-720, 720)),
+            round(rng.uniform(5, 40), 2),
+            round(rng.uniform(3, 5), 2),
+        )
+        for i in range(n)
+    ]
+
+
+def rank_loop(rows, origin, destination, departure, k, weights=DEFAULT_WEIGHTS):
+    """Reference implementation: score each row in Python, then sort"""
+    def haversine(lng1, lat1, lng2, lat2):
+        lng1, lat1, lng2, lat2 = map(math.radians, (lng1, lat1, lng2, lat2))
+        a = math.sin((lat1 - lat2) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng1 - lng2) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+    scored = []
+    for row in rows:
+        score = (
+            weights.pickup_km * haversine(row[1], row[2], *origin)
+            + weights.dropoff_km * haversine(row[3], row[4], *destination)
+            + weights.time_minutes * abs((row[5] - departure).total_seconds()) / 60
+            + weights.price * row[6]
+            - weights.rating * row[7]
+        )
+        scored.append((score, row[0]))
+    scored.sort()
+    return [ride_id for _, ride_id in scored[:k]]
+
+
+def timed(fn, repeat: int) -> float:
+    """Best-of-N wall time in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--candidates", type=int, default=50_000)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    rows = make_rows(args.candidates)
+    origin = (-79.38, 43.65)
+    destination = (-79.61, 43.68)
+    departure = datetime(2025, 1, 6, 8, 0, tzinfo=timezone.utc)
+
+    candidates = RideCandidates.from_rows(rows)
+    vectorized = [r["id"] for r in rank_candidates(candidates, origin, destination, departure, k=args.k)]
+    loop = rank_loop(rows, origin, destination, departure, args.k)
+    assert vectorized == loop, "vectorized ranking disagrees with reference loop"
+
+    load_ms = timed(lambda: RideCandidates.from_rows(rows), args.repeat)
+    rank_ms = timed(lambda: rank_candidates(candidates, origin, destination, departure, k=args.k), args.repeat)
+    loop_ms = timed(lambda: rank_loop(rows, origin, destination, departure, args.k), args.repeat)
+
+    print(f"candidates per query:  {args.candidates:,} (top {args.k})")
+    print(f"load columns:          {load_ms:8.2f} ms")
+    print(f"vectorized rank:       {rank_ms:8.2f} ms")
+    print(f"per-row Python loop:   {loop_ms:8.2f} ms")
+    print(f"speedup (rank only):   {loop_ms / rank_ms:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Driver Card Rating Benchmark
+Renders the rating part of N driver cards (star breakdown + recency-weighted
+score) two ways:
+
+    - per card: one aggregate query over reviews per driver (N round trips)
+    - rollups:  one bulk read of user_rating_rollups for all N drivers
+
+Seeds N drivers with completed rides and reviews, rebuilds the rollups, checks
+both paths agree, then deletes everything it created.
+
+Usage (from the backend directory, against a disposable database):
+    python -m benchmarks.bench_rating_cards --drivers 100 --reviews 200
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import delete, text
+
+from benchmarks.common import Timer, database, throwaway_user
+from src.config import db as db_config
+from src.models.user import User
+from src.services.ratings import HALF_LIFE_SECONDS, get_rating_rollups, rebuild_rating_rollups
+from src.services.ride_bulk import insert_rides
+
+PER_CARD_SQL = text("""
+    SELECT count(*) FILTER (WHERE rating = 1), count(*) FILTER (WHERE rating = 2),
+           count(*) FILTER (WHERE rating = 3), count(*) FILTER (WHERE rating = 4),
+           count(*) FILTER (WHERE rating = 5),
+           sum(rating * power(0.5, CAST(extract(epoch FROM now() - created_at) AS double precision) / :half_life_seconds))
+             / sum(power(0.5, CAST(extract(epoch FROM now() - created_at) AS double precision) / :half_life_seconds))
+    FROM reviews
+    WHERE reviewee_id = :user_id
+""")
+
+
+async def seed(drivers: int, reviews: int, passenger_id) -> list:
+    """Create drivers, one completed ride per review and a review on each ride"""
+    now = datetime.now(timezone.utc)
+    async with db_config.get_async_session() as session:
+        result = await session.execute(text("""
+            INSERT INTO users (full_name, email, password_hash)
+            SELECT 'Bench Driver ' || n, 'bench-driver-' || n || '-' || :tag || '@example.com', 'not-a-real-hash'
+            FROM generate_series(1, :drivers) AS n
+            RETURNING id
+        """), {"drivers": drivers, "tag": uuid.uuid4().hex[:8]})
+        driver_ids = [row.id for row in result]
+
+        rows = [
+            (uuid.uuid4(), driver_id, None, None, None, None, "A", "B",
+             -80.52, 43.46, -79.38, 43.65, now - timedelta(days=random.randint(1, 700)),
+             3, 3, Decimal("10.00"), "completed")
+            for driver_id in driver_ids for _ in range(reviews)
+        ]
+        await insert_rides(session, rows)
+        await session.execute(text("""
+            INSERT INTO reviews (ride_id, ride_departure_time, reviewer_id, reviewee_id, rating, created_at)
+            SELECT id, departure_time, CAST(:passenger_id AS uuid), driver_id,
+                   1 + floor(random() * 5)::int, departure_time + interval '1 day'
+            FROM rides
+            WHERE driver_id = ANY(CAST(:driver_ids AS uuid[]))
+        """), {"passenger_id": passenger_id, "driver_ids": driver_ids})
+    return driver_ids
+
+
+async def per_card(driver_ids: list) -> dict:
+    cards = {}
+    async with db_config.get_async_session() as session:
+        for driver_id in driver_ids:
+            result = await session.execute(PER_CARD_SQL, {"user_id": driver_id, "half_life_seconds": HALF_LIFE_SECONDS})
+            row = result.one()
+            cards[driver_id] = list(row[:5])
+    return cards
+
+
+async def rollups(driver_ids: list) -> dict:
+    async with db_config.get_async_session() as session:
+        summaries = await get_rating_rollups(session, driver_ids)
+    return {user_id: summary["stars"] for user_id, summary in summaries.items()}
+
+
+async def main(drivers: int, reviews: int, repeats: int):
+    async with database():
+        async with throwaway_user(full_name="Passenger") as passenger:
+            driver_ids = await seed(drivers, reviews, passenger.id)
+            try:
+                await rebuild_rating_rollups()
+
+                per_card_times, rollup_times = [], []
+                for _ in range(repeats):
+                    with Timer() as t:
+                        expected = await per_card(driver_ids)
+                    per_card_times.append(t.elapsed)
+                    with Timer() as t:
+                        actual = await rollups(driver_ids)
+                    rollup_times.append(t.elapsed)
+                assert expected == actual, "rollups disagree with the reviews table"
+            finally:
+                async with db_config.get_async_session() as session:
+                    await session.execute(delete(User).where(User.id.in_(driver_ids)))
+
+    per_card_ms = statistics.median(per_card_times) * 1000
+    rollup_ms = statistics.median(rollup_times) * 1000
+    print(f"driver cards:    {drivers} ({reviews} reviews each)")
+    print(f"per-card query:  {per_card_ms:8.1f} ms ({drivers} queries)")
+    print(f"bulk rollups:    {rollup_ms:8.1f} ms (1 query)")
+    print(f"speedup:         {per_card_ms / rollup_ms:8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--drivers", type=int, default=100)
+    parser.add_argument("--reviews", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.drivers, args.reviews, args.repeats))
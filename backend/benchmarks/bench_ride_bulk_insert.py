@@ -0,0 +1,95 @@
+"""
+Bulk Ride Insert Benchmark
+Measures ride creation throughput (rides per second) for:
+    - per-row ORM add + commit (the naive path)
+    - batched INSERT ... SELECT FROM unnest (recurring rides)
+    - COPY into a staging table (admin bulk import)
+
+Usage (from the backend directory, against a disposable database):
+    python -m benchmarks.bench_ride_bulk_insert --rides 10000
+"""
+import argparse
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from geoalchemy2.elements import WKTElement
+from sqlalchemy import delete
+
+from benchmarks.common import Timer, database, throwaway_user
+from src.config import db as db_config
+from src.models.ride import Ride
+from src.services.ride_bulk import copy_rides, insert_rides, chunked
+
+
+def make_rows(driver_id, n: int) -> list[tuple]:
+    """Ride rows in RIDE_COLUMNS order, one per day"""
+    start = datetime.now(timezone.utc) + timedelta(days=1)
+    return [
+        (
+            uuid.uuid4(), driver_id, "Toyota", "Corolla", "Blue", 2020,
+            "Waterloo", "Toronto", -80.52, 43.46, -79.38, 43.65,
+            start + timedelta(hours=i), 4, 4, Decimal("15.00"), "open",
+        )
+        for i in range(n)
+    ]
+
+
+async def per_row_orm(driver_id, n: int) -> float:
+    """Naive path: one ORM add + commit per ride"""
+    with Timer() as t:
+        for row in make_rows(driver_id, n):
+            async with db_config.get_async_session() as session:
+                session.add(Ride(
+                    driver_id=driver_id,
+                    origin_geom=WKTElement(f"POINT({row[8]} {row[9]})", srid=4326),
+                    destination_geom=WKTElement(f"POINT({row[10]} {row[11]})", srid=4326),
+                    departure_time=row[12], seats_total=4, seats_available=4,
+                    price_share=row[15],
+                ))
+    return n / t.elapsed
+
+
+async def unnest_insert(driver_id, n: int) -> float:
+    rows = make_rows(driver_id, n)
+    with Timer() as t:
+        async with db_config.get_async_session() as session:
+            await insert_rides(session, rows)
+    return n / t.elapsed
+
+
+async def copy_insert(driver_id, n: int) -> float:
+    rows = make_rows(driver_id, n)
+
+    async def batches():
+        for batch in chunked(rows, 5000):
+            yield batch
+
+    with Timer() as t:
+        async with db_config.get_async_session() as session:
+            await copy_rides(session, batches())
+    return n / t.elapsed
+
+
+async def main(rides: int, orm_rides: int):
+    async with database():
+        async with throwaway_user() as driver:
+            results = {
+                f"per-row ORM ({orm_rides} rides)": await per_row_orm(driver.id, orm_rides),
+                f"unnest batch ({rides} rides)": await unnest_insert(driver.id, rides),
+                f"COPY staging ({rides} rides)": await copy_insert(driver.id, rides),
+            }
+            async with db_config.get_async_session() as session:
+                await session.execute(delete(Ride).where(Ride.driver_id == driver.id))
+
+    for label, rate in results.items():
+        print(f"{label:32s} {rate:12,.0f} rides/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rides", type=int, default=10_000)
+    parser.add_argument("--orm-rides", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.rides, args.orm_rides))
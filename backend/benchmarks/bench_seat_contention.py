@@ -0,0 +1,96 @@
+"""
+Seat Contention Benchmark
+N concurrent clients race for the last seats of a single ride through the
+atomic reserve_seats path, then the result is checked for correctness:
+
+    - seats sold == seats that were available (no overselling, no lost seats)
+    - the ride ends with seats_available = 0 and status = 'full'
+    - the number of bookings rows matches the number of successful clients
+
+Usage (from the backend directory, against a disposable database):
+    python -m benchmarks.bench_seat_contention --clients 500 --seats 20
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from benchmarks.common import database, percentile, throwaway_user
+from src.config import db as db_config
+from src.services.bookings import reserve_seats
+from src.services.ride_bulk import insert_rides
+
+
+async def create_ride(driver_id, seats: int):
+    ride_id = uuid.uuid4()
+    departure = datetime.now(timezone.utc) + timedelta(days=1)
+    async with db_config.get_async_session() as session:
+        await insert_rides(session, [(
+            ride_id, driver_id, None, None, None, None, "A", "B",
+            -80.52, 43.46, -79.38, 43.65, departure, seats, seats, Decimal("10.00"), "open",
+        )])
+    return ride_id
+
+
+async def client(ride_id, passenger_id, seats_per_client: int, latencies: list) -> bool:
+    started = time.perf_counter()
+    try:
+        async with db_config.get_async_session() as session:
+            await reserve_seats(session, ride_id, passenger_id, seats_per_client)
+        return True
+    except HTTPException:
+        return False
+    finally:
+        latencies.append(time.perf_counter() - started)
+
+
+async def main(clients: int, seats: int, seats_per_client: int):
+    async with database():
+        async with throwaway_user(full_name="Driver") as driver, throwaway_user(full_name="Passenger") as passenger:
+            ride_id = await create_ride(driver.id, seats)
+            latencies: list[float] = []
+
+            started = time.perf_counter()
+            results = await asyncio.gather(*(
+                client(ride_id, passenger.id, seats_per_client, latencies) for _ in range(clients)
+            ))
+            elapsed = time.perf_counter() - started
+
+            async with db_config.get_async_session() as session:
+                ride = (await session.execute(
+                    text("SELECT seats_available, status FROM rides WHERE id = :id"), {"id": ride_id}
+                )).one()
+                booked = (await session.execute(
+                    text("SELECT count(*), coalesce(sum(seats_reserved), 0) FROM bookings WHERE ride_id = :id"),
+                    {"id": ride_id}
+                )).one()
+
+    successes = sum(results)
+    expected = seats // seats_per_client
+    print(f"clients:            {clients}")
+    print(f"successful:         {successes} (expected {expected})")
+    print(f"seats sold:         {booked[1]} of {seats}, ride now {ride.seats_available} left / {ride.status}")
+    print(f"throughput:         {clients / elapsed:,.0f} attempts/s ({elapsed * 1000:.0f} ms total)")
+    print(f"latency p50/p95/p99: {percentile(latencies, 50) * 1000:.1f} / "
+          f"{percentile(latencies, 95) * 1000:.1f} / {percentile(latencies, 99) * 1000:.1f} ms")
+
+    assert successes == expected == booked[0], "booking count mismatch"
+    assert booked[1] == expected * seats_per_client, "seats sold mismatch"
+    assert ride.seats_available == seats - expected * seats_per_client, "ride seat count mismatch"
+    if seats % seats_per_client == 0:
+        assert ride.status == "full", "ride should be full"
+    print("correctness:        OK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--seats", type=int, default=20)
+    parser.add_argument("--seats-per-client", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(main(args.clients, args.seats, args.seats_per_client))
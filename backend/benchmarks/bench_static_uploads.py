@@ -0,0 +1,123 @@
+"""
+Avatar Static Serving Benchmark
+Requests per second for avatar fetches through the /uploads app, called
+directly over ASGI (no network, no server), for:
+
+    - starlette:   plain StaticFiles (previous setup)
+    - uploads:     UploadStaticFiles without the hot cache
+    - hot-cache:   UploadStaticFiles with the in-memory hot cache
+    - revalidate:  conditional requests answered with 304
+
+Requests follow a Zipf-like popularity curve over FILES avatar variants,
+like driver cards on a busy search page.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_static_uploads --requests 20000 --files 2000
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from starlette.staticfiles import StaticFiles
+
+from src.middleware.static_files import UploadStaticFiles
+
+
+def make_files(root: str, count: int, size: int) -> list[str]:
+    """Write content-addressed-looking variant files and return their URL paths"""
+    paths = []
+    for i in range(count):
+        name = f"{i:032x}"
+        os.makedirs(os.path.join(root, "avatars", name[:2]), exist_ok=True)
+        with open(os.path.join(root, "avatars", name[:2], f"{name}_96.webp"), "wb") as handle:
+            handle.write(os.urandom(size))
+        paths.append(f"/avatars/{name[:2]}/{name}_96.webp")
+    return paths
+
+
+async def fetch(app, path: str, headers: list) -> tuple[int, list]:
+    """Call the ASGI app once and return (status, response headers)"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "headers": headers,
+        "server": ("bench", 80), "client": ("127.0.0.1", 1234),
+    }
+    result = {}
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if body_sent:
+            # Client stays connected until the response is done
+            await asyncio.Event().wait()
+        body_sent = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+            result["headers"] = message["headers"]
+
+    await app(scope, receive, send)
+    return result["status"], result["headers"]
+
+
+async def run(app, paths: list[str], requests: int, concurrency: int, conditional: bool = False) -> float:
+    rng = random.Random(1)
+    weights = [1 / (rank + 1) for rank in range(len(paths))]
+    targets = rng.choices(paths, weights=weights, k=requests)
+
+    etags = {}
+    if conditional:
+        for path in set(targets):
+            _, headers = await fetch(app, path, [])
+            etags[path] = dict(headers)[b"etag"]
+
+    queue = iter(targets)
+
+    async def worker():
+        for path in queue:
+            headers = [(b"if-none-match", etags[path])] if conditional else []
+            status, _ = await fetch(app, path, headers)
+            assert status == (304 if conditional else 200), status
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - started)
+
+
+async def main(requests: int, files: int, size: int, concurrency: int):
+    root = tempfile.mkdtemp(prefix="uploads-bench-")
+    try:
+        paths = make_files(root, files, size)
+        modes = {
+            "starlette": (StaticFiles(directory=root), False),
+            "uploads": (UploadStaticFiles(directory=root, hot_cache_bytes=0), False),
+            "hot-cache": (UploadStaticFiles(directory=root), False),
+            "revalidate": (UploadStaticFiles(directory=root, hot_cache_bytes=0), True),
+        }
+        print(f"{requests} requests over {files} files of {size} bytes, concurrency {concurrency}")
+        for mode, (app, conditional) in modes.items():
+            rps = await run(app, paths, requests, concurrency, conditional)
+            extra = ""
+            if getattr(app, "hot_cache", None) is not None:
+                cache = app.hot_cache
+                extra = f"  (hit ratio {cache.hits / max(1, cache.hits + cache.misses):.0%}, {cache.size / 1024:.0f} KB cached)"
+            print(f"{mode:<12}{rps:10.0f} req/s{extra}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=1500, help="Bytes per file (96px WebP is ~1-3KB)")
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.files, args.size, args.concurrency))
@@ -0,0 +1,147 @@
+"""
+Worker Count Benchmark
+Throughput and latency of the production launcher (gunicorn.conf.py) with
+one worker versus several, plus how long a SIGTERM drain takes.
+
+For each worker count, gunicorn serves app:app on a local port and
+--client-processes processes (so the load generator is not the bottleneck)
+each run closed-loop httpx clients against --paths for --duration seconds.
+
+Paths default to /livez, which needs no database: it measures the
+per-request cost of the HTTP stack and middleware, where extra workers help
+most. Add DB-backed paths (e.g. /api/rides) with a Postgres behind
+DATABASE_URL, or point benchmarks.loadtest at the server with --url for
+authenticated scenarios.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_workers --workers 1 4 --duration 15
+    python -m benchmarks.bench_workers --workers 1 2 4 8 --paths /livez /api/rides
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import percentile
+
+
+def client_process(url: str, paths: list[str], concurrency: int, duration: float, warmup: float, results) -> None:
+    async def run() -> tuple[list[float], int]:
+        latencies: list[float] = []
+        errors = 0
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+            measuring_from = time.perf_counter() + warmup
+            deadline = measuring_from + duration
+
+            async def worker(offset: int) -> None:
+                nonlocal errors
+                count = offset
+                while (started := time.perf_counter()) < deadline:
+                    path = paths[count % len(paths)]
+                    count += 1
+                    try:
+                        ok = (await client.get(path)).status_code < 400
+                    except httpx.HTTPError:
+                        ok = False
+                    if started >= measuring_from:
+                        latencies.append(time.perf_counter() - started)
+                        errors += not ok
+
+            await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        return latencies, errors
+
+    results.put(asyncio.run(run()))
+
+
+def start_gunicorn(workers: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}")
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)  # gunicorn.conf.py makes a fresh one
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_live(url: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/livez", timeout=2).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.3)
+    raise RuntimeError(f"gunicorn at {url} did not come up within {timeout:.0f}s")
+
+
+def run_workers(workers: int, args) -> dict:
+    url = f"http://127.0.0.1:{args.port}"
+    server = start_gunicorn(workers, args.port)
+    try:
+        wait_until_live(url)
+        time.sleep(1)  # let every worker finish its lifespan startup
+
+        results = multiprocessing.Queue()
+        per_process = max(1, args.concurrency // args.client_processes)
+        clients = [
+            multiprocessing.Process(
+                target=client_process,
+                args=(url, args.paths, per_process, args.duration, args.warmup, results),
+            )
+            for _ in range(args.client_processes)
+        ]
+        for client in clients:
+            client.start()
+        latencies, errors = [], 0
+        for _ in clients:
+            process_latencies, process_errors = results.get()
+            latencies.extend(process_latencies)
+            errors += process_errors
+        for client in clients:
+            client.join()
+    finally:
+        started = time.perf_counter()
+        server.send_signal(signal.SIGTERM)
+        exit_code = server.wait(timeout=120)
+        drain_seconds = time.perf_counter() - started
+
+    return {
+        "rps": len(latencies) / args.duration,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "errors": errors,
+        "drain": drain_seconds,
+        "exit_code": exit_code,
+    }
+
+
+def main(args) -> None:
+    print(f"{os.cpu_count()} CPUs, {args.concurrency} clients in {args.client_processes} process(es), "
+          f"paths {' '.join(args.paths)}, {args.duration:.0f}s per run")
+    print(f"{'workers':>7} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'SIGTERM->exit':>14}")
+    baseline = None
+    for workers in args.workers:
+        stats = run_workers(workers, args)
+        baseline = baseline or stats["rps"]
+        print(f"{workers:>7} {stats['rps']:>10,.0f} {stats['p50'] * 1000:>8.2f} {stats['p99'] * 1000:>8.2f} "
+              f"{stats['errors']:>7} {stats['drain']:>12.2f}s  (x{stats['rps'] / baseline:.2f}, exit {stats['exit_code']})",
+              flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark single vs multi-worker throughput")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--paths", nargs="+", default=["/livez"])
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent clients across all processes")
+    parser.add_argument("--client-processes", type=int, default=max(1, os.cpu_count() or 1))
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--port", type=int, default=8766)
+    main(parser.parse_args())
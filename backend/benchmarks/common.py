@@ -0,0 +1,67 @@
+"""
+Shared Benchmark Helpers
+Database lifecycle, throwaway users and timing utilities used by the DB-backed benchmarks.
+Requires DATABASE_URL to point at a disposable local Postgres + PostGIS database.
+"""
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from sqlalchemy import delete
+
+from src.config import db as db_config
+from src.models.user import User
+
+
+@asynccontextmanager
+async def database():
+    """Initialize the engine for the duration of a benchmark"""
+    await db_config.init_db()
+    try:
+        yield
+    finally:
+        await db_config.close_db()
+
+
+@asynccontextmanager
+async def throwaway_user(**fields):
+    """
+    Create a user for the benchmark and delete it (and everything that
+    cascades from it) afterwards.
+    """
+    async with db_config.get_async_session() as session:
+        user = User(
+            full_name=fields.pop("full_name", "Benchmark User"),
+            email=fields.pop("email", f"bench-{uuid.uuid4().hex[:12]}@example.com"),
+            password_hash=fields.pop("password_hash", "not-a-real-hash"),
+            **fields,
+        )
+        session.add(user)
+        await session.flush()
+        user_id = user.id
+    try:
+        yield user
+    finally:
+        async with db_config.get_async_session() as session:
+            await session.execute(delete(User).where(User.id == user_id))
+
+
+class Timer:
+    """Context manager measuring wall time in seconds"""
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+        return False
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
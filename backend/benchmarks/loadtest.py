@@ -0,0 +1,430 @@
+"""
+HTTP Load Test
+End-to-end throughput and latency of the real API routes under concurrent
+async clients, saved as JSON so runs can be compared across commits.
+
+    run:      seed users and rides, start the server (or use --url), drive each
+              scenario for --duration seconds with --concurrency clients,
+              print a table and write benchmarks/results/<commit>-<time>.json
+    compare:  diff two result files and flag regressions
+
+Scenarios (closed loop: each client sends its next request as soon as the
+previous one returns):
+
+    health   GET  /health
+    login    POST /api/auth/login          (bcrypt verify per request)
+    me       GET  /api/users/me
+    rides    GET  /api/rides
+    search   GET  /api/rides/search        (random corridor between seeded cities)
+    avatar   POST /api/users/me/avatar     (1280x960 JPEG, unique bytes per upload)
+    mixed    weighted mix of the above, reported per operation as well
+
+Seeded data is tagged with the run id (emails loadtest-<run>-N@example.com)
+and deleted afterwards; rides cascade with their drivers. Uploaded avatar
+files are left to the avatar GC job.
+
+Requires DATABASE_URL to point at a disposable local Postgres + PostGIS
+database. Without --url, uvicorn serves app:app in a child process with
+the same environment.
+
+Usage (from the backend directory):
+    python -m benchmarks.loadtest run --concurrency 50 --duration 20
+    python -m benchmarks.loadtest run --url http://127.0.0.1:8000 --scenarios me rides search
+    python -m benchmarks.loadtest compare benchmarks/results/OLD.json benchmarks/results/NEW.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import text
+
+from benchmarks.common import percentile
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+SCENARIOS = ("health", "login", "me", "rides", "search", "avatar", "mixed")
+
+# Relative weights of operations in the mixed scenario (roughly a browsing session)
+MIXED_WEIGHTS = {"me": 35, "rides": 15, "search": 30, "health": 10, "login": 8, "avatar": 2}
+
+PASSWORD = "loadtest-password"
+
+# (label, lng, lat) of the cities rides run between
+CITIES = [
+    ("Waterloo", -80.52, 43.46), ("Toronto", -79.38, 43.65), ("Guelph", -80.25, 43.55),
+    ("Hamilton", -79.87, 43.26), ("London", -81.25, 42.98), ("Ottawa", -75.70, 45.42),
+]
+VEHICLES = [("Honda", "Civic", "Blue"), ("Toyota", "Corolla", "Silver"), ("Mazda", "3", "Red"), ("Kia", "Soul", "White")]
+
+# Arrays bound per INSERT ... unnest statement
+SEED_BATCH_SIZE = 5000
+
+SEED_USERS_SQL = text("""
+    INSERT INTO users (full_name, email, password_hash)
+    SELECT * FROM unnest(CAST(:names AS varchar[]), CAST(:emails AS varchar[]), CAST(:hashes AS text[]))
+    RETURNING id, email
+""")
+
+DELETE_USERS_SQL = text("DELETE FROM users WHERE email LIKE :pattern")
+
+# Regressions below this are treated as noise by `compare`
+DEFAULT_THRESHOLD_PCT = 10.0
+
+
+# ===== SEEDING =====
+
+async def seed(run_id: str, users: int, rides: int, drivers: int) -> list[dict]:
+    """
+    Insert users (one shared bcrypt hash) and rides spread over the next two
+    weeks between CITIES.
+
+    Returns:
+        list[dict]: One {"id", "email"} per seeded user
+    """
+    from src.auth import get_password_hash
+    from src.config import db as db_config
+    from src.services.ride_bulk import insert_rides
+
+    password_hash = get_password_hash(PASSWORD)
+    accounts = []
+    async with db_config.get_async_session() as session:
+        for start in range(0, users, SEED_BATCH_SIZE):
+            numbers = range(start, min(users, start + SEED_BATCH_SIZE))
+            emails = [f"loadtest-{run_id}-{n}@example.com" for n in numbers]
+            result = await session.execute(SEED_USERS_SQL, {
+                "names": [f"Load Test {n}" for n in numbers],
+                "emails": emails,
+                "hashes": [password_hash] * len(emails),
+            })
+            accounts.extend({"id": row.id, "email": row.email} for row in result.all())
+
+        rng = random.Random(run_id)
+        now = datetime.now(timezone.utc)
+        driver_ids = [account["id"] for account in accounts[:max(1, drivers)]]
+        rows = []
+        for _ in range(rides):
+            (origin, origin_lng, origin_lat), (destination, destination_lng, destination_lat) = rng.sample(CITIES, 2)
+            make, model, color = rng.choice(VEHICLES)
+            seats = rng.randint(1, 4)
+            rows.append((
+                uuid.uuid4(), rng.choice(driver_ids), make, model, color, rng.randint(2012, 2024),
+                origin, destination,
+                origin_lng + rng.uniform(-0.05, 0.05), origin_lat + rng.uniform(-0.05, 0.05),
+                destination_lng + rng.uniform(-0.05, 0.05), destination_lat + rng.uniform(-0.05, 0.05),
+                now + timedelta(minutes=rng.randint(30, 14 * 24 * 60)), seats, seats, rng.randint(8, 45), "open",
+            ))
+        await insert_rides(session, rows)
+    return accounts
+
+
+async def cleanup(run_id: str) -> int:
+    from src.config import db as db_config
+
+    async with db_config.get_async_session() as session:
+        result = await session.execute(DELETE_USERS_SQL, {"pattern": f"loadtest-{run_id}-%"})
+        return result.rowcount
+
+
+# ===== SERVER =====
+
+def start_server(port: int) -> subprocess.Popen:
+    return subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "app:app",
+        "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning", "--no-access-log",
+    ])
+
+
+async def wait_until_ready(url: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/readyz")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"{url} did not become ready within {timeout:.0f}s")
+
+
+# ===== REQUESTS =====
+
+def avatar_image() -> bytes:
+    from benchmarks.bench_avatar_bytes import synthetic_photo
+    return synthetic_photo(1280, 960)
+
+
+class Operations:
+    """Builds and sends one request of each kind; returns the status code"""
+
+    def __init__(self, accounts: list[dict], tokens: list[str], avatar: bytes, seed: int = 7):
+        self.accounts = accounts
+        self.tokens = tokens
+        self.avatar = avatar
+        self.rng = random.Random(seed)
+
+    def _auth(self) -> dict:
+        return {"Authorization": f"Bearer {self.rng.choice(self.tokens)}"}
+
+    async def health(self, client: httpx.AsyncClient) -> int:
+        return (await client.get("/health")).status_code
+
+    async def login(self, client: httpx.AsyncClient) -> int:
+        account = self.rng.choice(self.accounts)
+        response = await client.post("/api/auth/login", json={"email": account["email"], "password": PASSWORD})
+        return response.status_code
+
+    async def me(self, client: httpx.AsyncClient) -> int:
+        return (await client.get("/api/users/me", headers=self._auth())).status_code
+
+    async def rides(self, client: httpx.AsyncClient) -> int:
+        return (await client.get("/api/rides")).status_code
+
+    async def search(self, client: httpx.AsyncClient) -> int:
+        (_, origin_lng, origin_lat), (_, destination_lng, destination_lat) = self.rng.sample(CITIES, 2)
+        departure = datetime.now(timezone.utc) + timedelta(hours=self.rng.randint(2, 13 * 24))
+        response = await client.get("/api/rides/search", params={
+            "origin_lat": origin_lat, "origin_lng": origin_lng,
+            "destination_lat": destination_lat, "destination_lng": destination_lng,
+            "departure_time": departure.isoformat(), "radius_km": 15,
+        })
+        return response.status_code
+
+    async def avatar_upload(self, client: httpx.AsyncClient) -> int:
+        # Bytes after the JPEG end marker change the content hash without
+        # changing the image, so every upload is processed rather than reused
+        body = self.avatar + uuid.uuid4().bytes
+        response = await client.post(
+            "/api/users/me/avatar", headers=self._auth(),
+            files={"file": ("avatar.jpg", body, "image/jpeg")},
+        )
+        return response.status_code
+
+    def by_name(self, name: str):
+        return self.avatar_upload if name == "avatar" else getattr(self, name)
+
+
+# ===== RUNNING =====
+
+def summarize(latencies: list[float], statuses: dict, errors: int, elapsed: float) -> dict:
+    requests = len(latencies)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0) * 1000, 2),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+async def run_scenario(url: str, operations: Operations, scenario: str, concurrency: int,
+                       duration: float, warmup: float) -> dict:
+    if scenario == "mixed":
+        names = list(MIXED_WEIGHTS)
+        weights = list(MIXED_WEIGHTS.values())
+    else:
+        names, weights = [scenario], [1]
+    samples = {name: {"latencies": [], "statuses": {}, "errors": 0} for name in names}
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        measuring_from = time.perf_counter() + warmup
+        deadline = measuring_from + duration
+
+        async def worker() -> None:
+            while (started := time.perf_counter()) < deadline:
+                name = random.choices(names, weights)[0]
+                try:
+                    status = await operations.by_name(name)(client)
+                except httpx.HTTPError:
+                    status = None
+                if started < measuring_from:
+                    continue
+                sample = samples[name]
+                sample["latencies"].append(time.perf_counter() - started)
+                sample["statuses"][status or "error"] = sample["statuses"].get(status or "error", 0) + 1
+                if status is None or status >= 400:
+                    sample["errors"] += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - measuring_from
+
+    all_latencies = [value for sample in samples.values() for value in sample["latencies"]]
+    all_statuses: dict = {}
+    for sample in samples.values():
+        for code, count in sample["statuses"].items():
+            all_statuses[code] = all_statuses.get(code, 0) + count
+    result = summarize(all_latencies, all_statuses, sum(s["errors"] for s in samples.values()), elapsed)
+    if scenario == "mixed":
+        result["operations"] = {
+            name: summarize(sample["latencies"], sample["statuses"], sample["errors"], elapsed)
+            for name, sample in samples.items()
+        }
+    return result
+
+
+def git_revision() -> dict:
+    def git(*args) -> str:
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "subject": git("log", "-1", "--format=%s"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def print_table(scenarios: dict) -> None:
+    print(f"{'scenario':<16} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, stats in scenarios.items():
+        rows = [(name, stats)] + [(f"  {op}", op_stats) for op, op_stats in stats.get("operations", {}).items()]
+        for label, row in rows:
+            print(f"{label:<16} {row['rps']:>9,.1f} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+                  f"{row['p99_ms']:>9.2f} {row['errors']:>7}")
+
+
+async def run(args) -> None:
+    from src.auth import create_access_token
+    from benchmarks.common import database
+
+    run_id = uuid.uuid4().hex[:8]
+    server = None if args.url else start_server(args.port)
+    url = args.url or f"http://127.0.0.1:{args.port}"
+    scenarios = {}
+    try:
+        async with database():
+            started = time.perf_counter()
+            accounts = await seed(run_id, args.users, args.rides, args.drivers)
+            print(f"seeded {len(accounts)} users and {args.rides} rides in {time.perf_counter() - started:.1f}s")
+            try:
+                await wait_until_ready(url)
+                tokens = [create_access_token({"sub": str(account["id"])}) for account in accounts]
+                operations = Operations(accounts, tokens, avatar_image() if {"avatar", "mixed"} & set(args.scenarios) else b"")
+                for scenario in args.scenarios:
+                    scenarios[scenario] = await run_scenario(
+                        url, operations, scenario, args.concurrency, args.duration, args.warmup
+                    )
+                    stats = scenarios[scenario]
+                    print(f"  {scenario}: {stats['rps']:,.1f} req/s, p99 {stats['p99_ms']:.1f} ms", flush=True)
+            finally:
+                deleted = await cleanup(run_id)
+                print(f"deleted {deleted} seeded users")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    results = {
+        "run_id": run_id,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "server": args.url or "uvicorn app:app (1 worker)",
+        },
+        "parameters": {
+            "concurrency": args.concurrency, "duration": args.duration, "warmup": args.warmup,
+            "users": args.users, "drivers": args.drivers, "rides": args.rides,
+        },
+        "scenarios": scenarios,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{(results['git']['commit'] or 'nogit')[:10]}-{time.strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as handle:
+        json.dump(results, handle, indent=2)
+
+    print_table(scenarios)
+    print(f"results written to {output}")
+
+
+# ===== COMPARING =====
+
+def change_pct(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def compare(args) -> int:
+    """Print per-scenario deltas; returns 1 if any metric regressed past the threshold"""
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    with open(args.candidate) as handle:
+        candidate = json.load(handle)
+
+    for label, results in (("baseline", baseline), ("candidate", candidate)):
+        git = results.get("git", {})
+        dirty = " (dirty)" if git.get("dirty") else ""
+        print(f"{label:<10} {git.get('commit', '')[:10]}{dirty} {git.get('subject', '')}")
+    if baseline.get("parameters") != candidate.get("parameters"):
+        print("warning: runs used different parameters, deltas may not be comparable")
+
+    regressions = []
+    print(f"{'scenario':<16} {'metric':<7} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    for scenario, before in baseline["scenarios"].items():
+        after = candidate["scenarios"].get(scenario)
+        if after is None:
+            continue
+        # Throughput regresses when it drops, latency when it rises
+        for metric, worse_sign in (("rps", -1), ("p50_ms", 1), ("p95_ms", 1), ("p99_ms", 1)):
+            change = change_pct(before[metric], after[metric])
+            flag = ""
+            if change * worse_sign > args.threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{scenario} {metric}")
+            print(f"{scenario:<16} {metric:<7} {before[metric]:>10,.2f} {after[metric]:>10,.2f} {change:>+7.1f}%{flag}")
+        if after["errors"] > before["errors"]:
+            regressions.append(f"{scenario} errors")
+            print(f"{scenario:<16} errors  {before['errors']:>10} {after['errors']:>10}  REGRESSION")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0f}%: {', '.join(regressions)}")
+        return 1
+    print(f"no regressions over {args.threshold:.0f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP load test for the FareShare API")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Seed data, drive the API and save results")
+    run_parser.add_argument("--url", help="Target an already running server instead of starting uvicorn")
+    run_parser.add_argument("--port", type=int, default=8765, help="Port for the uvicorn child process")
+    run_parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    run_parser.add_argument("--concurrency", type=int, default=50, help="Concurrent clients")
+    run_parser.add_argument("--duration", type=float, default=20, help="Measured seconds per scenario")
+    run_parser.add_argument("--warmup", type=float, default=3, help="Unmeasured seconds before each scenario")
+    run_parser.add_argument("--users", type=int, default=10_000)
+    run_parser.add_argument("--drivers", type=int, default=1_000, help="Seeded users that own the rides")
+    run_parser.add_argument("--rides", type=int, default=50_000)
+    run_parser.add_argument("--output", help="Result file (default benchmarks/results/<commit>-<time>.json)")
+
+    compare_parser = commands.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_PCT,
+                                help="Percent change treated as a regression")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        asyncio.run(run(args))
+    else:
+        sys.exit(compare(args))
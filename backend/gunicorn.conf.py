@@ -0,0 +1,87 @@
+"""
+Gunicorn Configuration
+Production entry point: multiple uvicorn workers behind one gunicorn master.
+
+    cd backend
+    gunicorn app:app            # picks up this file automatically
+
+Settings (environment):
+    BIND               address to listen on (default 0.0.0.0:8000)
+    WEB_CONCURRENCY    worker processes (default: one per CPU core)
+    GRACEFUL_TIMEOUT   seconds a worker gets to drain after SIGTERM (default 30)
+    PROMETHEUS_MULTIPROC_DIR  metrics directory shared by the workers
+                       (default: a fresh temp directory when running >1 worker)
+    SEAT_PUSH_BACKEND  live seat fan-out (default: postgres when running >1 worker)
+
+Each worker has its own DB pool, so Postgres sees up to
+WEB_CONCURRENCY x (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+"""
+import logging
+import os
+import shutil
+import tempfile
+
+from src.config.server import GRACEFUL_TIMEOUT_SECONDS, worker_count
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = worker_count()
+worker_class = "src.config.server.GracefulUvicornWorker"
+
+# Import app.py once in the master, then fork: workers share the
+# interpreter, modules and app setup copy-on-write. Nothing in app.py opens
+# sockets or pools at import time (they are created in the lifespan, per worker).
+preload_app = True
+
+graceful_timeout = GRACEFUL_TIMEOUT_SECONDS
+timeout = 60  # a worker whose event loop is stuck this long is restarted
+keepalive = 5
+
+# Logging goes through the app's JSON pipeline (src/config/logging_config.py)
+accesslog = None
+errorlog = "-"
+
+# Metrics from every worker must be merged (src/services/metrics.py). The
+# variable has to be set before app.py is preloaded, i.e. here.
+_own_multiproc_dir = None
+if workers > 1 and not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    _own_multiproc_dir = tempfile.mkdtemp(prefix="fareshare-metrics-")
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = _own_multiproc_dir
+
+# The local seat push backend only reaches subscribers of the worker that
+# committed the change (src/services/seat_updates.py); LISTEN/NOTIFY reaches all
+if workers > 1:
+    os.environ.setdefault("SEAT_PUSH_BACKEND", "postgres")
+
+
+def on_starting(server):
+    """Start from an empty metrics directory (stale files would be merged in)"""
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+    if workers > 1 and os.getenv("IDEMPOTENCY_BACKEND", "memory") == "memory":
+        server.log.warning(
+            "IDEMPOTENCY_BACKEND=memory with %d workers: retries landing on another "
+            "worker are not deduplicated, use IDEMPOTENCY_BACKEND=postgres", workers
+        )
+    if workers > 1 and os.getenv("SEAT_PUSH_BACKEND") == "local":
+        server.log.warning(
+            "SEAT_PUSH_BACKEND=local with %d workers: live seat subscribers only see "
+            "changes committed by their own worker, use SEAT_PUSH_BACKEND=postgres", workers
+        )
+
+
+def child_exit(server, worker):
+    """Drop live gauges of a worker that exited"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_abort(worker):
+    logging.getLogger(__name__).error("Worker %s timed out and was aborted", worker.pid)
+
+
+def on_exit(server):
+    if _own_multiproc_dir:
+        shutil.rmtree(_own_multiproc_dir, ignore_errors=True)
@@ -2,6 +2,7 @@
 Authentication & Security Utilities
 Handles JWT tokens, password hashing, and authentication dependencies for FastAPI routes.
 """
+import logging
 import os
 from datetime import datetime, timedelta, timezone
 from typing import Optional
@@ -14,6 +15,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config.db import get_db
 from src.models.user import User
+from src.services.metrics import PASSWORD_HASH_TIMER, PASSWORD_VERIFY_TIMER
+
+logger = logging.getLogger(__name__)
 
 # Security configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")  # Change in production!
@@ -36,9 +40,10 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         bool: True if password matches, False otherwise
     """
     try:
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+        with PASSWORD_VERIFY_TIMER.time():
+            return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
     except Exception as e:
-        print(f"Password verification error: {e}")
+        logger.warning(f"Password verification error: {e}")
         return False
 
 
@@ -59,11 +64,12 @@ def get_password_hash(password: str) -> str:
             password_bytes = password_bytes[:72]
         
         # Generate salt and hash password
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password_bytes, salt)
+        with PASSWORD_HASH_TIMER.time():
+            salt = bcrypt.gensalt()
+            hashed = bcrypt.hashpw(password_bytes, salt)
         return hashed.decode('utf-8')
     except Exception as e:
-        print(f"Password hashing error: {e}")
+        logger.error(f"Password hashing error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error processing password"
@@ -96,8 +102,45 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> str:
+    """
+    FastAPI dependency returning the user id from a valid JWT token
+    without loading the user. Routes using it must still check that the
+    account exists and is active (see get_current_user).
+    
+    Args:
+        credentials: HTTP Bearer token from request header
+        
+    Returns:
+        str: The user id (token subject)
+        
+    Raises:
+        HTTPException: If token is invalid
+    """
+    try:
+        # Extract token from Bearer header and decode it
+        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        user_id: str = payload.get("sub")
+    except JWTError:
+        raise _credentials_exception()
+    
+    if user_id is None:
+        raise _credentials_exception()
+    return user_id
+
+
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db)
 ) -> User:
     """
@@ -105,7 +148,7 @@ async def get_current_user(
     Use this in routes that require authentication.
     
     Args:
-        credentials: HTTP Bearer token from request header
+        user_id: User id from the validated token
         db: Database session
         
     Returns:
@@ -114,25 +157,17 @@ async def get_current_user(
     Raises:
         HTTPException: If token is invalid or user not found
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    return await load_active_user(db, user_id)
+
+
+async def load_active_user(db: AsyncSession, user_id: str) -> User:
+    """
+    Load a user by id for an authenticated request.
     
-    try:
-        # Extract token from Bearer header
-        token = credentials.credentials
-        
-        # Decode JWT token
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        
-        if user_id is None:
-            raise credentials_exception
-            
-    except JWTError:
-        raise credentials_exception
+    Raises:
+        HTTPException: 401 if the user no longer exists, 403 if suspended
+    """
+    credentials_exception = _credentials_exception()
     
     # Look up user in database
     result = await db.execute(select(User).where(User.id == user_id))
@@ -173,6 +208,28 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     return current_user
 
 
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+    """
+    FastAPI dependency that only allows admin users.
+    Use this for admin-only endpoints like bulk imports.
+    
+    Args:
+        current_user: User from get_current_active_user dependency
+        
+    Returns:
+        User: The admin user object
+        
+    Raises:
+        HTTPException: If user is not an admin
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    return current_user
+
+
 def validate_password_strength(password: str) -> bool:
     """
     Check if password meets minimum security requirements.
@@ -42,6 +42,10 @@ if "render.com" in ASYNC_DATABASE_URL:
     
     # SSL will be handled by engine parameters instead
 
+# Connection pool sizing (per worker process)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+
 # Global engine and session factory
 async_engine: AsyncEngine | None = None
 async_session_factory: async_sessionmaker[AsyncSession] | None = None
@@ -76,8 +80,8 @@ async def init_db() -> None:
     async_engine = create_async_engine(
         ASYNC_DATABASE_URL,
         echo=False,  # Set to True for SQL query logging in development
-        pool_size=20,  # Max number of connections in pool
-        max_overflow=10,  # Extra connections beyond pool_size
+        pool_size=DB_POOL_SIZE,  # Max number of connections in pool
+        max_overflow=DB_MAX_OVERFLOW,  # Extra connections beyond pool_size
         pool_pre_ping=True,  # Verify connections before using
         pool_recycle=3600,  # Recycle connections after 1 hour
         connect_args=connect_args  # Add SSL if needed
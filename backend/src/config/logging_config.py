@@ -0,0 +1,254 @@
+"""
+Logging Configuration
+Non-blocking JSON-lines logging with per-request ids.
+
+    logger.info(...)  ->  BoundedQueueHandler  ->  queue  ->  listener thread  ->  stdout
+
+Callers (the event loop) only build the record and put it on a bounded
+queue; formatting to JSON and the write to the sink happen on the listener
+thread. When the sink cannot keep up:
+
+    - above LOG_QUEUE_SAMPLE_FRACTION of the queue, DEBUG/INFO records are
+      sampled (1 in LOG_SAMPLE_EVERY is kept)
+    - when the queue is full, records are dropped instead of blocking
+    - dropped/sampled-out counts are reported in a periodic WARNING record
+
+WARNING and above are never sampled, only dropped when the queue is full.
+
+Each line carries the request id of the request that logged it (see
+src/middleware/request_id.py), taken from a contextvar when the record is
+enqueued.
+
+Forked processes (gunicorn workers with preload_app) get a fresh queue and
+writer thread, since threads do not survive fork.
+
+Usage:
+    from src.config.logging_config import setup_logging
+    setup_logging()  # once, at process start
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# "json" (default) or "text" for a human-readable console while developing
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+
+# Records buffered between the event loop and the writer thread
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10_000))
+
+# Start sampling DEBUG/INFO once the queue is this full
+LOG_QUEUE_SAMPLE_FRACTION = float(os.getenv("LOG_QUEUE_SAMPLE_FRACTION", 0.5))
+
+# Keep 1 in this many DEBUG/INFO records while sampling
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", 10))
+
+# Minimum seconds between "records dropped" reports
+DROP_REPORT_INTERVAL_SECONDS = 5.0
+
+# Loggers that install their own handlers (uvicorn) are routed through ours
+ADOPTED_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+# Request id of the request being handled in this context
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, request_id, extras, exc"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "pid": record.process,
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Plain console format with the request id"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s [%(request_id)s] %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = "-"
+        return super().format(record)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks: samples low-severity records when the
+    queue fills up and drops records when it is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue, sample_fraction: float = LOG_QUEUE_SAMPLE_FRACTION,
+                 sample_every: int = LOG_SAMPLE_EVERY):
+        super().__init__(log_queue)
+        self.sample_threshold = int(log_queue.maxsize * sample_fraction) if log_queue.maxsize > 0 else 0
+        self.sample_every = max(1, sample_every)
+        self.dropped = 0
+        self.sampled_out = 0
+        # Lifetime totals (dropped/sampled_out reset after each report)
+        self.total_dropped = 0
+        self.total_sampled_out = 0
+        self._sample_counter = 0
+        self._last_report = time.monotonic()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Capture what only the calling context knows; JSON formatting
+        # happens on the listener thread
+        record.request_id = request_id_var.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if (
+            self.sample_threshold
+            and record.levelno < logging.WARNING
+            and self.queue.qsize() >= self.sample_threshold
+        ):
+            self._sample_counter += 1
+            if self._sample_counter % self.sample_every:
+                self.sampled_out += 1
+                self.total_sampled_out += 1
+                return
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            self.dropped += 1
+            self.total_dropped += 1
+            return
+        except Exception:
+            self.handleError(record)
+            return
+        if (self.dropped or self.sampled_out) and time.monotonic() - self._last_report >= DROP_REPORT_INTERVAL_SECONDS:
+            self._report_losses()
+
+    def _report_losses(self) -> None:
+        report = logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            "Log backpressure: dropped %d record(s), sampled out %d", (self.dropped, self.sampled_out), None,
+        )
+        report.dropped, report.sampled_out = self.dropped, self.sampled_out
+        try:
+            self.queue.put_nowait(self.prepare(report))
+        except queue.Full:
+            return  # try again with the next record
+        self.dropped = self.sampled_out = 0
+        self._last_report = time.monotonic()
+
+
+class _Listener(logging.handlers.QueueListener):
+    """QueueListener whose stop() waits for room instead of failing on a full queue"""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel, timeout=5)
+
+
+_listener: _Listener | None = None
+_queue_handler: BoundedQueueHandler | None = None
+_setup_lock = threading.Lock()
+
+
+def build_formatter(log_format: str = LOG_FORMAT) -> logging.Formatter:
+    return TextFormatter() if log_format == "text" else JsonFormatter()
+
+
+def setup_logging(level: str = LOG_LEVEL, stream=None) -> BoundedQueueHandler:
+    """
+    Route all logging through a bounded queue to a writer thread.
+    Safe to call more than once (later calls return the existing handler).
+
+    Args:
+        level: Root log level name
+        stream: Sink for log lines (defaults to stdout)
+
+    Returns:
+        BoundedQueueHandler: The handler installed on the root logger
+    """
+    global _listener, _queue_handler
+    with _setup_lock:
+        root = logging.getLogger()
+        for handler in root.handlers:
+            if isinstance(handler, BoundedQueueHandler):
+                return handler
+
+        log_queue: queue.Queue = queue.Queue(LOG_QUEUE_SIZE)
+        sink = logging.StreamHandler(stream or sys.stdout)
+        sink.setFormatter(build_formatter())
+
+        queue_handler = BoundedQueueHandler(log_queue)
+        root.handlers[:] = [queue_handler]
+        root.setLevel(level)
+        for name in ADOPTED_LOGGERS:
+            adopted = logging.getLogger(name)
+            adopted.handlers.clear()
+            adopted.propagate = True
+
+        _listener = _Listener(log_queue, sink, respect_handler_level=True)
+        _listener.start()
+        _queue_handler = queue_handler
+        atexit.register(shutdown_logging)
+        return queue_handler
+
+
+def _restart_after_fork() -> None:
+    """
+    In a forked child the writer thread is gone and the queue may be in a
+    locked state: give the handler a new queue and start a new writer thread.
+    """
+    global _listener
+    if _listener is None or _queue_handler is None:
+        return
+    log_queue: queue.Queue = queue.Queue(LOG_QUEUE_SIZE)
+    _queue_handler.queue = log_queue
+    _queue_handler.dropped = _queue_handler.sampled_out = 0
+    _listener = _Listener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            try:
+                _listener.stop()
+            except queue.Full:
+                pass  # sink stuck: exit without flushing rather than hang
+            _listener = None
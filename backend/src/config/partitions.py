@@ -0,0 +1,257 @@
+"""
+Table Partition Maintenance
+Creates future monthly partitions and archives old ones for the time-partitioned tables.
+
+    rides     -> RANGE (departure_time), partitions named rides_pYYYY_MM
+    bookings  -> RANGE (booked_at),      partitions named bookings_pYYYY_MM
+
+Each month gets its own heap and local indexes, so the status/departure_time
+indexes of today's open rides stay small, and old months can be detached and
+moved to an archive schema without a long DELETE.
+
+Upcoming partitions are created at startup and by the daily
+"partitions.ensure" job; archiving is run by hand.
+
+Usage:
+    python -m src.config.partitions ensure            # create upcoming partitions
+    python -m src.config.partitions archive           # archive partitions past retention
+    python -m src.config.partitions archive --before 2024-01
+"""
+import argparse
+import asyncio
+import logging
+import os
+import re
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from src.config import db as db_config
+from src.services.jobs import job_handler
+
+logger = logging.getLogger(__name__)
+
+# Partitioned table -> partition key column
+PARTITIONED_TABLES = {
+    "rides": "departure_time",
+    "bookings": "booked_at",
+}
+
+# Months of partitions to keep created ahead of the current month
+# (recurring rides can be scheduled up to 180 days out)
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", 7))
+
+# Partitions older than this many months are archived
+PARTITION_RETENTION_MONTHS = int(os.getenv("PARTITION_RETENTION_MONTHS", 24))
+
+# Schema detached partitions are moved into
+PARTITION_ARCHIVE_SCHEMA = os.getenv("PARTITION_ARCHIVE_SCHEMA", "archive")
+
+# Optional tablespace for partitions that cannot be detached (still referenced)
+PARTITION_ARCHIVE_TABLESPACE = os.getenv("PARTITION_ARCHIVE_TABLESPACE")
+
+
+def month_start(value: date) -> date:
+    """First day of the month containing `value`"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """Shift a first-of-month date by a number of months"""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Partition table name for a month, e.g. rides_p2025_01"""
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+
+async def is_partitioned(conn: AsyncConnection, table: str) -> bool:
+    """Whether `table` exists as a partitioned (parent) table"""
+    result = await conn.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+        {"table": table}
+    )
+    return bool(result.scalar())
+
+
+async def list_partitions(conn: AsyncConnection, table: str) -> list[tuple[str, date]]:
+    """
+    List attached monthly partitions of a table.
+
+    Returns:
+        list[tuple[str, date]]: (partition name, month) sorted by month
+    """
+    result = await conn.execute(
+        text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.oid = to_regclass(:table)
+        """),
+        {"table": table}
+    )
+    pattern = re.compile(rf"^{table}_p(\d{{4}})_(\d{{2}})$")
+    partitions = []
+    for (name,) in result:
+        match = pattern.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+async def create_partition(conn: AsyncConnection, table: str, month: date) -> str:
+    """Create the partition for one month if it does not exist yet"""
+    name = partition_name(table, month)
+    await conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    ))
+    return name
+
+
+async def ensure_partitions_for_range(
+    conn: AsyncConnection | AsyncSession, table: str, start: datetime, end: datetime
+) -> None:
+    """
+    Make sure partitions exist for every month between start and end (inclusive).
+    Used before inserting rows outside the normal window, e.g. historical imports.
+    """
+    if not await is_partitioned(conn, table):
+        return
+    month = month_start(start.astimezone(timezone.utc).date())
+    last = month_start(end.astimezone(timezone.utc).date())
+    while month <= last:
+        await create_partition(conn, table, month)
+        month = add_months(month, 1)
+
+
+async def ensure_future_partitions(months_ahead: int = PARTITION_MONTHS_AHEAD) -> list[str]:
+    """
+    Create partitions from the current month up to `months_ahead` months ahead.
+    Tables that are not partitioned are skipped.
+
+    Returns:
+        list[str]: Names of partitions that now exist for the window
+    """
+    current = month_start(datetime.now(timezone.utc).date())
+    created = []
+    async with db_config.async_engine.begin() as conn:
+        for table in PARTITIONED_TABLES:
+            if not await is_partitioned(conn, table):
+                logger.info(f"Table {table} is not partitioned, skipping partition maintenance")
+                continue
+            for offset in range(months_ahead + 1):
+                created.append(await create_partition(conn, table, add_months(current, offset)))
+    return created
+
+
+@job_handler("partitions.ensure")
+async def _ensure_partitions_job(payload: dict) -> None:
+    """Daily job keeping the partition window ahead of the calendar"""
+    await ensure_future_partitions()
+
+
+async def _drop_foreign_keys(conn: AsyncConnection, qualified_name: str) -> None:
+    """Drop foreign keys on a detached partition so it no longer pins rides partitions"""
+    result = await conn.execute(
+        text("SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:table) AND contype = 'f'"),
+        {"table": qualified_name}
+    )
+    for (constraint,) in result.all():
+        await conn.execute(text(f'ALTER TABLE {qualified_name} DROP CONSTRAINT "{constraint}"'))
+
+
+async def _ride_partition_referenced(conn: AsyncConnection, name: str) -> bool:
+    """Whether any booking or review still references rides in a partition"""
+    result = await conn.execute(text(f"""
+        SELECT EXISTS (SELECT 1 FROM bookings b JOIN {name} r ON r.id = b.ride_id)
+            OR EXISTS (SELECT 1 FROM reviews v JOIN {name} r ON r.id = v.ride_id)
+    """))
+    return bool(result.scalar())
+
+
+async def archive_partitions(before: date | None = None) -> list[str]:
+    """
+    Detach partitions whose whole month is older than `before` and move them
+    into the archive schema.
+
+    Bookings are archived first: nothing references them, and once they are
+    gone the matching rides partitions are usually unreferenced too. A rides
+    partition that is still referenced (e.g. by reviews, which are kept forever
+    for ratings) stays attached so foreign keys keep working; if
+    PARTITION_ARCHIVE_TABLESPACE is set it is moved to that (cold) tablespace.
+
+    DETACH ... CONCURRENTLY cannot run inside a transaction block, so each
+    step runs on an autocommit connection.
+
+    Args:
+        before: Archive months strictly before this month
+                (defaults to PARTITION_RETENTION_MONTHS ago)
+
+    Returns:
+        list[str]: Names of archived partitions
+    """
+    cutoff = month_start(before) if before else add_months(
+        month_start(datetime.now(timezone.utc).date()), -PARTITION_RETENTION_MONTHS
+    )
+    archived = []
+
+    async with db_config.async_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {PARTITION_ARCHIVE_SCHEMA}"))
+
+        for table in ("bookings", "rides"):
+            if not await is_partitioned(conn, table):
+                continue
+
+            for name, month in await list_partitions(conn, table):
+                if month >= cutoff:
+                    break
+
+                if table == "rides" and await _ride_partition_referenced(conn, name):
+                    if PARTITION_ARCHIVE_TABLESPACE:
+                        await conn.execute(text(
+                            f"ALTER TABLE {name} SET TABLESPACE {PARTITION_ARCHIVE_TABLESPACE}"
+                        ))
+                        logger.info(f"Moved referenced partition {name} to {PARTITION_ARCHIVE_TABLESPACE}")
+                    else:
+                        logger.info(f"Keeping partition {name} attached: still referenced")
+                    continue
+
+                await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name} CONCURRENTLY"))
+                if table == "bookings":
+                    await _drop_foreign_keys(conn, name)
+                await conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {PARTITION_ARCHIVE_SCHEMA}"))
+                archived.append(f"{PARTITION_ARCHIVE_SCHEMA}.{name}")
+                logger.info(f"Archived partition {name}")
+
+    return archived
+
+
+async def _main(args) -> None:
+    await db_config.init_db()
+    try:
+        if args.command == "ensure":
+            names = await ensure_future_partitions(args.months_ahead)
+            print(f"Partitions present: {', '.join(names) or 'none'}")
+        else:
+            before = datetime.strptime(args.before, "%Y-%m").date() if args.before else None
+            names = await archive_partitions(before)
+            print(f"Archived: {', '.join(names) or 'nothing'}")
+    finally:
+        await db_config.close_db()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Manage rides/bookings partitions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ensure_parser = subparsers.add_parser("ensure", help="Create upcoming monthly partitions")
+    ensure_parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    archive_parser = subparsers.add_parser("archive", help="Detach and archive old partitions")
+    archive_parser.add_argument("--before", help="Archive months before YYYY-MM")
+    asyncio.run(_main(parser.parse_args()))
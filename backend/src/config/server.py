@@ -0,0 +1,58 @@
+"""
+Production Server Settings
+Worker sizing and the gunicorn worker class used by gunicorn.conf.py.
+
+    gunicorn master (preloads app.py, forks)
+      └─ N x GracefulUvicornWorker: uvloop + httptools when installed, one event loop each
+
+On SIGTERM a worker stops accepting, closes idle keep-alive connections,
+gives in-flight requests up to DRAIN_TIMEOUT_SECONDS, then runs the app's
+lifespan shutdown (health prober -> 503, background tasks, close_db).
+The drain timeout stays below gunicorn's graceful_timeout so the lifespan
+shutdown always gets to run before the master force-kills the worker.
+"""
+import os
+
+from uvicorn.workers import UvicornWorker
+
+# Seconds gunicorn waits for a worker to exit after SIGTERM before SIGKILL
+GRACEFUL_TIMEOUT_SECONDS = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+
+# Part of the graceful timeout left for lifespan shutdown (pools, tasks)
+SHUTDOWN_RESERVE_SECONDS = 5
+
+DRAIN_TIMEOUT_SECONDS = max(1, GRACEFUL_TIMEOUT_SECONDS - SHUTDOWN_RESERVE_SECONDS)
+
+
+def worker_count() -> int:
+    """
+    Number of worker processes: WEB_CONCURRENCY if set, else one per CPU core
+    available to this process (each worker is a single-threaded event loop).
+
+    Returns:
+        int: Worker count (at least 1)
+    """
+    configured = os.getenv("WEB_CONCURRENCY")
+    if configured:
+        return max(1, int(configured))
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS/Windows
+        cores = os.cpu_count() or 1
+    return max(1, cores)
+
+
+class GracefulUvicornWorker(UvicornWorker):
+    """
+    UvicornWorker with a bounded drain: uvicorn otherwise waits for open
+    connections (e.g. /api/rides/live WebSockets) indefinitely, and the
+    master's SIGKILL would skip the lifespan shutdown and close_db.
+    """
+
+    CONFIG_KWARGS = {"loop": "auto", "http": "auto", "lifespan": "on"}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = min(
+            DRAIN_TIMEOUT_SECONDS, max(1, self.cfg.graceful_timeout - SHUTDOWN_RESERVE_SECONDS)
+        )
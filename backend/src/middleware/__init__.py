@@ -0,0 +1,14 @@
+"""
+Middleware Package
+ASGI middleware and static file serving for the FareShare API.
+"""
+from src.middleware.compression import CompressionMiddleware
+from src.middleware.idempotency import IdempotencyMiddleware, build_idempotency_store
+from src.middleware.metrics import MetricsMiddleware
+from src.middleware.request_id import RequestIdMiddleware
+from src.middleware.static_files import UploadStaticFiles
+
+__all__ = [
+    "CompressionMiddleware", "IdempotencyMiddleware", "MetricsMiddleware", "RequestIdMiddleware",
+    "build_idempotency_store", "UploadStaticFiles",
+]
@@ -0,0 +1,337 @@
+"""
+Compression Middleware
+Compresses large API responses with zstd, brotli or gzip, picked from the client's Accept-Encoding.
+
+Rules:
+    - only allowlisted content types (JSON, GeoJSON, NDJSON, text, ...)
+    - single-body responses smaller than COMPRESSION_MIN_BYTES are sent as is
+    - bodies of COMPRESSION_OFFLOAD_BYTES or more are compressed in a worker
+      thread so a big search result never stalls the event loop
+    - streaming responses (more_body) are compressed chunk by chunk and
+      flushed after every chunk, never buffered
+    - HEAD requests, ranges, responses that already have a Content-Encoding
+      or say Cache-Control: no-transform pass through untouched
+    - http.response.pathsend (zero-copy files) passes through untouched
+
+Compressed responses get Vary: Accept-Encoding and a weak ETag (the bytes
+differ per encoding); 304s for clients that negotiate an encoding get the
+same weak ETag so caches see a consistent validator.
+
+brotli and zstd need the optional "brotli" and "zstandard" packages; without
+them only gzip is offered.
+"""
+import asyncio
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional: no "br" encoding
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: no "zstd" encoding
+    zstandard = None
+
+# Smallest single-body response worth compressing
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", 1024))
+
+# Bodies (or stream chunks) at least this large are compressed off the event loop
+COMPRESSION_OFFLOAD_BYTES = int(os.getenv("COMPRESSION_OFFLOAD_BYTES", 64 * 1024))
+
+# Levels per encoding (defaults favour speed: these run on every request)
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", 3))
+
+# Server preference when the client accepts several encodings equally
+COMPRESSION_ENCODINGS = [
+    encoding.strip()
+    for encoding in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",")
+    if encoding.strip()
+]
+
+# Media types that compress well; anything else (images, archives) is left alone
+COMPRESSIBLE_CONTENT_TYPES = {
+    "application/json",
+    "application/geo+json",
+    "application/problem+json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+}
+COMPRESSIBLE_CONTENT_TYPE_PREFIXES = ("text/",)
+
+# Mounted apps that serve already-compressed files (avatars are WebP)
+COMPRESSION_EXCLUDED_PATHS = ("/uploads",)
+
+
+class GzipCodec:
+    name = "gzip"
+
+    def __init__(self, level: int = COMPRESSION_GZIP_LEVEL):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    def stream(self) -> "StreamCompressor":
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return StreamCompressor(
+            compressor.compress,
+            lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+            lambda: compressor.flush(zlib.Z_FINISH),
+        )
+
+
+class BrotliCodec:
+    name = "br"
+
+    def __init__(self, quality: int = COMPRESSION_BROTLI_QUALITY):
+        self.quality = quality
+
+    def compress(self, data: bytes) -> bytes:
+        return brotli.compress(data, quality=self.quality)
+
+    def stream(self) -> "StreamCompressor":
+        compressor = brotli.Compressor(quality=self.quality)
+        return StreamCompressor(compressor.process, compressor.flush, compressor.finish)
+
+
+class ZstdCodec:
+    name = "zstd"
+
+    def __init__(self, level: int = COMPRESSION_ZSTD_LEVEL):
+        self.level = level
+
+    # A ZstdCompressor (and every compressobj made from it) shares one
+    # context, so each body or stream gets its own
+    def compress(self, data: bytes) -> bytes:
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def stream(self) -> "StreamCompressor":
+        compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+        return StreamCompressor(
+            compressor.compress,
+            lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            compressor.flush,
+        )
+
+
+class StreamCompressor:
+    """compress/flush/finish callables of one streaming compressor"""
+
+    __slots__ = ("compress", "flush", "finish")
+
+    def __init__(self, compress, flush, finish):
+        self.compress = compress
+        self.flush = flush
+        self.finish = finish
+
+    def chunk(self, data: bytes, last: bool) -> bytes:
+        """Compress one chunk and flush it so the client gets it now"""
+        return self.compress(data) + (self.finish() if last else self.flush())
+
+
+def available_codecs() -> dict:
+    """Codecs whose libraries are installed, keyed by content-coding name"""
+    codecs = {"gzip": GzipCodec()}
+    if brotli is not None:
+        codecs["br"] = BrotliCodec()
+    if zstandard is not None:
+        codecs["zstd"] = ZstdCodec()
+    return codecs
+
+
+def negotiate_encoding(accept_encoding: str, preference: list[str]) -> str | None:
+    """
+    Pick the content coding for an Accept-Encoding header.
+
+    The highest q-value wins; ties go to the earliest entry in `preference`.
+    Codings with q=0 are refused, "*" matches any coding not listed.
+
+    Returns:
+        str | None: Coding name, or None to send the body uncompressed
+    """
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in preference:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def is_compressible(content_type: str | None) -> bool:
+    """Whether a Content-Type is on the compression allowlist"""
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type in COMPRESSIBLE_CONTENT_TYPES or media_type.startswith(COMPRESSIBLE_CONTENT_TYPE_PREFIXES)
+
+
+def _add_vary(headers: MutableHeaders) -> None:
+    vary = headers.get("vary")
+    if not vary:
+        headers["Vary"] = "Accept-Encoding"
+    elif vary.strip() != "*" and "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+def _weaken_etag(headers: MutableHeaders) -> None:
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing eligible responses.
+
+    Add it inside CORS but outside the idempotency middleware, so stored
+    responses stay uncompressed and every replay is encoded for the client
+    that asked.
+    """
+
+    def __init__(
+        self,
+        app,
+        min_size: int = COMPRESSION_MIN_BYTES,
+        offload_size: int = COMPRESSION_OFFLOAD_BYTES,
+        encodings: list[str] = COMPRESSION_ENCODINGS,
+        excluded_paths: tuple[str, ...] = COMPRESSION_EXCLUDED_PATHS,
+    ):
+        self.app = app
+        self.min_size = min_size
+        self.offload_size = offload_size
+        self.codecs = available_codecs()
+        self.preference = [encoding for encoding in encodings if encoding in self.codecs]
+        self.excluded_paths = excluded_paths
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "HEAD"
+            or scope["path"].startswith(self.excluded_paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""), self.preference)
+        if encoding is None or "range" in request_headers:
+            await self.app(scope, receive, send)
+            return
+
+        await self.app(scope, receive, _CompressingSend(self, self.codecs[encoding], send))
+
+    async def run(self, function, data: bytes) -> bytes:
+        """Run a compression step inline, or in a thread for large inputs"""
+        if len(data) >= self.offload_size:
+            return await asyncio.to_thread(function, data)
+        return function(data)
+
+
+class _CompressingSend:
+    """send() wrapper for one response: decides at the first body message"""
+
+    def __init__(self, middleware: CompressionMiddleware, codec, send):
+        self.middleware = middleware
+        self.codec = codec
+        self.send = send
+        self.start_message = None
+        self.passthrough = False
+        self.stream: StreamCompressor | None = None
+
+    async def __call__(self, message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            headers = MutableHeaders(scope=message)
+            if message["status"] == 304:
+                _add_vary(headers)
+                _weaken_etag(headers)
+                await self.send(message)
+                self.passthrough = True
+            elif (
+                message["status"] < 200 or message["status"] in (204, 206)
+                or "content-encoding" in headers
+                or "no-transform" in headers.get("cache-control", "").lower()
+                or not is_compressible(headers.get("content-type"))
+            ):
+                await self.send(message)
+                self.passthrough = True
+            else:
+                # Hold the start until the first body message shows the size
+                self.start_message = message
+            return
+
+        if self.passthrough or message_type != "http.response.body":
+            if self.start_message is not None:
+                # e.g. http.response.pathsend: send the original headers as is
+                await self.send(self.start_message)
+                self.start_message = None
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.stream is not None:
+            compressed = await self.middleware.run(lambda data: self.stream.chunk(data, not more_body), body)
+            await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+            return
+
+        start, self.start_message = self.start_message, None
+        headers = MutableHeaders(scope=start)
+        _add_vary(headers)
+
+        if not more_body:
+            if len(body) < self.middleware.min_size:
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+            compressed = await self.middleware.run(self.codec.compress, body)
+            headers["Content-Encoding"] = self.codec.name
+            headers["Content-Length"] = str(len(compressed))
+            _weaken_etag(headers)
+            await self.send(start)
+            await self.send({"type": "http.response.body", "body": compressed})
+            return
+
+        # Streaming response: a declared length under the threshold is sent as is
+        content_length = headers.get("content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) < self.middleware.min_size:
+            self.passthrough = True
+            await self.send(start)
+            await self.send(message)
+            return
+
+        self.stream = self.codec.stream()
+        headers["Content-Encoding"] = self.codec.name
+        if "content-length" in headers:
+            del headers["content-length"]
+        _weaken_etag(headers)
+        await self.send(start)
+        compressed = await self.middleware.run(lambda data: self.stream.chunk(data, False), body)
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": True})
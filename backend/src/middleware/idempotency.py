@@ -0,0 +1,337 @@
+"""
+Idempotency Middleware
+Replays stored responses for retried write requests that carry an Idempotency-Key header.
+
+Flow for a POST/PATCH with "Idempotency-Key: <key>":
+    1. Stored response found      -> replay it (handler does not run)
+    2. Same key already in flight -> wait for the first execution and replay its response
+    3. Otherwise                  -> run the handler, store the response for IDEMPOTENCY_TTL_SECONDS
+
+Keys are scoped by method, path and the caller's Authorization header, so two
+users can never see each other's responses. A retry whose body differs from
+the original gets 422 instead of a replay.
+
+Stores:
+    - InMemoryIdempotencyStore (default): bounded LRU per worker
+    - PostgresIdempotencyStore (IDEMPOTENCY_BACKEND=postgres): shared by all workers
+      through the idempotency_keys table
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import text
+
+from src.config import db as db_config
+from src.services.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_BACKEND = os.getenv("IDEMPOTENCY_BACKEND", "memory")
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 24 * 3600))
+
+# Lease of an in-flight claim in the Postgres store. If the worker dies before
+# storing or releasing, retries may take the key over once it lapses, so keep
+# it a bit above the longest request (gunicorn restarts a stuck worker after 60s).
+IDEMPOTENCY_CLAIM_SECONDS = int(os.getenv("IDEMPOTENCY_CLAIM_SECONDS", 90))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", 10_000))
+
+# Responses larger than this are not stored (the request still runs normally)
+IDEMPOTENCY_MAX_BODY_BYTES = int(os.getenv("IDEMPOTENCY_MAX_BODY_BYTES", 256 * 1024))
+
+IDEMPOTENT_METHODS = {"POST", "PATCH"}
+MAX_KEY_LENGTH = 255
+
+
+@dataclass
+class StoredResponse:
+    """A captured response plus the fingerprint of the request that produced it"""
+    fingerprint: str
+    status_code: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+
+
+class InMemoryIdempotencyStore:
+    """
+    Per-worker LRU store bounded by entry count, with TTL expiry.
+    """
+
+    def __init__(self, max_entries: int = IDEMPOTENCY_MAX_ENTRIES, ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, StoredResponse]] = OrderedDict()
+
+    async def get(self, key: str) -> StoredResponse | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    async def claim(self, key: str) -> bool:
+        # In-process coalescing already serializes a key within this worker
+        return True
+
+    async def put(self, key: str, response: StoredResponse) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def release(self, key: str) -> None:
+        return None
+
+
+class PostgresIdempotencyStore:
+    """
+    Store shared by all workers, backed by the idempotency_keys table.
+
+    claim() inserts a placeholder row so a duplicate arriving at another
+    worker while the original is still running gets a 409 instead of a
+    second execution. The placeholder only lives for claim_seconds; put()
+    extends the row to the full TTL. A claim left behind by a worker that
+    was killed mid-request therefore lapses, and the next retry takes it over.
+    """
+
+    # Purge expired rows roughly once every this many stored responses
+    PURGE_EVERY = 500
+
+    def __init__(self, ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS, claim_seconds: int = IDEMPOTENCY_CLAIM_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.claim_seconds = claim_seconds
+        self._puts = 0
+
+    async def get(self, key: str) -> StoredResponse | None:
+        async with db_config.get_async_session() as session:
+            result = await session.execute(
+                text("""
+                    SELECT fingerprint, status_code, headers, body
+                    FROM idempotency_keys
+                    WHERE key = :key AND expires_at > now() AND status_code IS NOT NULL
+                """),
+                {"key": key}
+            )
+            row = result.one_or_none()
+        if row is None:
+            return None
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in row.headers]
+        return StoredResponse(row.fingerprint, row.status_code, headers, row.body)
+
+    async def claim(self, key: str) -> bool:
+        # Takes over expired responses and lapsed claims (status_code NULL)
+        async with db_config.get_async_session() as session:
+            result = await session.execute(
+                text("""
+                    INSERT INTO idempotency_keys (key, expires_at)
+                    VALUES (:key, now() + make_interval(secs => :lease))
+                    ON CONFLICT (key) DO UPDATE
+                        SET expires_at = EXCLUDED.expires_at, status_code = NULL,
+                            fingerprint = NULL, headers = NULL, body = NULL
+                        WHERE idempotency_keys.expires_at <= now()
+                    RETURNING key
+                """),
+                {"key": key, "lease": float(self.claim_seconds)}
+            )
+            return result.one_or_none() is not None
+
+    async def put(self, key: str, response: StoredResponse) -> None:
+        headers = [[name.decode("latin-1"), value.decode("latin-1")] for name, value in response.headers]
+        async with db_config.get_async_session() as session:
+            await session.execute(
+                text("""
+                    UPDATE idempotency_keys
+                    SET fingerprint = :fingerprint, status_code = :status_code,
+                        headers = CAST(:headers AS jsonb), body = :body,
+                        expires_at = now() + make_interval(secs => :ttl)
+                    WHERE key = :key
+                """),
+                {
+                    "key": key,
+                    "fingerprint": response.fingerprint,
+                    "status_code": response.status_code,
+                    "headers": json.dumps(headers),
+                    "body": response.body,
+                    "ttl": float(self.ttl_seconds),
+                }
+            )
+            self._puts += 1
+            if self._puts % self.PURGE_EVERY == 0:
+                await session.execute(text("DELETE FROM idempotency_keys WHERE expires_at <= now()"))
+
+    async def release(self, key: str) -> None:
+        """Drop an unfinished claim so the client can retry"""
+        async with db_config.get_async_session() as session:
+            await session.execute(
+                text("DELETE FROM idempotency_keys WHERE key = :key AND status_code IS NULL"),
+                {"key": key}
+            )
+
+
+def build_idempotency_store():
+    """Create the store selected by IDEMPOTENCY_BACKEND ("memory" or "postgres")"""
+    if IDEMPOTENCY_BACKEND == "postgres":
+        return PostgresIdempotencyStore()
+    return InMemoryIdempotencyStore()
+
+
+async def _send_json(send, status_code: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """
+    Pure ASGI middleware implementing Idempotency-Key replay and coalescing.
+
+    The request body is hashed as the handler reads it (nothing is buffered),
+    so streaming uploads are unaffected. Only responses with status < 500 are
+    stored; server errors release the key so the client can retry.
+    """
+
+    def __init__(self, app, store=None, methods: set[str] = IDEMPOTENT_METHODS):
+        self.app = app
+        self.store = store or build_idempotency_store()
+        self.methods = methods
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.methods:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        client_key = headers.get(b"idempotency-key")
+        if not client_key:
+            await self.app(scope, receive, send)
+            return
+        if len(client_key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters")
+            return
+
+        key = hashlib.sha256(b"\0".join([
+            scope["method"].encode(), scope["path"].encode(),
+            headers.get(b"authorization", b""), client_key,
+        ])).hexdigest()
+
+        while (running := self._in_flight.get(key)) is not None:
+            # Coalesce onto the execution already running in this worker
+            stored = await asyncio.shield(running)
+            record_cache_lookup("idempotency", stored is not None)
+            if stored is not None:
+                await self._replay(stored, receive, send)
+                return
+            # That execution failed: check again, another waiter may
+            # already have taken over - only one of us re-runs the handler
+
+        # Register before any await so concurrent duplicates coalesce onto us
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        stored = None
+        try:
+            stored = await self.store.get(key)
+            record_cache_lookup("idempotency", stored is not None)
+            if stored is not None:
+                await self._replay(stored, receive, send)
+                return
+
+            if not await self.store.claim(key):
+                await _send_json(send, 409, "A request with this Idempotency-Key is still being processed")
+                return
+
+            try:
+                stored = await self._execute(scope, receive, send)
+            except BaseException:
+                await self.store.release(key)
+                raise
+            if stored is not None:
+                await self.store.put(key, stored)
+            else:
+                await self.store.release(key)
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+            if not future.done():
+                future.set_result(stored)
+
+    async def _execute(self, scope, receive, send) -> StoredResponse | None:
+        """Run the handler, hashing the request and capturing the response"""
+        body_hash = hashlib.sha256()
+        body_started = False
+        body_complete = False
+        status_code = 500
+        response_headers: list = []
+        response_body = bytearray()
+        storable = True
+
+        async def hashing_receive():
+            nonlocal body_started, body_complete
+            message = await receive()
+            if message["type"] == "http.request":
+                body_started = True
+                body_hash.update(message.get("body", b""))
+                if not message.get("more_body", False):
+                    body_complete = True
+            return message
+
+        async def capturing_send(message):
+            nonlocal status_code, response_headers, storable
+            if message["type"] == "http.response.start":
+                if not body_started:
+                    # The handler never read the body (e.g. POST
+                    # /bookings/{id}/cancel): read it now, while the server
+                    # still delivers it, so the response can be stored
+                    while not body_complete and (await hashing_receive())["type"] == "http.request":
+                        pass
+                status_code = message["status"]
+                response_headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body" and storable:
+                response_body.extend(message.get("body", b""))
+                if len(response_body) > IDEMPOTENCY_MAX_BODY_BYTES:
+                    storable = False
+                    response_body.clear()
+            await send(message)
+
+        await self.app(scope, hashing_receive, capturing_send)
+
+        # Only store complete exchanges: a handler that rejected the request
+        # part-way through reading the body has no reliable fingerprint
+        if status_code >= 500 or not storable or not body_complete:
+            return None
+        return StoredResponse(body_hash.hexdigest(), status_code, response_headers, bytes(response_body))
+
+    async def _replay(self, stored: StoredResponse, receive, send) -> None:
+        """Send a stored response after checking the retry sent the same body"""
+        body_hash = hashlib.sha256()
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return  # client went away
+            body_hash.update(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+
+        if body_hash.hexdigest() != stored.fingerprint:
+            await _send_json(send, 422, "Idempotency-Key was already used with a different request body")
+            return
+
+        await send({
+            "type": "http.response.start",
+            "status": stored.status_code,
+            "headers": stored.headers + [(b"idempotent-replayed", b"true")],
+        })
+        await send({"type": "http.response.body", "body": stored.body})
@@ -0,0 +1,73 @@
+"""
+Metrics Middleware
+Records latency, status and in-flight count of every HTTP request.
+
+Requests are labelled with the matched route template (e.g.
+/api/rides/{ride_id}/waitlist), read from scope["route"] after the router
+has run, so label cardinality stays bounded by the number of routes.
+Requests that match no route share the "<unmatched>" label.
+"""
+import time
+
+from starlette.routing import Mount
+
+from src.services.metrics import REQUESTS_IN_FLIGHT, UNMATCHED_ROUTE, observe_request
+
+
+def route_template(scope) -> str:
+    """
+    Full path template of the route that handled a request.
+
+    Depending on the FastAPI version, scope["route"].path may lack the
+    include_router prefix ("/rides/{ride_id}" for "/api/rides/{ride_id}").
+    Router prefixes are static, so the missing prefix is the leading
+    segments of the request path not covered by the template.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if not template:
+        # Mounted apps (e.g. /uploads) extend root_path instead of setting a route
+        mount_path = scope.get("root_path", "")[len(scope.get("app_root_path", "")):]
+        return mount_path or UNMATCHED_ROUTE
+    if isinstance(route, Mount) or ":path}" in template:
+        return template
+    template_segments = template.strip("/").split("/")
+    path_segments = scope["path"].strip("/").split("/")
+    extra = len(path_segments) - len(template_segments)
+    if extra <= 0:
+        return template
+    return "/" + "/".join(path_segments[:extra] + template_segments)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware feeding the HTTP metrics in src.services.metrics.
+
+    Add it last so it is outermost and the measured time includes the other
+    middleware (CORS, compression, idempotency).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500  # if the app fails before starting a response
+
+        async def recording_send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, recording_send)
+        finally:
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_FLIGHT.dec()
+            observe_request(scope["method"], route_template(scope), status_code, elapsed)
@@ -0,0 +1,57 @@
+"""
+Request ID Middleware
+Gives every request an id, exposes it to log records and echoes it back.
+
+An incoming X-Request-ID (e.g. from the load balancer) is kept when it looks
+sane; otherwise a new one is generated. The id is stored in
+src.config.logging_config.request_id_var for the duration of the request, so
+every log line written while handling it carries the same request_id, and it
+is returned in the X-Request-ID response header.
+"""
+import re
+import uuid
+
+from src.config.logging_config import request_id_var
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+# Accept upstream ids made of safe characters only (they end up in logs)
+VALID_REQUEST_ID = re.compile(rb"^[A-Za-z0-9._:-]{1,128}$")
+
+
+class RequestIdMiddleware:
+    """
+    Pure ASGI middleware setting the request id contextvar.
+
+    Add it last (outermost) so logs from every other middleware get the id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                if VALID_REQUEST_ID.match(value):
+                    request_id = value.decode("ascii")
+                break
+        if request_id is None:
+            request_id = uuid.uuid4().hex
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (REQUEST_ID_HEADER, request_id.encode("ascii"))
+                ]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,212 @@
+"""
+Upload Static Files
+StaticFiles for /uploads with long-lived caching of content-addressed avatars.
+
+Avatar variants are named by content hash (see src.services.avatar_images), so
+a URL always returns the same bytes. For those files:
+    - Cache-Control: public, max-age=1 year, immutable
+    - strong ETag derived from the file name (no stat-based guessing)
+    - If-None-Match -> 304, Range -> 206 (handled by FileResponse)
+
+Bodies not in the hot cache are streamed by FileResponse, which reads the
+file in chunks in a worker thread. Starlette can hand the path to the server
+instead (http.response.pathsend, for zero-copy sendfile), but uvicorn, which
+serves the app in development and under gunicorn, does not support that
+extension, so there is no sendfile here.
+
+Other files (avatars uploaded before variants existed) get a short max-age
+and the default stat-based ETag.
+
+An optional in-memory hot cache keeps the most requested small files, bounded
+by total bytes (LRU). A file is only admitted on its second request within the
+recent-miss window, so one-off fetches do not evict popular avatars.
+Files deleted by the avatar GC are dropped from the caches of the process that
+deleted them (invalidate_upload_files); other workers notice on their next
+revalidation, at most UPLOADS_HOT_CACHE_REVALIDATE_SECONDS after the delete.
+"""
+import os
+import time
+import weakref
+from collections import OrderedDict
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from src.services.avatar_images import VARIANT_NAME_PATTERN
+from src.services.metrics import record_cache_lookup
+
+# Total bytes kept in the hot cache (0 disables it)
+UPLOADS_HOT_CACHE_BYTES = int(os.getenv("UPLOADS_HOT_CACHE_BYTES", 32 * 1024 * 1024))
+
+# Files larger than this are never cached in memory
+UPLOADS_HOT_CACHE_MAX_FILE_BYTES = int(os.getenv("UPLOADS_HOT_CACHE_MAX_FILE_BYTES", 256 * 1024))
+
+# A cached file is checked to still exist on disk when its entry is older than this
+UPLOADS_HOT_CACHE_REVALIDATE_SECONDS = float(os.getenv("UPLOADS_HOT_CACHE_REVALIDATE_SECONDS", 60))
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MUTABLE_CACHE_CONTROL = "public, max-age=3600"
+
+
+class HotFileCache:
+    """
+    Byte-bounded LRU of file bodies and their response headers.
+
+    Misses are remembered in a small LRU of their own; a path is admitted
+    once it misses `admit_after` times while still remembered. Entries
+    older than `revalidate_after` seconds are reported as due, so the caller
+    can check the file still exists (see mark_checked).
+    """
+
+    def __init__(self, max_bytes: int, max_file_bytes: int, admit_after: int = 2, miss_window: int = 10_000,
+                 revalidate_after: float = UPLOADS_HOT_CACHE_REVALIDATE_SECONDS):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.admit_after = admit_after
+        self.miss_window = miss_window
+        self.revalidate_after = revalidate_after
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[bytes, list]] = OrderedDict()
+        self._checked_at: dict[str, float] = {}
+        self._recent_misses: OrderedDict[str, int] = OrderedDict()
+
+    def get(self, key: str) -> tuple[bytes, list] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def needs_check(self, key: str) -> bool:
+        """Whether the entry was last confirmed on disk more than revalidate_after ago"""
+        return time.monotonic() - self._checked_at.get(key, 0.0) > self.revalidate_after
+
+    def mark_checked(self, key: str) -> None:
+        if key in self._entries:
+            self._checked_at[key] = time.monotonic()
+
+    def discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        self._checked_at.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+
+    def should_admit(self, key: str, size: int) -> bool:
+        """Count a miss and decide whether the file is now worth caching"""
+        if size > self.max_file_bytes or size > self.max_bytes:
+            return False
+        count = self._recent_misses.pop(key, 0) + 1
+        if count >= self.admit_after:
+            return True
+        self._recent_misses[key] = count
+        if len(self._recent_misses) > self.miss_window:
+            self._recent_misses.popitem(last=False)
+        return False
+
+    def put(self, key: str, body: bytes, headers: list) -> None:
+        if key in self._entries:
+            return
+        self._entries[key] = (body, headers)
+        self._checked_at[key] = time.monotonic()
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            evicted_key, (evicted, _) = self._entries.popitem(last=False)
+            self._checked_at.pop(evicted_key, None)
+            self.size -= len(evicted)
+
+
+# Every UploadStaticFiles in this process, for invalidate_upload_files
+_upload_apps = weakref.WeakSet()
+
+
+def invalidate_upload_files(paths) -> None:
+    """
+    Drop deleted files from the hot caches of this process.
+
+    Args:
+        paths: Filesystem paths of the deleted files (absolute or relative to
+               the working directory); files outside a cache's directory are ignored
+    """
+    for upload_app in list(_upload_apps):
+        if upload_app.hot_cache is None or upload_app.directory is None:
+            continue
+        directory = os.path.realpath(upload_app.directory)
+        for path in paths:
+            relpath = os.path.relpath(os.path.realpath(path), directory)
+            if not relpath.startswith(os.pardir):
+                upload_app.hot_cache.discard(relpath)
+
+
+def _read_file(path) -> bytes:
+    with open(path, "rb") as handle:
+        return handle.read()
+
+
+class UploadStaticFiles(StaticFiles):
+    """StaticFiles with immutable caching for content-addressed uploads and an optional hot cache"""
+
+    def __init__(self, *args, hot_cache_bytes: int = UPLOADS_HOT_CACHE_BYTES,
+                 hot_cache_max_file_bytes: int = UPLOADS_HOT_CACHE_MAX_FILE_BYTES, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hot_cache = HotFileCache(hot_cache_bytes, hot_cache_max_file_bytes) if hot_cache_bytes > 0 else None
+        _upload_apps.add(self)
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        name = os.path.basename(full_path)
+        if VARIANT_NAME_PATTERN.match(name):
+            # The name is the content hash, so it is a valid strong validator
+            headers = {
+                "cache-control": IMMUTABLE_CACHE_CONTROL,
+                "etag": f'"{os.path.splitext(name)[0]}"',
+            }
+        else:
+            headers = {"cache-control": MUTABLE_CACHE_CONTROL}
+
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    async def get_response(self, path: str, scope) -> Response:
+        cache = self.hot_cache
+        request_headers = Headers(scope=scope)
+        # Range requests always go to FileResponse
+        cacheable = cache is not None and scope["method"] == "GET" and "range" not in request_headers
+
+        if cacheable:
+            entry = cache.get(path)
+            if entry is not None and self.directory is not None and cache.needs_check(path):
+                # Another worker's avatar GC may have deleted the file
+                if await anyio.to_thread.run_sync(os.path.isfile, os.path.join(self.directory, path)):
+                    cache.mark_checked(path)
+                else:
+                    cache.discard(path)
+                    entry = None
+            record_cache_lookup("uploads_hot_cache", entry is not None)
+            if entry is not None:
+                body, headers = entry
+                response = Response(body, headers=dict(headers))
+                if self.is_not_modified(response.headers, request_headers):
+                    return NotModifiedResponse(response.headers)
+                return response
+
+        response = await super().get_response(path, scope)
+
+        if (
+            cacheable
+            and isinstance(response, FileResponse)
+            and response.status_code == 200
+            and response.headers.get("cache-control") == IMMUTABLE_CACHE_CONTROL
+            and cache.should_admit(path, int(response.headers["content-length"]))
+        ):
+            body = await anyio.to_thread.run_sync(_read_file, response.path)
+            cache.put(path, body, [
+                (name, value) for name, value in response.headers.items() if name != "content-length"
+            ])
+        return response
@@ -11,8 +11,15 @@ from src.models.user import User
 from src.models.ride import Ride
 from src.models.booking import Booking
 from src.models.review import Review
+from src.models.idempotency_key import IdempotencyKey
+from src.models.waitlist import WaitlistEntry
+from src.models.rating_rollup import UserRatingRollup
+from src.models.data_export import DataExport
+from src.models.job import Job
 
-__all__ = ["User", "Ride", "Booking", "Review"]
+__all__ = [
+    "User", "Ride", "Booking", "Review", "IdempotencyKey", "WaitlistEntry", "UserRatingRollup", "DataExport", "Job"
+]
 
 class ModelJSONMixin:
     """
@@ -5,7 +5,7 @@ Tracks seat reservations, payment, and booking status.
 """
 from datetime import datetime
 from sqlalchemy import (
-    Column, Integer, Numeric, DateTime, ForeignKey, CheckConstraint, Index, String
+    Column, Integer, Numeric, DateTime, ForeignKey, ForeignKeyConstraint, CheckConstraint, Index, String
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -50,14 +50,24 @@ class Booking(Base):
     # Links to the Ride being booked
     # If ride is deleted, this booking is deleted too (CASCADE)
     # Indexed for fast "show all bookings for ride X" queries
+    # The foreign key is (ride_id, ride_departure_time) - see __table_args__
     ride_id = Column(
         UUID(as_uuid=True),
-        ForeignKey("rides.id", ondelete="CASCADE"),  # Link to rides table
         nullable=False,  # Every booking must reference a ride
         index=True,  # Speed up ride lookup
         comment="Which ride is being booked"
     )
     
+    # Copy of the ride's departure_time (the rides partition key)
+    # Partitioned tables can only be referenced by their full primary key,
+    # so the foreign key to rides needs both id and departure_time
+    # Kept in sync automatically by ON UPDATE CASCADE
+    ride_departure_time = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        comment="Departure time of the booked ride (part of rides foreign key)"
+    )
+    
     # Links to the User who is booking (the passenger)
     # If user is deleted, their bookings are deleted too (CASCADE)
     # Indexed for fast "show all my bookings" queries
@@ -109,14 +119,27 @@ class Booking(Base):
     # ===== TIMESTAMPS =====
     # When this booking was created
     # Indexed for "recent bookings" queries
+    # Also the partition key (monthly partitions), so it is part of the primary key
     booked_at = Column(
         DateTime(timezone=True),
+        primary_key=True,  # Partition key must be in the primary key
         nullable=False,
         server_default=func.now(),  # Auto-set by database
         index=True,  # Speed up time-based queries
         comment="When booking was created (UTC)"
     )
     
+    # ===== SEAT HOLD =====
+    # Pending bookings hold their seats only until this time
+    # If the driver has not confirmed by then, the seat hold sweeper
+    # cancels the booking and returns the seats to the ride
+    # NULL once the booking is confirmed (no expiry)
+    hold_expires_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="When the pending seat hold lapses (UTC)"
+    )
+    
     # ===== DATA VALIDATION RULES =====
     # Database enforces these rules automatically
     
@@ -136,8 +159,31 @@ class Booking(Base):
             "status IN ('pending', 'confirmed', 'cancelled', 'completed')",
             name="check_booking_status"
         ),
+        # ===== LINK TO PARTITIONED RIDES TABLE =====
+        # References the full rides primary key (id, departure_time)
+        ForeignKeyConstraint(
+            ["ride_id", "ride_departure_time"],
+            ["rides.id", "rides.departure_time"],
+            ondelete="CASCADE",  # Delete bookings if ride deleted
+            onupdate="CASCADE",  # Follow the ride if its departure_time changes
+            name="fk_bookings_ride"
+        ),
+        # ===== SEAT HOLD EXPIRY INDEX =====
+        # Partial index over pending holds only, so finding the next holds to
+        # expire is a short range scan no matter how many bookings exist
+        Index(
+            "idx_bookings_pending_hold_expiry",
+            "hold_expires_at",
+            postgresql_where=text("status = 'pending'")
+        ),
+        # ===== TIME PARTITIONING =====
+        # One partition per month of booked_at (see src/config/partitions.py)
+        {"postgresql_partition_by": "RANGE (booked_at)"},
     )
     
+    # The ORM still identifies bookings by id alone
+    __mapper_args__ = {"primary_key": [id]}
+    
     # ===== RELATIONSHIPS TO OTHER TABLES =====
     
     # The ride this booking is for
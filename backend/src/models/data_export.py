@@ -0,0 +1,107 @@
+"""
+Data Export Model
+Tracks GDPR data export requests and the ZIP archives they produce.
+"""
+from sqlalchemy import Column, String, Text, BigInteger, DateTime, ForeignKey, CheckConstraint, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from src.config.db import Base
+
+
+class DataExport(Base):
+    """
+    DataExport Model - One export request of a user's personal data.
+    
+    Lifecycle: queued -> running -> ready (archive on disk until expires_at)
+                                 -> failed (error holds the reason)
+    The archive itself lives under EXPORT_DIR (see src/services/data_export.py),
+    only its path is stored here.
+    """
+    __tablename__ = "data_exports"
+    
+    # ===== PRIMARY KEY =====
+    # Also used as the request_id returned to the client
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        server_default=text("gen_random_uuid()"),
+        comment="Unique export identifier (UUID)"
+    )
+    
+    # ===== FOREIGN KEYS =====
+    # If user is deleted, their export records are deleted too (CASCADE)
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+        comment="Whose data is exported"
+    )
+    
+    # ===== EXPORT STATE =====
+    status = Column(
+        String(20),
+        nullable=False,
+        server_default="queued",
+        comment="queued, running, ready, failed"
+    )
+    
+    file_path = Column(
+        Text,
+        nullable=True,
+        comment="Path of the finished ZIP archive"
+    )
+    
+    size_bytes = Column(
+        BigInteger,
+        nullable=True,
+        comment="Size of the finished ZIP archive"
+    )
+    
+    error = Column(
+        Text,
+        nullable=True,
+        comment="Why the export failed"
+    )
+    
+    # ===== TIMESTAMPS =====
+    created_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        comment="When the export was requested (UTC)"
+    )
+    
+    completed_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="When the archive was finished (UTC)"
+    )
+    
+    # Archives are deleted after this (indexed for the purge scan)
+    expires_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        index=True,
+        comment="When the archive will be deleted (UTC)"
+    )
+    
+    # ===== DATA VALIDATION RULES =====
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('queued', 'running', 'ready', 'failed')",
+            name="check_export_status"
+        ),
+        # At most one export in progress per user (repeated clicks reuse it)
+        Index(
+            "idx_data_exports_one_active",
+            "user_id",
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')")
+        ),
+    )
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f"<DataExport(id={self.id}, user_id={self.user_id}, status={self.status})>"
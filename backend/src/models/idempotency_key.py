@@ -0,0 +1,76 @@
+"""
+Idempotency Key Model
+Stores responses of write requests sent with an Idempotency-Key header,
+so client retries can be answered without re-running the handler.
+Used by the Postgres backend of the idempotency middleware.
+"""
+from sqlalchemy import Column, String, Integer, LargeBinary, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from src.config.db import Base
+
+
+class IdempotencyKey(Base):
+    """
+    IdempotencyKey Model - One stored response per (method, path, user, key).
+    
+    A row is first inserted as a claim (status_code NULL) while the original
+    request runs, expiring after IDEMPOTENCY_CLAIM_SECONDS, then filled in
+    with the response and kept for IDEMPOTENCY_TTL_SECONDS. Expired rows are purged
+    periodically by the middleware store.
+    """
+    __tablename__ = "idempotency_keys"
+    
+    # SHA-256 of method, path, caller credentials and the client's key
+    key = Column(
+        String(64),
+        primary_key=True,
+        comment="Hash of method, path, caller and Idempotency-Key header"
+    )
+    
+    # SHA-256 of the request body - a retry must send the same payload
+    fingerprint = Column(
+        String(64),
+        nullable=True,
+        comment="Hash of the original request body"
+    )
+    
+    # NULL while the original request is still in flight
+    status_code = Column(
+        Integer,
+        nullable=True,
+        comment="Stored response status (NULL while in flight)"
+    )
+    
+    # Response headers as [[name, value], ...]
+    headers = Column(
+        JSONB,
+        nullable=True,
+        comment="Stored response headers"
+    )
+    
+    body = Column(
+        LargeBinary,
+        nullable=True,
+        comment="Stored response body"
+    )
+    
+    # Indexed so purging expired rows is a range scan
+    expires_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        index=True,
+        comment="When this stored response may be discarded (UTC)"
+    )
+    
+    created_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        comment="When the original request arrived (UTC)"
+    )
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f"<IdempotencyKey(key={self.key}, status_code={self.status_code})>"
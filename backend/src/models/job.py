@@ -0,0 +1,147 @@
+"""
+Job Model
+Durable background jobs claimed by worker processes (see src/services/jobs.py).
+"""
+from sqlalchemy import (
+    Column, BigInteger, SmallInteger, Integer, String, Text, DateTime, CheckConstraint, Index, Identity, text
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from src.config.db import Base
+
+
+class Job(Base):
+    """
+    Job Model - One unit of background work.
+    
+    Lifecycle: queued -> running -> (deleted on success)
+                                 -> queued again with a later run_at (retry)
+                                 -> failed (after max_attempts)
+    Periodic jobs are rescheduled instead of deleted when they finish.
+    
+    A running job belongs to a worker until locked_until; workers extend the
+    lease while the job runs, and jobs whose lease lapses (worker crashed)
+    are put back in the queue.
+    """
+    __tablename__ = "jobs"
+    
+    # ===== PRIMARY KEY =====
+    id = Column(
+        BigInteger,
+        Identity(always=True),
+        primary_key=True,
+        comment="Job identifier (FIFO tie-breaker)"
+    )
+    
+    # ===== WHAT TO RUN =====
+    # Name of the registered handler, e.g. "data_export"
+    kind = Column(
+        String(50),
+        nullable=False,
+        comment="Registered handler name"
+    )
+    
+    payload = Column(
+        JSONB,
+        nullable=False,
+        server_default=text("'{}'::jsonb"),
+        comment="Arguments passed to the handler"
+    )
+    
+    # ===== SCHEDULING =====
+    # Higher runs first; ties run in run_at order
+    priority = Column(
+        SmallInteger,
+        nullable=False,
+        server_default="0",
+        comment="Higher priority jobs are claimed first"
+    )
+    
+    run_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        comment="Earliest time the job may run (UTC)"
+    )
+    
+    # Optional key making the job unique while it is queued or running
+    dedupe_key = Column(
+        String(200),
+        nullable=True,
+        comment="At most one queued/running job per key"
+    )
+    
+    # ===== EXECUTION STATE =====
+    status = Column(
+        String(20),
+        nullable=False,
+        server_default="queued",
+        comment="queued, running, failed"
+    )
+    
+    attempts = Column(
+        Integer,
+        nullable=False,
+        server_default="0",
+        comment="How many times the job has been claimed"
+    )
+    
+    max_attempts = Column(
+        Integer,
+        nullable=False,
+        server_default="5",
+        comment="Give up (status failed) after this many attempts"
+    )
+    
+    locked_until = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Lease expiry of the worker running the job"
+    )
+    
+    last_error = Column(
+        Text,
+        nullable=True,
+        comment="Error of the most recent failed attempt"
+    )
+    
+    # ===== TIMESTAMPS =====
+    created_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        comment="When the job was enqueued (UTC)"
+    )
+    
+    # ===== DATA VALIDATION RULES =====
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('queued', 'running', 'failed')",
+            name="check_job_status"
+        ),
+        # ===== CLAIM INDEX =====
+        # Partial index over queued jobs in claim order, so claiming a batch
+        # reads only the head of the queue however many jobs have failed
+        Index(
+            "idx_jobs_claim_order",
+            text("priority DESC"), "run_at", "id",
+            postgresql_where=text("status = 'queued'")
+        ),
+        # Finding lapsed leases only looks at running jobs
+        Index(
+            "idx_jobs_running_lease",
+            "locked_until",
+            postgresql_where=text("status = 'running'")
+        ),
+        Index(
+            "idx_jobs_dedupe_key",
+            "dedupe_key",
+            unique=True,
+            postgresql_where=text("dedupe_key IS NOT NULL AND status IN ('queued', 'running')")
+        ),
+    )
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f"<Job(id={self.id}, kind={self.kind}, status={self.status})>"
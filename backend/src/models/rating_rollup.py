@@ -0,0 +1,78 @@
+"""
+Rating Rollup Model
+Compact per-user rating summary: star histogram plus a recency-weighted score.
+Maintained incrementally when reviews are added or removed (see src.services.ratings).
+"""
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, CheckConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from src.config.db import Base
+
+
+class UserRatingRollup(Base):
+    """
+    UserRatingRollup Model - One row per user who has received reviews.
+    
+    Histogram: stars_1 .. stars_5 count reviews by star rating.
+    
+    Recency-weighted score: every review's weight halves every
+    RATING_DECAY_HALF_LIFE_DAYS. decayed_sum / decayed_count hold the weighted
+    rating sum and weight total as of decayed_at; both decay by the same factor,
+    so decayed_sum / decayed_count is the current weighted average without
+    having to re-decay at read time.
+    """
+    __tablename__ = "user_rating_rollups"
+    
+    # ===== PRIMARY KEY =====
+    # The reviewed user (rollup is deleted together with the user)
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+        comment="User these ratings were received by"
+    )
+    
+    # ===== STAR HISTOGRAM =====
+    stars_1 = Column(Integer, nullable=False, server_default="0", comment="Number of 1-star reviews")
+    stars_2 = Column(Integer, nullable=False, server_default="0", comment="Number of 2-star reviews")
+    stars_3 = Column(Integer, nullable=False, server_default="0", comment="Number of 3-star reviews")
+    stars_4 = Column(Integer, nullable=False, server_default="0", comment="Number of 4-star reviews")
+    stars_5 = Column(Integer, nullable=False, server_default="0", comment="Number of 5-star reviews")
+    
+    # ===== TIME-DECAYED SCORE =====
+    # Sum of rating * weight, weights decayed to decayed_at
+    decayed_sum = Column(
+        Float,
+        nullable=False,
+        server_default="0",
+        comment="Decayed sum of ratings as of decayed_at"
+    )
+    
+    # Sum of weights, decayed to decayed_at
+    decayed_count = Column(
+        Float,
+        nullable=False,
+        server_default="0",
+        comment="Decayed number of reviews as of decayed_at"
+    )
+    
+    # Reference time of the decayed values (latest review applied)
+    decayed_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        comment="Time the decayed values are expressed at (UTC)"
+    )
+    
+    # ===== DATA VALIDATION RULES =====
+    __table_args__ = (
+        CheckConstraint(
+            "stars_1 >= 0 AND stars_2 >= 0 AND stars_3 >= 0 AND stars_4 >= 0 AND stars_5 >= 0",
+            name="check_rollup_stars_non_negative"
+        ),
+    )
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f"<UserRatingRollup(user_id={self.user_id}, decayed_count={self.decayed_count})>"
@@ -5,7 +5,7 @@ Supports rating system for trust and quality assurance.
 """
 from datetime import datetime
 from sqlalchemy import (
-    Column, Integer, Text, DateTime, ForeignKey, CheckConstraint, Index, UniqueConstraint
+    Column, Integer, Text, DateTime, ForeignKey, ForeignKeyConstraint, CheckConstraint, Index, UniqueConstraint
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -64,14 +64,22 @@ class Review(Base):
     # Provides context: "This review is about ride #ABC"
     # If ride is deleted, reviews about it are deleted too (CASCADE)
     # Indexed for "show all reviews for ride X" queries
+    # The foreign key is (ride_id, ride_departure_time) - see __table_args__
     ride_id = Column(
         UUID(as_uuid=True),
-        ForeignKey("rides.id", ondelete="CASCADE"),
         nullable=False,
         index=True,
         comment="Which ride this review is about"
     )
     
+    # Copy of the ride's departure_time (the rides partition key)
+    # Needed because the partitioned rides table is referenced by (id, departure_time)
+    ride_departure_time = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        comment="Departure time of the reviewed ride (part of rides foreign key)"
+    )
+    
     # Links to the User who wrote this review (the author)
     # If user is deleted, their reviews are deleted too (CASCADE)
     # Indexed for "show all reviews I wrote" queries
@@ -142,6 +150,15 @@ class Review(Base):
             "ride_id", "reviewer_id", "reviewee_id",
             name="unique_review_per_ride_pair"
         ),
+        # ===== LINK TO PARTITIONED RIDES TABLE =====
+        # References the full rides primary key (id, departure_time)
+        ForeignKeyConstraint(
+            ["ride_id", "ride_departure_time"],
+            ["rides.id", "rides.departure_time"],
+            ondelete="CASCADE",
+            onupdate="CASCADE",
+            name="fk_reviews_ride"
+        ),
     )
     
     # ===== RELATIONSHIPS TO OTHER TABLES =====
@@ -132,8 +132,11 @@ class Ride(Base):
     # When the driver plans to leave
     # Timezone-aware (stores UTC, displays in user's timezone)
     # Indexed for fast "find rides leaving today" queries
+    # Also the partition key: the table is split into monthly partitions by
+    # departure_time, so Postgres requires it to be part of the primary key
     departure_time = Column(
         DateTime(timezone=True),
+        primary_key=True,  # Partition key must be in the primary key
         nullable=False,
         index=True,  # Speed up time-based searches
         comment="When driver departs (timezone-aware)"
@@ -191,6 +194,16 @@ class Ride(Base):
         comment="When ride was created (UTC)"
     )
     
+    # When this row last changed (seats, status, details) - the version behind
+    # list ETags. ORM writes bump it via onupdate; raw SQL UPDATEs set it explicitly
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+        comment="When the ride row last changed (UTC)"
+    )
+    
     # ===== DATA VALIDATION RULES =====
     # Database enforces these constraints automatically
     
@@ -222,8 +235,16 @@ class Ride(Base):
         # "GIST" = Generalized Search Tree (spatial index type)
         Index("idx_origin_geom", origin_geom, postgresql_using="gist"),
         Index("idx_destination_geom", destination_geom, postgresql_using="gist"),
+        # ===== TIME PARTITIONING =====
+        # One partition per month of departure_time (see src/config/partitions.py)
+        # Old months can be detached/archived without touching today's open rides
+        {"postgresql_partition_by": "RANGE (departure_time)"},
     )
     
+    # The ORM still identifies rides by id alone (departure_time is only in
+    # the database primary key because of partitioning)
+    __mapper_args__ = {"primary_key": [id]}
+    
     # ===== RELATIONSHIPS TO OTHER TABLES =====
     
     # The driver (User) who created this ride
@@ -5,7 +5,7 @@ Users can be drivers (offering rides) or passengers (booking rides).
 """
 from datetime import datetime
 from sqlalchemy import (
-    Column, String, Text, Numeric, Integer, DateTime, CheckConstraint
+    Column, String, Text, Numeric, Integer, DateTime, CheckConstraint, Index
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -95,7 +95,7 @@ class User(Base):
     
     # ===== RATING SYSTEM =====
     # Average star rating from all reviews (0.00 to 5.00)
-    # Updated when new reviews are added
+    # Updated when new reviews are added (rating_sum / rating_count, see src.services.ratings)
     # Example: 4.25 means average of all ratings is 4.25 stars
     rating_avg = Column(
         Numeric(3, 2),  # 3 total digits, 2 after decimal (e.g., 4.25)
@@ -113,6 +113,15 @@ class User(Base):
         comment="Total number of reviews received"
     )
     
+    # Sum of all star ratings received
+    # Kept as an exact integer so the average never drifts from rounding
+    rating_sum = Column(
+        Integer,
+        nullable=False,
+        server_default="0",  # New users have no stars yet
+        comment="Sum of star ratings received"
+    )
+    
     # ===== ACCOUNT STATUS =====
     # Whether account is usable
     # "active" = can use app normally
@@ -184,6 +193,25 @@ class User(Base):
         comment="When account was created (UTC)"
     )
     
+    # When this row last changed - the version behind the profile ETag
+    # ORM writes bump it via onupdate; raw SQL UPDATEs set it explicitly
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+        comment="When the user row last changed (UTC)"
+    )
+    
+    # When the user asked for their account to be deleted
+    # NULL = no deletion pending; the account is hard-deleted once the grace
+    # period has passed (see src/services/account_deletion.py)
+    deletion_requested_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="When account deletion was requested (UTC)"
+    )
+    
     # ===== DATA VALIDATION RULES =====
     # These constraints are enforced by the database itself
     # If violated, database will reject the insert/update
@@ -218,6 +246,13 @@ class User(Base):
             "vehicle_year IS NULL OR (vehicle_year >= 1900 AND vehicle_year <= 2030)",
             name="check_vehicle_year"
         ),
+        # ===== PENDING DELETION INDEX =====
+        # Partial index: the deletion job only ever scans accounts awaiting deletion
+        Index(
+            "idx_users_deletion_requested_at",
+            "deletion_requested_at",
+            postgresql_where=text("deletion_requested_at IS NOT NULL")
+        ),
     )
     
     # ===== RELATIONSHIPS TO OTHER TABLES =====
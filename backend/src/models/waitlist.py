@@ -0,0 +1,110 @@
+"""
+Waitlist Model
+Represents passengers queued for seats on a full ride.
+Entries are promoted into pending bookings in FIFO order when seats free up.
+"""
+from sqlalchemy import (
+    Column, BigInteger, Integer, DateTime, ForeignKey, ForeignKeyConstraint,
+    CheckConstraint, Index, Identity, UniqueConstraint
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from src.config.db import Base
+
+
+class WaitlistEntry(Base):
+    """
+    WaitlistEntry Model - A passenger waiting for seats on a ride.
+    
+    Queue order is the auto-incrementing id (first come, first served).
+    When a booking is cancelled (or its hold expires) the freed seats go to
+    the oldest entries that fit, in the same transaction that freed them.
+    
+    Relationships:
+        - ride: The ride being waited on (N:1)
+        - passenger: The waiting user (N:1)
+    """
+    __tablename__ = "ride_waitlist"
+    
+    # ===== PRIMARY KEY / QUEUE ORDER =====
+    # Monotonic identity: lower id = joined earlier = promoted first
+    id = Column(
+        BigInteger,
+        Identity(always=True),
+        primary_key=True,
+        comment="Queue position order (lower = earlier)"
+    )
+    
+    # ===== FOREIGN KEYS =====
+    # The ride being waited on (with its departure_time, see rides partitioning)
+    ride_id = Column(
+        UUID(as_uuid=True),
+        nullable=False,
+        comment="Which ride the passenger is waiting for"
+    )
+    
+    ride_departure_time = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        comment="Departure time of the ride (part of rides foreign key)"
+    )
+    
+    # The waiting passenger
+    # If user is deleted, their waitlist entries are deleted too (CASCADE)
+    passenger_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+        comment="Who is waiting (passenger)"
+    )
+    
+    # ===== REQUEST DETAILS =====
+    # Seats the passenger wants once promoted
+    seats_requested = Column(
+        Integer,
+        nullable=False,
+        comment="Seats to reserve when promoted (must be >= 1)"
+    )
+    
+    # ===== TIMESTAMPS =====
+    created_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        comment="When passenger joined the waitlist (UTC)"
+    )
+    
+    # ===== DATA VALIDATION RULES =====
+    __table_args__ = (
+        CheckConstraint(
+            "seats_requested > 0",
+            name="check_waitlist_seats_positive"
+        ),
+        # One queue entry per passenger per ride
+        UniqueConstraint(
+            "ride_id", "passenger_id",
+            name="unique_waitlist_entry_per_ride"
+        ),
+        ForeignKeyConstraint(
+            ["ride_id", "ride_departure_time"],
+            ["rides.id", "rides.departure_time"],
+            ondelete="CASCADE",
+            onupdate="CASCADE",
+            name="fk_waitlist_ride"
+        ),
+        # ===== QUEUE INDEX =====
+        # Head of a ride's queue is an index range scan: O(log n) to find,
+        # then only the entries actually promoted are read
+        Index("idx_waitlist_ride_queue", "ride_id", "id"),
+    )
+    
+    # ===== RELATIONSHIPS TO OTHER TABLES =====
+    ride = relationship("Ride", lazy="selectin")
+    passenger = relationship("User", lazy="selectin")
+    
+    def __repr__(self):
+        """String representation for debugging"""
+        return f"<WaitlistEntry(id={self.id}, ride_id={self.ride_id}, passenger_id={self.passenger_id})>"
@@ -4,5 +4,8 @@ Exports all FastAPI route modules.
 """
 from src.routes.auth import router as auth_router
 from src.routes.users import router as users_router
+from src.routes.rides import router as rides_router
+from src.routes.bookings import router as bookings_router
+from src.routes.reviews import router as reviews_router
 
-__all__ = ["auth_router", "users_router"]
\ No newline at end of file
+__all__ = ["auth_router", "users_router", "rides_router", "bookings_router", "reviews_router"]
\ No newline at end of file
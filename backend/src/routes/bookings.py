@@ -0,0 +1,176 @@
+"""
+Booking Routes
+Handles seat reservation, booking lookup, driver confirmation and cancellation endpoints.
+"""
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.db import get_db
+from src.models.booking import Booking
+from src.models.ride import Ride
+from src.models.user import User
+from src.schemas.booking import (
+    BookingCreate, BookingResponse, BookingBatchDecision, BookingBatchResult
+)
+from src.auth import get_current_active_user
+from src.services.bookings import (
+    reserve_seats, cancel_booking, confirm_booking, batch_decide_bookings
+)
+from src.services.seat_holds import seat_hold_sweeper
+
+router = APIRouter(prefix="/bookings", tags=["Bookings"])
+
+# Postgres SQLSTATE for a transaction aborted to break a deadlock
+DEADLOCK_DETECTED = "40P01"
+
+
+@router.post("", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
+async def create_booking(
+    booking_data: BookingCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Book seats on a ride.
+
+    Seats are reserved and the pending booking is created in a single
+    conditional statement, so concurrent passengers can never oversell a ride.
+    The ride becomes "full" when its last seat is taken.
+    
+    The seats are held until hold_expires_at; if the driver has not
+    confirmed by then the booking is cancelled and the seats are released.
+    """
+    booking = await reserve_seats(db, booking_data.ride_id, current_user.id, booking_data.seats)
+    await db.commit()
+    
+    seat_hold_sweeper.schedule(booking.id, booking.hold_expires_at)
+    return BookingResponse.model_validate(booking)
+
+
+@router.post("/batch", response_model=BookingBatchResult)
+async def decide_bookings_batch(
+    decision: BookingBatchDecision,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Confirm and/or reject many pending bookings on one of your rides at once.
+
+    Everything happens in one transaction: set-based updates for the
+    bookings, then a single seat recount on the ride. Bookings that are no
+    longer pending (or whose hold expired) are reported as skipped.
+    If the transaction is picked as a deadlock victim it is retried once.
+    """
+    for attempt in range(2):
+        try:
+            result = await batch_decide_bookings(
+                db, decision.ride_id, current_user.id, decision.confirm, decision.reject
+            )
+            await db.commit()
+            break
+        except IntegrityError:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Seat counts for this ride are inconsistent; no changes were applied"
+            )
+        except DBAPIError as e:
+            await db.rollback()
+            if getattr(e.orig, "sqlstate", None) != DEADLOCK_DETECTED:
+                raise
+            if attempt:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="The ride's bookings are being changed concurrently; no changes were applied, please retry"
+                )
+    
+    for booking_id in [*result["confirmed"], *result["rejected"]]:
+        seat_hold_sweeper.discard(booking_id)
+    for promoted_booking in result["promoted"]:
+        seat_hold_sweeper.schedule(promoted_booking.id, promoted_booking.hold_expires_at)
+    return BookingBatchResult(
+        ride_id=str(result["ride_id"]),
+        confirmed=[str(booking_id) for booking_id in result["confirmed"]],
+        rejected=[str(booking_id) for booking_id in result["rejected"]],
+        skipped=[str(booking_id) for booking_id in result["skipped"]],
+        ride_seats_available=result["ride_seats_available"],
+        ride_status=result["ride_status"],
+    )
+
+
+@router.get("/{booking_id}", response_model=BookingResponse)
+async def get_booking(
+    booking_id: UUID,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get a booking.
+
+    Visible to the passenger who made it and to the driver of the ride.
+    """
+    result = await db.execute(
+        select(Booking, Ride.driver_id)
+        .join(Ride, Ride.id == Booking.ride_id)
+        .where(Booking.id == booking_id)
+    )
+    row = result.one_or_none()
+    if row is None or current_user.id not in (row.Booking.passenger_id, row.driver_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Booking not found"
+        )
+    return BookingResponse.model_validate(row.Booking)
+
+
+@router.post("/{booking_id}/cancel", response_model=BookingResponse)
+async def cancel_user_booking(
+    booking_id: UUID,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Cancel one of your bookings.
+
+    Marks the booking cancelled and returns its seats to the ride
+    (re-opening it if it was full) in the same statement. Passengers on the
+    ride's waitlist are promoted into the freed seats in the same transaction.
+    """
+    booking, promoted = await cancel_booking(db, booking_id, current_user.id)
+    if booking is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No active booking found with that id"
+        )
+    await db.commit()
+    
+    seat_hold_sweeper.discard(booking_id)
+    for promoted_booking in promoted:
+        seat_hold_sweeper.schedule(promoted_booking.id, promoted_booking.hold_expires_at)
+    return BookingResponse.model_validate(booking)
+
+
+@router.post("/{booking_id}/confirm", response_model=BookingResponse)
+async def confirm_ride_booking(
+    booking_id: UUID,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Confirm a pending booking on one of your rides (drivers only).
+
+    Only possible while the booking's seat hold is still valid.
+    """
+    booking = await confirm_booking(db, booking_id, current_user.id)
+    if booking is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Booking is not pending on one of your rides, or its seat hold has expired"
+        )
+    await db.commit()
+    
+    seat_hold_sweeper.discard(booking_id)
+    return BookingResponse.model_validate(booking)
@@ -0,0 +1,72 @@
+"""
+Review Routes
+Handles posting and deleting reviews, and bulk rating summaries for driver cards.
+"""
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.db import get_db
+from src.models.user import User
+from src.schemas.review import ReviewCreate, ReviewResponse, RatingSummary
+from src.auth import get_current_active_user
+from src.services.ratings import create_review, delete_review, get_rating_rollups
+
+router = APIRouter(prefix="/reviews", tags=["Reviews"])
+
+# Max users per bulk rating summary request
+MAX_SUMMARY_USERS = 200
+
+
+@router.get("/summary", response_model=list[RatingSummary])
+async def get_rating_summaries(
+    user_ids: list[UUID] = Query(..., max_length=MAX_SUMMARY_USERS),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get star breakdowns and recency-weighted scores for many users at once.
+
+    Served from the precomputed rollups in a single query, e.g.
+    /api/reviews/summary?user_ids=<id>&user_ids=<id>
+    """
+    summaries = await get_rating_rollups(db, user_ids)
+    return [RatingSummary(**summary) for summary in summaries.values()]
+
+
+@router.post("", response_model=ReviewResponse, status_code=status.HTTP_201_CREATED)
+async def post_review(
+    review_data: ReviewCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Review the driver (as a passenger) or a passenger (as the driver) of a completed ride.
+
+    The reviewee's rating_avg and rating_count are updated in the same
+    statement, so the new rating is visible as soon as this returns.
+    """
+    review = await create_review(
+        db, review_data.ride_id, current_user.id, review_data.reviewee_id,
+        review_data.rating, review_data.comment
+    )
+    await db.commit()
+    return ReviewResponse.model_validate(review)
+
+
+@router.delete("/{review_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def remove_review(
+    review_id: UUID,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Delete one of your reviews.
+
+    The reviewee's rating and star breakdown are adjusted in the same statement.
+    """
+    if not await delete_review(db, review_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Review not found"
+        )
+    await db.commit()
@@ -0,0 +1,370 @@
+"""
+Ride Routes
+Handles ride search and ranking, recurring ride creation, admin bulk import,
+waitlist endpoints and live seat updates.
+"""
+import asyncio
+import csv
+import io
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from uuid import UUID
+from fastapi import (
+    APIRouter, Depends, HTTPException, Query, status, File, UploadFile, WebSocket, WebSocketDisconnect
+)
+from fastapi.concurrency import run_in_threadpool
+from geoalchemy2 import Geography, Geometry
+from pydantic import ValidationError
+from sqlalchemy import select, cast, func, Float
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.db import get_db
+from src.models.ride import Ride
+from src.models.user import User
+from src.schemas.ride import RecurringRideCreate, RideImportRow, BulkRideResponse, SeatSubscription
+from src.schemas.booking import BookingResponse, WaitlistJoin, WaitlistStatus
+from src.auth import get_current_active_user, get_current_admin_user
+from src.services.bookings import SEAT_HOLD_TTL_SECONDS
+from src.services.ranking import RideCandidates, rank_candidates
+from src.services.ratings import get_rating_rollups
+from src.services.ride_bulk import (
+    recurring_ride_rows, import_row_to_tuple, insert_rides, copy_rides, chunked
+)
+from src.services.seat_holds import seat_hold_sweeper
+from src.services.seat_updates import (
+    SEAT_PUSH_MAX_SUBSCRIPTIONS, SeatSubscriber, cells_near, seat_update_hub
+)
+from src.services.waitlist import join_waitlist, leave_waitlist, waitlist_position
+
+router = APIRouter(prefix="/rides", tags=["Rides"])
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on candidates pulled from PostGIS before ranking
+MAX_SEARCH_CANDIDATES = 50_000
+
+# Rows parsed and COPYed per chunk during admin imports
+IMPORT_CHUNK_SIZE = 5000
+
+
+def _geography_point(lng: float, lat: float):
+    """Build a PostGIS geography POINT from longitude/latitude"""
+    return cast(func.ST_SetSRID(func.ST_MakePoint(lng, lat), 4326), Geography)
+
+
+@router.get("/search")
+async def search_rides(
+    origin_lat: float = Query(..., ge=-90, le=90),
+    origin_lng: float = Query(..., ge=-180, le=180),
+    destination_lat: float = Query(..., ge=-90, le=90),
+    destination_lng: float = Query(..., ge=-180, le=180),
+    departure_time: datetime = Query(..., description="Requested departure time (ISO 8601)"),
+    seats: int = Query(1, ge=1, le=8),
+    radius_km: float = Query(10.0, gt=0, le=100),
+    window_hours: float = Query(12.0, gt=0, le=72),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Search open rides near the requested origin/destination and rank them.
+
+    PostGIS narrows the candidates (radius, seats, time window), then the
+    ranking service scores them in one vectorized pass and returns the top results.
+    """
+    radius_m = radius_km * 1000
+    window = timedelta(hours=window_hours)
+
+    # Fetch only the columns needed for ranking - no ORM objects for candidates
+    candidate_query = (
+        select(
+            Ride.id,
+            func.ST_X(cast(Ride.origin_geom, Geometry)),
+            func.ST_Y(cast(Ride.origin_geom, Geometry)),
+            func.ST_X(cast(Ride.destination_geom, Geometry)),
+            func.ST_Y(cast(Ride.destination_geom, Geometry)),
+            # Epoch seconds as double avoids building a datetime per candidate
+            cast(func.extract("epoch", Ride.departure_time), Float),
+            Ride.price_share,
+            User.rating_avg,
+        )
+        .join(User, User.id == Ride.driver_id)
+        .where(
+            Ride.status == "open",
+            Ride.seats_available >= seats,
+            Ride.departure_time.between(departure_time - window, departure_time + window),
+            func.ST_DWithin(Ride.origin_geom, _geography_point(origin_lng, origin_lat), radius_m),
+            func.ST_DWithin(Ride.destination_geom, _geography_point(destination_lng, destination_lat), radius_m),
+        )
+        .limit(MAX_SEARCH_CANDIDATES)
+    )
+    result = await db.execute(candidate_query)
+    candidates = RideCandidates.from_rows(result.all())
+
+    ranked = rank_candidates(
+        candidates,
+        origin=(origin_lng, origin_lat),
+        destination=(destination_lng, destination_lat),
+        departure=departure_time,
+        k=limit,
+    )
+    if not ranked:
+        return {"rides": [], "candidates": len(candidates)}
+
+    # Load full ride details only for the winners
+    result = await db.execute(select(Ride).where(Ride.id.in_([entry["id"] for entry in ranked])))
+    rides_by_id = {ride.id: ride for ride in result.scalars().all()}
+
+    # Star breakdowns for every driver card in one query
+    driver_ratings = await get_rating_rollups(db, [ride.driver_id for ride in rides_by_id.values()])
+
+    rides = []
+    for entry in ranked:
+        ride = rides_by_id.get(entry["id"])
+        if ride is None:
+            continue
+        ride_json = ride.toJson()
+        ride_json["ranking"] = {key: value for key, value in entry.items() if key != "id"}
+        rating = driver_ratings[ride.driver_id]
+        ride_json["driver_rating"] = {**rating, "user_id": str(rating["user_id"])}
+        rides.append(ride_json)
+
+    return {"rides": rides, "candidates": len(candidates)}
+
+
+def _bulk_response(created: int, started: float, source: str, ride_ids: list | None = None) -> BulkRideResponse:
+    """Build a bulk creation response and log the insert throughput"""
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Created %d ride(s) from %s in %.1f ms", created, source, elapsed * 1000,
+        extra={"rides_per_second": round(created / elapsed, 1) if elapsed > 0 else 0.0},
+    )
+    return BulkRideResponse(created=created, ride_ids=[str(ride_id) for ride_id in ride_ids or []])
+
+
+@router.post("/recurring", response_model=BulkRideResponse, status_code=status.HTTP_201_CREATED)
+async def create_recurring_rides(
+    rule: RecurringRideCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create the same ride on every matching day of a date range.
+
+    Expands the rule (days of week, date range, local time) into rides and
+    inserts them with a single batched statement.
+    """
+    rows = recurring_ride_rows(rule, current_user)
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Recurrence rule does not produce any future departures"
+        )
+
+    started = time.perf_counter()
+    created = await insert_rides(db, rows)
+    await db.commit()
+
+    return _bulk_response(created, started, "recurring rule", [row[0] for row in rows])
+
+
+def _parse_import_file(upload: UploadFile, file_format: str):
+    """
+    Lazily parse and validate an uploaded CSV or NDJSON file.
+    Yields ride tuples; raises ValueError with the offending line number.
+    """
+    text_stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    try:
+        if file_format == "csv":
+            records = enumerate(csv.DictReader(text_stream), start=2)  # line 1 is the header
+        else:
+            records = (
+                (line_number, line)
+                for line_number, line in enumerate(text_stream, start=1)
+                if line.strip()
+            )
+
+        for line_number, record in records:
+            try:
+                if file_format != "csv":
+                    record = json.loads(record)
+                yield import_row_to_tuple(RideImportRow.model_validate(record))
+            except (ValidationError, ValueError) as e:
+                raise ValueError(f"Line {line_number}: {e}")
+    finally:
+        # Leave the underlying upload file open for FastAPI to clean up
+        text_stream.detach()
+
+
+@router.post("/import", response_model=BulkRideResponse, status_code=status.HTTP_201_CREATED)
+async def import_rides(
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Bulk import rides from a CSV or NDJSON file (admin only).
+
+    Rows are parsed in chunks off the event loop and streamed into
+    Postgres with COPY. The whole import is one transaction.
+    """
+    filename = (file.filename or "").lower()
+    if filename.endswith(".csv") or file.content_type == "text/csv":
+        file_format = "csv"
+    elif filename.endswith((".ndjson", ".jsonl")) or file.content_type == "application/x-ndjson":
+        file_format = "ndjson"
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only CSV and NDJSON files are supported"
+        )
+
+    chunks = chunked(_parse_import_file(file, file_format), IMPORT_CHUNK_SIZE)
+
+    async def batches():
+        while True:
+            # Parsing and validation are CPU work - keep them off the event loop
+            batch = await run_in_threadpool(next, chunks, None)
+            if batch is None:
+                return
+            yield batch
+
+    started = time.perf_counter()
+    try:
+        created = await copy_rides(db, batches())
+        await db.commit()
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Import rejected: unknown driver_id or invalid ride data"
+        )
+
+    return _bulk_response(created, started, "import")
+
+
+async def _waitlist_status(db: AsyncSession, ride_id: UUID, passenger_id) -> WaitlistStatus:
+    """Current waitlist position of a passenger on a ride"""
+    entry = await waitlist_position(db, ride_id, passenger_id)
+    if entry is None:
+        return WaitlistStatus(ride_id=str(ride_id), waiting=False)
+    return WaitlistStatus(
+        ride_id=str(ride_id),
+        waiting=True,
+        seats_requested=entry.seats_requested,
+        position=entry.position,
+    )
+
+
+@router.post("/{ride_id}/waitlist", response_model=WaitlistStatus)
+async def join_ride_waitlist(
+    ride_id: UUID,
+    request: WaitlistJoin,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Join (or change your seat count on) a ride's waitlist.
+
+    Waitlisted passengers are promoted into pending bookings in the order
+    they joined, as soon as enough seats are freed by a cancellation, a
+    lapsed hold or a driver rejecting a booking. If seats are already free
+    and nobody is ahead of you, you are promoted immediately.
+    """
+    promoted = await join_waitlist(db, ride_id, current_user.id, request.seats, SEAT_HOLD_TTL_SECONDS)
+    response = await _waitlist_status(db, ride_id, current_user.id)
+    await db.commit()
+
+    for booking in promoted:
+        seat_hold_sweeper.schedule(booking.id, booking.hold_expires_at)
+        if booking.passenger_id == current_user.id:
+            response.booking = BookingResponse.model_validate(booking)
+    return response
+
+
+@router.get("/{ride_id}/waitlist", response_model=WaitlistStatus)
+async def get_ride_waitlist_position(
+    ride_id: UUID,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get your position on a ride's waitlist (1 = next to be promoted).
+    """
+    return await _waitlist_status(db, ride_id, current_user.id)
+
+
+@router.delete("/{ride_id}/waitlist", status_code=status.HTTP_204_NO_CONTENT)
+async def leave_ride_waitlist(
+    ride_id: UUID,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Leave a ride's waitlist.
+    """
+    if not await leave_waitlist(db, ride_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="You are not on this ride's waitlist"
+        )
+    await db.commit()
+
+
+# ===== LIVE SEAT UPDATES =====
+
+async def _forward_seat_updates(websocket: WebSocket, subscriber: SeatSubscriber) -> None:
+    """Write the subscriber's queued messages to the socket"""
+    while True:
+        await websocket.send_text(await subscriber.next_message())
+
+
+@router.websocket("/live")
+async def live_seat_updates(websocket: WebSocket):
+    """
+    Live seat availability over WebSocket.
+    
+    Send {"op": "subscribe", "rides": [...], "cells": [...], "near": {"lat", "lng"}}
+    (or "op": "unsubscribe") to follow rides by id and/or by origin geo cell.
+    Changes arrive at most once per tick as
+    {"type": "seats", "rides": [{"ride_id", "seats_available", "status"}, ...]}.
+    {"type": "resync"} means updates were dropped and results should be re-fetched.
+    """
+    await websocket.accept()
+    subscriber = seat_update_hub.connect()
+    sender = asyncio.create_task(_forward_seat_updates(websocket, subscriber))
+    try:
+        while True:
+            try:
+                request = SeatSubscription.model_validate_json(await websocket.receive_text())
+            except ValidationError as e:
+                subscriber.offer(json.dumps({"type": "error", "detail": e.errors(include_url=False)[0]["msg"]}))
+                continue
+
+            rides = [str(ride_id) for ride_id in request.rides]
+            cells = list(request.cells)
+            if request.near is not None:
+                cells.extend(cells_near(request.near.lat, request.near.lng))
+
+            if request.op == "unsubscribe":
+                seat_update_hub.unsubscribe(subscriber, rides, cells)
+            elif not seat_update_hub.subscribe(subscriber, rides, cells):
+                subscriber.offer(json.dumps({
+                    "type": "error",
+                    "detail": f"At most {SEAT_PUSH_MAX_SUBSCRIPTIONS} rides and cells per connection",
+                }))
+                continue
+            subscriber.offer(json.dumps({
+                "type": "subscribed",
+                "rides": len(subscriber.rides),
+                "cells": sorted(subscriber.cells),
+            }))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+        seat_update_hub.disconnect(subscriber)
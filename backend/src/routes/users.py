@@ -4,37 +4,66 @@ Handles user profile management, password changes, avatar uploads, and privacy a
 """
 import os
 import uuid
+from datetime import datetime, timezone
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from email_validator import validate_email, EmailNotValidError
 
 from src.config.db import get_db
 from src.models.user import User
+from src.models.data_export import DataExport
 from src.schemas.user import (
     UserResponse, UserProfileUpdate, UserPasswordChange,
-    AvatarUploadResponse, PrivacyResponse
+    AvatarUploadResponse, PrivacyResponse, DataExportStatus
 )
 from src.auth import (
     get_current_active_user, 
+    get_current_user_id,
+    load_active_user,
     verify_password, 
     get_password_hash,
     validate_password_strength
 )
+from src.services.avatar_images import avatar_variant_urls
+from src.services.avatars import receive_avatar_upload, process_avatar
+from src.services.data_export import request_data_export
+from src.services.etags import PRIVATE_CACHE_CONTROL, etag_matches, not_modified, set_etag, version_etag
+from src.services.account_deletion import ACCOUNT_DELETION_GRACE_DAYS
 
 router = APIRouter(prefix="/users", tags=["User Profile"])
 
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_profile(
-    current_user: User = Depends(get_current_active_user)
+    request: Request,
+    response: Response,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get current user's profile information.
     
     Returns complete user profile including avatar URL, vehicle info,
     and verification status. Used by User Settings page and header.
+    
+    Supports conditional GET: when If-None-Match matches the profile's
+    version, only users.status/updated_at are read and 304 is returned
+    without loading the user (and its relationships) or serializing it.
     """
+    if request.headers.get("if-none-match"):
+        result = await db.execute(select(User.status, User.updated_at).where(User.id == user_id))
+        row = result.one_or_none()
+        # Missing or suspended accounts fall through to the normal 401/403
+        if row is not None and row.status == "active":
+            etag = version_etag("user-profile", (user_id, row.updated_at))
+            if etag_matches(request, etag):
+                return not_modified(etag, PRIVATE_CACHE_CONTROL)
+    
+    current_user = await load_active_user(db, user_id)
+    set_etag(response, version_etag("user-profile", (user_id, current_user.updated_at)), PRIVATE_CACHE_CONTROL)
     return current_user
 
 
@@ -142,117 +171,175 @@ async def change_user_password(
     }
 
 
-@router.post("/me/avatar", response_model=AvatarUploadResponse)
+@router.post(
+    "/me/avatar",
+    response_model=AvatarUploadResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["file"],
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                    }
+                }
+            },
+        }
+    },
+)
 async def upload_user_avatar(
-    file: UploadFile = File(...),
-    current_user: User = Depends(get_current_active_user),
+    request: Request,
+    user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Upload user avatar image.
-    
-    Accepts image files and stores them with generated filenames.
-    Returns the URL to access the uploaded image.
-    """
-    # Validate file type
-    allowed_types = {"image/jpeg", "image/png", "image/gif", "image/webp"}
-    if file.content_type not in allowed_types:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only JPEG, PNG, GIF, and WebP images are allowed"
-        )
-    
-    # Validate file size (5MB max)
-    max_size = 5 * 1024 * 1024  # 5MB in bytes
-    file_content = await file.read()
-    if len(file_content) > max_size:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail="File size must be less than 5MB"
-        )
+    Upload user avatar image (multipart/form-data, field "file").
     
-    # Generate unique filename
-    file_extension = file.filename.split('.')[-1] if '.' in file.filename else 'jpg'
-    unique_filename = f"avatar_{current_user.id}_{uuid.uuid4().hex[:8]}.{file_extension}"
+    The upload is streamed to disk in chunks: it is rejected as soon as it
+    exceeds 5MB, and its type is detected from the file's first bytes
+    (JPEG, PNG, GIF, and WebP are allowed).
     
-    # Create uploads directory if it doesn't exist
-    uploads_dir = "uploads/avatars"
-    os.makedirs(uploads_dir, exist_ok=True)
+    The image is stripped of metadata and stored as square WebP variants
+    (40, 96 and 256px) named by content hash, so re-uploading the same
+    image reuses the existing files.
+    Returns the URLs of the variants.
     
-    # Save file
-    file_path = os.path.join(uploads_dir, unique_filename)
-    with open(file_path, "wb") as f:
-        f.write(file_content)
+    The session is not touched until the upload is stored and rendered, so
+    slow uploads do not hold pooled connections; the account is checked
+    afterwards (files rejected then are left to the avatar GC).
+    """
+    upload = await receive_avatar_upload(request)
+    avatar_url = await process_avatar(upload)
     
     # Update user's avatar URL
     # In production, this would be a full URL to your CDN/cloud storage
-    avatar_url = f"/uploads/avatars/{unique_filename}"
+    current_user = await load_active_user(db, user_id)
     current_user.avatar_url = avatar_url
     
     await db.commit()
     
     return AvatarUploadResponse(
         avatar_url=avatar_url,
+        avatar_urls=avatar_variant_urls(avatar_url),
         message="Avatar uploaded successfully"
     )
 
 
 @router.post("/me/export", response_model=PrivacyResponse)
 async def export_user_data(
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Request export of all user data.
     
-    Enqueues a data export job that will compile all user data
-    into a downloadable format (GDPR compliance).
-    
-    TODO: Implement actual data export with background job processing
+    Queues a background job that writes the user's profile, rides, bookings,
+    waitlist entries and reviews into a ZIP archive (GDPR compliance).
+    Poll GET /users/me/export/{request_id} for progress; repeated requests
+    while an export is in progress return the same request_id.
     """
-    # Generate a request ID for tracking
-    request_id = f"export_{current_user.id}_{uuid.uuid4().hex[:8]}"
-    
-    # TODO: Implement actual data export logic
-    # - Queue background job to compile user data
-    # - Include: profile, rides, bookings, reviews, etc.
-    # - Generate downloadable ZIP file
-    # - Send email notification when ready
+    # The export row and its job commit together
+    export_id, created = await request_data_export(db, current_user.id)
+    await db.commit()
     
     return PrivacyResponse(
-        message="Data export request submitted. You will receive an email when your data is ready for download.",
-        request_id=request_id,
+        message=(
+            "Data export request submitted. Your archive will be available for download shortly."
+            if created else "A data export is already in progress."
+        ),
+        request_id=str(export_id),
         status="queued"
     )
 
 
-@router.post("/me/delete", response_model=PrivacyResponse)
-async def request_account_deletion(
+async def _get_own_export(db: AsyncSession, export_id: uuid.UUID, user: User) -> DataExport:
+    export = (await db.execute(
+        select(DataExport).where(DataExport.id == export_id, DataExport.user_id == user.id)
+    )).scalar_one_or_none()
+    if export is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export not found"
+        )
+    return export
+
+
+@router.get("/me/export/{export_id}", response_model=DataExportStatus)
+async def get_data_export_status(
+    export_id: uuid.UUID,
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Request account deletion.
+    Get the state of a data export request.
     
-    Soft-deletes the account or queues it for deletion.
-    For compliance and data integrity, accounts may not be
-    immediately deleted if they have active bookings.
+    download_url is set once the archive is ready.
+    """
+    export = await _get_own_export(db, export_id, current_user)
+    response = DataExportStatus.model_validate(export)
+    if export.status == "ready":
+        response.download_url = f"/api/users/me/export/{export.id}/download"
+    return response
+
+
+@router.get(
+    "/me/export/{export_id}/download",
+    response_class=FileResponse,
+    responses={200: {"content": {"application/zip": {}}}}
+)
+async def download_data_export(
+    export_id: uuid.UUID,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Download a finished data export archive.
     
-    TODO: Implement proper account deletion logic
+    Supports Range requests, so interrupted downloads can be resumed.
     """
-    # Check for active bookings/rides that prevent deletion
-    # TODO: Query for active bookings or recent rides
+    export = await _get_own_export(db, export_id, current_user)
+    if export.status != "ready":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export is not ready (status: {export.status})"
+        )
+    if not export.file_path or not os.path.exists(export.file_path):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Export archive has expired, please request a new export"
+        )
     
-    # For now, just mark account as suspended
-    # In production, you might:
-    # - Set deletion_requested_at timestamp
-    # - Queue background job for actual deletion
-    # - Send confirmation email
-    # - Implement grace period for cancellation
+    return FileResponse(
+        export.file_path,
+        media_type="application/zip",
+        filename=f"fareshare-export-{export.created_at:%Y-%m-%d}.zip"
+    )
+
+
+@router.post("/me/delete", response_model=PrivacyResponse)
+async def request_account_deletion(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Request account deletion.
     
-    current_user.status = "suspended"  # Soft delete
+    Deactivates the account immediately and records deletion_requested_at.
+    After ACCOUNT_DELETION_GRACE_DAYS the account and all of its rides,
+    bookings and reviews are hard-deleted in small batches by the account
+    deletion job (see src/services/account_deletion.py).
+    """
+    current_user.status = "suspended"
+    if current_user.deletion_requested_at is None:
+        current_user.deletion_requested_at = datetime.now(timezone.utc)
     await db.commit()
     
     return PrivacyResponse(
-        message="Account deletion request submitted. Your account has been deactivated and will be permanently deleted within 30 days.",
+        message=(
+            "Account deletion request submitted. Your account has been deactivated and will be "
+            f"permanently deleted within {ACCOUNT_DELETION_GRACE_DAYS} days."
+        ),
         status="queued"
     )
\ No newline at end of file
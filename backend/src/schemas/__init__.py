@@ -3,8 +3,16 @@ Schemas Package
 Exports all Pydantic models for request/response validation.
 """
 from src.schemas.user import *
+from src.schemas.ride import *
+from src.schemas.booking import *
+from src.schemas.review import *
 
 __all__ = [
     "UserRegister", "UserLogin", "UserResponse", "UserProfileUpdate",
-    "UserPasswordChange", "Token", "AvatarUploadResponse", "PrivacyResponse"
+    "UserPasswordChange", "Token", "AvatarUploadResponse", "PrivacyResponse",
+    "DataExportStatus",
+    "Location", "RecurringRideCreate", "RideImportRow", "BulkRideResponse",
+    "SeatSubscription",
+    "BookingCreate", "BookingResponse", "BookingBatchDecision", "BookingBatchResult",
+    "WaitlistJoin", "WaitlistStatus", "ReviewCreate", "ReviewResponse", "RatingSummary"
 ]
\ No newline at end of file
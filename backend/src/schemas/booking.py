@@ -0,0 +1,95 @@
+"""
+Booking API Schemas
+Pydantic models for seat reservation and booking management endpoints.
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+from pydantic import BaseModel, Field, field_validator, model_validator
+from enum import Enum
+
+
+class BookingStatus(str, Enum):
+    """Booking lifecycle status enum"""
+    PENDING = "pending"
+    CONFIRMED = "confirmed"
+    CANCELLED = "cancelled"
+    COMPLETED = "completed"
+
+
+# ===== BOOKING SCHEMAS =====
+
+class BookingCreate(BaseModel):
+    """Schema for booking seats on a ride"""
+    ride_id: UUID
+    seats: int = Field(1, ge=1, le=8)
+
+
+class BookingResponse(BaseModel):
+    """Schema for booking response (includes the ride's remaining seats)"""
+    id: str
+    ride_id: str
+    passenger_id: str
+    seats_reserved: int
+    amount_paid: Decimal
+    status: BookingStatus
+    booked_at: datetime
+    hold_expires_at: Optional[datetime] = None  # Pending bookings only
+
+    # Ride state right after this booking changed it
+    ride_seats_available: Optional[int] = None
+    ride_status: Optional[str] = None
+
+    model_config = {"from_attributes": True}
+
+    @field_validator('id', 'ride_id', 'passenger_id', mode='before')
+    @classmethod
+    def convert_uuid_to_str(cls, v):
+        """Convert UUID to string if needed"""
+        if v is not None and not isinstance(v, str):
+            return str(v)
+        return v
+
+
+# ===== DRIVER BATCH DECISION SCHEMAS =====
+
+class BookingBatchDecision(BaseModel):
+    """Schema for confirming/rejecting many pending bookings of one ride at once"""
+    ride_id: UUID
+    confirm: list[UUID] = Field(default_factory=list, max_length=500)
+    reject: list[UUID] = Field(default_factory=list, max_length=500)
+
+    @model_validator(mode='after')
+    def validate_decisions(self):
+        if not self.confirm and not self.reject:
+            raise ValueError('Provide at least one booking to confirm or reject')
+        if set(self.confirm) & set(self.reject):
+            raise ValueError('A booking cannot be both confirmed and rejected')
+        return self
+
+
+class BookingBatchResult(BaseModel):
+    """Schema for batch decision results"""
+    ride_id: str
+    confirmed: list[str]
+    rejected: list[str]
+    skipped: list[str]  # Not pending on this ride, or hold already expired
+    ride_seats_available: int
+    ride_status: str
+
+
+# ===== WAITLIST SCHEMAS =====
+
+class WaitlistJoin(BaseModel):
+    """Schema for joining a ride's waitlist"""
+    seats: int = Field(1, ge=1, le=8)
+
+
+class WaitlistStatus(BaseModel):
+    """Schema for a passenger's place on a ride's waitlist"""
+    ride_id: str
+    waiting: bool
+    seats_requested: Optional[int] = None
+    position: Optional[int] = None  # 1 = next to be promoted
+    booking: Optional[BookingResponse] = None  # Set when promoted into a booking
@@ -0,0 +1,69 @@
+"""
+Review API Schemas
+Pydantic models for posting and listing reviews.
+"""
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from pydantic import BaseModel, Field, field_validator
+
+
+# ===== REVIEW SCHEMAS =====
+
+class ReviewCreate(BaseModel):
+    """Schema for reviewing another participant of a completed ride"""
+    ride_id: UUID
+    reviewee_id: UUID
+    rating: int = Field(..., ge=1, le=5)
+    comment: Optional[str] = Field(None, max_length=2000)
+
+    @field_validator('comment')
+    def validate_comment(cls, v):
+        if v is not None:
+            v = v.strip()
+            return v or None
+        return v
+
+
+class ReviewResponse(BaseModel):
+    """Schema for review response (includes the reviewee's updated aggregate)"""
+    id: str
+    ride_id: str
+    reviewer_id: str
+    reviewee_id: str
+    rating: int
+    comment: Optional[str] = None
+    created_at: datetime
+
+    # Reviewee's rating right after this review was applied
+    reviewee_rating_avg: Optional[float] = None
+    reviewee_rating_count: Optional[int] = None
+
+    model_config = {"from_attributes": True}
+
+    @field_validator('id', 'ride_id', 'reviewer_id', 'reviewee_id', mode='before')
+    @classmethod
+    def convert_uuid_to_str(cls, v):
+        """Convert UUID to string if needed"""
+        if v is not None and not isinstance(v, str):
+            return str(v)
+        return v
+
+
+# ===== RATING SUMMARY SCHEMAS =====
+
+class RatingSummary(BaseModel):
+    """Schema for a user's star breakdown and recency-weighted score (driver cards)"""
+    user_id: str
+    stars: list[int]  # Review counts for 1..5 stars
+    count: int
+    average: Optional[float] = None
+    recent_score: Optional[float] = None  # Recent reviews weigh more
+
+    @field_validator('user_id', mode='before')
+    @classmethod
+    def convert_uuid_to_str(cls, v):
+        """Convert UUID to string if needed"""
+        if v is not None and not isinstance(v, str):
+            return str(v)
+        return v
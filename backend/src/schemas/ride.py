@@ -0,0 +1,147 @@
+"""
+Ride API Schemas
+Pydantic models for ride creation, recurring rides and bulk import endpoints.
+"""
+import re
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Literal, Optional
+from uuid import UUID
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+# Longest date range a single recurring request may cover
+MAX_RECURRENCE_DAYS = 180
+
+
+class Location(BaseModel):
+    """A point on the map with an optional display label"""
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+    label: Optional[str] = Field(None, max_length=255)
+
+
+# ===== RIDE CREATION SCHEMAS =====
+
+class RecurringRideCreate(BaseModel):
+    """
+    Schema for creating the same ride on several days.
+
+    Example: every weekday (0-4) from 2025-01-06 to 2025-03-28 at 07:45 Toronto time.
+    """
+    origin: Location
+    destination: Location
+    days_of_week: list[int] = Field(..., min_length=1, description="0 = Monday ... 6 = Sunday")
+    start_date: date
+    end_date: date
+    departure_time: time = Field(..., description="Local departure time on each day")
+    timezone: str = "UTC"
+    seats_total: int = Field(..., gt=0, le=8)
+    price_share: Decimal = Field(..., ge=0, le=Decimal("9999.99"), decimal_places=2)
+
+    # Vehicle info (defaults to the driver's profile when omitted)
+    vehicle_make: Optional[str] = None
+    vehicle_model: Optional[str] = None
+    vehicle_color: Optional[str] = None
+    vehicle_year: Optional[int] = None
+
+    @field_validator('days_of_week')
+    def validate_days_of_week(cls, v):
+        if any(day < 0 or day > 6 for day in v):
+            raise ValueError('Days of week must be between 0 (Monday) and 6 (Sunday)')
+        return sorted(set(v))
+
+    @field_validator('timezone')
+    def validate_timezone(cls, v):
+        try:
+            ZoneInfo(v)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f'Unknown timezone: {v}')
+        return v
+
+    @model_validator(mode='after')
+    def validate_date_range(self):
+        if self.end_date < self.start_date:
+            raise ValueError('end_date must be on or after start_date')
+        if self.end_date - self.start_date > timedelta(days=MAX_RECURRENCE_DAYS):
+            raise ValueError(f'Recurring rides cannot span more than {MAX_RECURRENCE_DAYS} days')
+        return self
+
+
+class RideImportRow(BaseModel):
+    """Schema for one ride in an admin CSV/NDJSON bulk import"""
+    driver_id: UUID
+    origin_lat: float = Field(..., ge=-90, le=90)
+    origin_lng: float = Field(..., ge=-180, le=180)
+    destination_lat: float = Field(..., ge=-90, le=90)
+    destination_lng: float = Field(..., ge=-180, le=180)
+    departure_time: datetime
+    seats_total: int = Field(..., gt=0)
+    seats_available: Optional[int] = None
+    price_share: Decimal = Field(..., ge=0, le=Decimal("9999.99"))
+    status: str = "open"
+    origin_label: Optional[str] = None
+    destination_label: Optional[str] = None
+    vehicle_make: Optional[str] = None
+    vehicle_model: Optional[str] = None
+    vehicle_color: Optional[str] = None
+    vehicle_year: Optional[int] = None
+
+    @field_validator(
+        'origin_label', 'destination_label', 'vehicle_make', 'vehicle_model',
+        'vehicle_color', 'vehicle_year', 'seats_available', mode='before'
+    )
+    def empty_to_none(cls, v):
+        # CSV cells are empty strings rather than missing values
+        if v == "":
+            return None
+        return v
+
+    @field_validator('status')
+    def validate_status(cls, v):
+        if v not in ('open', 'full', 'cancelled', 'completed'):
+            raise ValueError('Status must be open, full, cancelled, or completed')
+        return v
+
+    @field_validator('departure_time')
+    def validate_departure_time(cls, v):
+        if v.tzinfo is None:
+            raise ValueError('departure_time must include a timezone offset')
+        return v
+
+    @model_validator(mode='after')
+    def validate_seats(self):
+        if self.seats_available is None:
+            self.seats_available = self.seats_total
+        if self.seats_available < 0 or self.seats_available > self.seats_total:
+            raise ValueError('seats_available must be between 0 and seats_total')
+        return self
+
+
+# ===== LIVE SEAT UPDATE SCHEMAS =====
+
+class SeatSubscription(BaseModel):
+    """
+    Message a client sends on the live seats WebSocket.
+
+    rides: ride ids to follow; cells: geo cell ids ("<lat index>:<lng index>");
+    near: follow the cell containing this point and its neighbours.
+    """
+    op: Literal["subscribe", "unsubscribe"]
+    rides: list[UUID] = Field(default_factory=list, max_length=500)
+    cells: list[str] = Field(default_factory=list, max_length=500)
+    near: Optional[Location] = None
+
+    @field_validator('cells')
+    @classmethod
+    def validate_cells(cls, v):
+        for cell in v:
+            if not re.fullmatch(r"-?\d{1,4}:-?\d{1,4}", cell):
+                raise ValueError(f'Invalid cell id: {cell!r}')
+        return v
+
+
+class BulkRideResponse(BaseModel):
+    """Schema for recurring/bulk ride creation responses"""
+    created: int
+    ride_ids: list[str] = []
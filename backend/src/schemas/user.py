@@ -4,9 +4,11 @@ Pydantic models for user authentication and profile management endpoints.
 """
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, EmailStr, field_validator
+from pydantic import BaseModel, EmailStr, computed_field, field_validator
 from enum import Enum
 
+from src.services.avatar_images import avatar_variant_urls
+
 
 class UserRole(str, Enum):
     """User role enum"""
@@ -73,7 +75,7 @@ class UserResponse(BaseModel):
     role: UserRole
     verification_status: VerificationStatus
     status: AccountStatus
-    avatar_url: Optional[str] = None
+    avatar_url: Optional[str] = None  # Largest variant
     rating_avg: float
     rating_count: int
     created_at: datetime
@@ -100,6 +102,12 @@ class UserResponse(BaseModel):
         if v is not None and not isinstance(v, str):
             return str(v)
         return v
+    
+    @computed_field
+    @property
+    def avatar_urls(self) -> dict[str, str]:
+        """Avatar URL per variant size in pixels, e.g. {"40": ..., "96": ..., "256": ...}"""
+        return avatar_variant_urls(self.avatar_url)
 
 
 class UserProfileUpdate(BaseModel):
@@ -151,6 +159,7 @@ class UserPasswordChange(BaseModel):
 class AvatarUploadResponse(BaseModel):
     """Schema for avatar upload response"""
     avatar_url: str
+    avatar_urls: dict[str, str] = {}  # Variant size in pixels -> URL
     message: str = "Avatar uploaded successfully"
 
 
@@ -163,6 +172,27 @@ class PrivacyResponse(BaseModel):
     status: str = "success"
 
 
+class DataExportStatus(BaseModel):
+    """Schema for the state of a data export request"""
+    id: str
+    status: str  # queued, running, ready, failed
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    size_bytes: Optional[int] = None
+    download_url: Optional[str] = None  # Set once the archive is ready
+
+    model_config = {"from_attributes": True}
+
+    @field_validator('id', mode='before')
+    @classmethod
+    def convert_uuid_to_str(cls, v):
+        """Convert UUID to string if needed"""
+        if v is not None and not isinstance(v, str):
+            return str(v)
+        return v
+
+
 # ===== ERROR SCHEMAS =====
 
 class ErrorResponse(BaseModel):
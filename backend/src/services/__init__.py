@@ -0,0 +1,4 @@
+"""
+Services Package
+Business logic shared by route handlers and background jobs.
+"""
@@ -0,0 +1,342 @@
+"""
+Account Deletion Job
+Hard-deletes accounts whose deletion grace period has passed.
+
+A single DELETE FROM users would cascade through every ride, booking and
+review of the account in one long transaction, holding locks and producing
+one huge burst of WAL. Instead each account's dependent rows are removed
+leaf-first in batches of ACCOUNT_DELETION_BATCH_SIZE, one short transaction
+per batch:
+
+    1. the user's waitlist entries (so no cancellation can promote them
+       into a new booking while the account is being deleted)
+    2. active bookings the user holds are cancelled (seats go back to the
+       ride and its waitlist)
+    3. reviews written or received (other users' aggregates are adjusted)
+    4. the user's remaining bookings (any still active are cancelled first)
+    5. other passengers' bookings and waitlist entries on the user's rides
+    6. the user's rides, data exports and finally the users row
+
+The periodic "account_deletion.sweep" job queues one "account_deletion" job
+per due account (see src/services/jobs.py). Every step deletes "whatever is
+left", so the job is resumable: when a crashed attempt is retried it carries
+on where the previous one stopped.
+Before each batch the job waits while any streaming replica lags more than
+ACCOUNT_DELETION_MAX_REPLICA_LAG_SECONDS behind.
+
+Usage:
+    python -m src.services.account_deletion            # delete all due accounts
+    python -m src.services.account_deletion --user-id <uuid>
+"""
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import db as db_config
+from src.services.bookings import cancel_booking
+from src.services.jobs import enqueue, job_handler
+from src.services.ratings import delete_user_reviews_batch
+
+logger = logging.getLogger(__name__)
+
+# Days between the deletion request and the hard delete
+ACCOUNT_DELETION_GRACE_DAYS = int(os.getenv("ACCOUNT_DELETION_GRACE_DAYS", 30))
+
+# Rows deleted per transaction, and pause between transactions
+ACCOUNT_DELETION_BATCH_SIZE = int(os.getenv("ACCOUNT_DELETION_BATCH_SIZE", 1000))
+ACCOUNT_DELETION_BATCH_PAUSE_SECONDS = float(os.getenv("ACCOUNT_DELETION_BATCH_PAUSE_SECONDS", 0.01))
+
+# Pause batches while a replica's replay lag exceeds this
+ACCOUNT_DELETION_MAX_REPLICA_LAG_SECONDS = float(os.getenv("ACCOUNT_DELETION_MAX_REPLICA_LAG_SECONDS", 5))
+REPLICA_LAG_POLL_SECONDS = 1.0
+
+# Accounts picked up per sweep
+ACCOUNT_DELETION_USERS_PER_RUN = int(os.getenv("ACCOUNT_DELETION_USERS_PER_RUN", 100))
+
+# Arbitrary constant identifying the job's advisory lock
+ADVISORY_LOCK_KEY = 7_302_114_002
+
+DUE_ACCOUNTS_SQL = text("""
+    SELECT id FROM users
+    WHERE deletion_requested_at <= now() - make_interval(days => :grace_days)
+    ORDER BY deletion_requested_at
+    LIMIT :limit
+""")
+
+ACTIVE_BOOKINGS_SQL = text("""
+    SELECT id FROM bookings
+    WHERE passenger_id = :user_id AND status IN ('pending', 'confirmed')
+    LIMIT :batch_size
+""")
+
+OWN_WAITLIST_ENTRIES_SQL = text("""
+    DELETE FROM ride_waitlist
+    WHERE id IN (SELECT id FROM ride_waitlist WHERE passenger_id = :user_id LIMIT :batch_size)
+    RETURNING 1
+""")
+
+# Only inactive bookings: active ones hold seats and go through cancel_booking
+INACTIVE_OWN_BOOKINGS_SQL = text("""
+    DELETE FROM bookings
+    WHERE id IN (
+        SELECT id FROM bookings
+        WHERE passenger_id = :user_id AND status NOT IN ('pending', 'confirmed')
+        LIMIT :batch_size
+    )
+    RETURNING 1
+""")
+
+# Replay lag is NULL for idle or invisible (insufficient privilege) replicas
+REPLICA_LAG_SQL = text("""
+    SELECT COALESCE(max(extract(epoch FROM replay_lag)), 0) FROM pg_stat_replication
+""")
+
+# Batched deletes of other passengers' rows on the user's rides, leaf tables
+# first. Each returns one row per deleted row.
+DELETION_STEPS = (
+    ("bookings on rides", text("""
+        DELETE FROM bookings
+        WHERE id IN (
+            SELECT b.id FROM bookings b
+            JOIN rides r ON r.id = b.ride_id AND r.departure_time = b.ride_departure_time
+            WHERE r.driver_id = :user_id
+            LIMIT :batch_size
+        )
+        RETURNING 1
+    """)),
+    ("waitlist entries on rides", text("""
+        DELETE FROM ride_waitlist
+        WHERE id IN (
+            SELECT w.id FROM ride_waitlist w
+            JOIN rides r ON r.id = w.ride_id AND r.departure_time = w.ride_departure_time
+            WHERE r.driver_id = :user_id
+            LIMIT :batch_size
+        )
+        RETURNING 1
+    """)),
+    ("rides", text("""
+        DELETE FROM rides
+        WHERE id IN (SELECT id FROM rides WHERE driver_id = :user_id LIMIT :batch_size)
+        RETURNING 1
+    """)),
+)
+
+
+@dataclass
+class DeletionReport:
+    """Outcome of one deletion run"""
+    users_deleted: int = 0
+    rows_deleted: dict[str, int] = field(default_factory=dict)
+    batches: int = 0
+    max_batch_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+
+
+async def wait_for_replicas(max_lag: float = ACCOUNT_DELETION_MAX_REPLICA_LAG_SECONDS) -> None:
+    """Sleep until every streaming replica has replayed to within max_lag seconds"""
+    while True:
+        async with db_config.async_engine.connect() as conn:
+            lag = (await conn.execute(REPLICA_LAG_SQL)).scalar()
+        if lag <= max_lag:
+            return
+        logger.info(f"Account deletion paused: replica lag {lag:.1f}s")
+        await asyncio.sleep(REPLICA_LAG_POLL_SECONDS)
+
+
+async def _run_batches(report: DeletionReport, label: str, batch, batch_size: int) -> None:
+    """
+    Run `batch(session)` in its own transaction until it deletes fewer than
+    batch_size rows.
+    """
+    while True:
+        await wait_for_replicas()
+        started = time.monotonic()
+        async with db_config.get_async_session() as session:
+            deleted = await batch(session)
+        report.batches += 1
+        report.max_batch_seconds = max(report.max_batch_seconds, time.monotonic() - started)
+        report.rows_deleted[label] = report.rows_deleted.get(label, 0) + deleted
+        if deleted < batch_size:
+            return
+        await asyncio.sleep(ACCOUNT_DELETION_BATCH_PAUSE_SECONDS)
+
+
+async def _cancel_active_bookings(session: AsyncSession, user_id, batch_size: int) -> int:
+    booking_ids = (await session.execute(
+        ACTIVE_BOOKINGS_SQL, {"user_id": user_id, "batch_size": batch_size}
+    )).scalars().all()
+    for booking_id in booking_ids:
+        # Promoted waitlist holds are picked up by the seat hold sweeper's resync
+        await cancel_booking(session, booking_id, user_id)
+    return len(booking_ids)
+
+
+async def _delete_own_bookings(session: AsyncSession, user_id, batch_size: int) -> int:
+    # Anything still active (e.g. promoted from the waitlist before step 1
+    # ran) gives its seats back instead of being deleted with them
+    cancelled = await _cancel_active_bookings(session, user_id, batch_size)
+    result = await session.execute(INACTIVE_OWN_BOOKINGS_SQL, {"user_id": user_id, "batch_size": batch_size})
+    return cancelled + len(result.all())
+
+
+async def delete_account(user_id, report: DeletionReport, batch_size: int = ACCOUNT_DELETION_BATCH_SIZE) -> bool:
+    """
+    Hard-delete one account and everything that depends on it.
+
+    Args:
+        user_id: Account to delete (must have deletion_requested_at set)
+        report: Collects row counts and batch timings
+        batch_size: Max rows per transaction
+
+    Returns:
+        bool: True if the users row was deleted
+    """
+    async with db_config.get_async_session() as session:
+        pending = (await session.execute(
+            text("SELECT EXISTS (SELECT 1 FROM users WHERE id = :user_id AND deletion_requested_at IS NOT NULL)"),
+            {"user_id": user_id}
+        )).scalar()
+    if not pending:
+        return False
+
+    async def waitlist_entries(session):
+        result = await session.execute(OWN_WAITLIST_ENTRIES_SQL, {"user_id": user_id, "batch_size": batch_size})
+        return len(result.all())
+
+    async def cancel_bookings(session):
+        return await _cancel_active_bookings(session, user_id, batch_size)
+
+    async def reviews(session):
+        return await delete_user_reviews_batch(session, user_id, batch_size)
+
+    async def own_bookings(session):
+        return await _delete_own_bookings(session, user_id, batch_size)
+
+    await _run_batches(report, "own waitlist entries", waitlist_entries, batch_size)
+    await _run_batches(report, "bookings cancelled", cancel_bookings, batch_size)
+    await _run_batches(report, "reviews", reviews, batch_size)
+    await _run_batches(report, "own bookings", own_bookings, batch_size)
+
+    for label, statement in DELETION_STEPS:
+        async def step(session, statement=statement):
+            result = await session.execute(statement, {"user_id": user_id, "batch_size": batch_size})
+            return len(result.all())
+
+        await _run_batches(report, label, step, batch_size)
+
+    async with db_config.get_async_session() as session:
+        result = await session.execute(
+            text("DELETE FROM data_exports WHERE user_id = :user_id RETURNING file_path"),
+            {"user_id": user_id}
+        )
+        export_paths = [path for (path,) in result if path]
+        # Remaining dependants (rating rollup) are single rows, so the cascade is cheap.
+        # The avatar files become unreferenced and are removed by the avatar GC.
+        result = await session.execute(
+            text("DELETE FROM users WHERE id = :user_id AND deletion_requested_at IS NOT NULL RETURNING id"),
+            {"user_id": user_id}
+        )
+        deleted = result.first() is not None
+    for path in export_paths:
+        with contextlib.suppress(FileNotFoundError):
+            await asyncio.to_thread(os.unlink, path)
+
+    if deleted:
+        report.users_deleted += 1
+    return deleted
+
+
+async def delete_due_accounts(
+    limit: int = ACCOUNT_DELETION_USERS_PER_RUN, batch_size: int = ACCOUNT_DELETION_BATCH_SIZE
+) -> DeletionReport | None:
+    """
+    Delete accounts whose grace period has passed, oldest request first.
+
+    Used by the CLI; the job queue deletes accounts one job at a time instead.
+
+    Returns:
+        DeletionReport | None: None if another run holds the lock
+    """
+    report = DeletionReport()
+    started = time.monotonic()
+    async with db_config.async_engine.connect() as lock_conn:
+        if not (await lock_conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})).scalar():
+            return None
+        # Don't keep the lock connection idle in a transaction while batches run
+        await lock_conn.commit()
+        try:
+            async with db_config.get_async_session() as session:
+                user_ids = (await session.execute(
+                    DUE_ACCOUNTS_SQL, {"grace_days": ACCOUNT_DELETION_GRACE_DAYS, "limit": limit}
+                )).scalars().all()
+            for user_id in user_ids:
+                await delete_account(user_id, report, batch_size)
+                logger.info(f"Deleted account {user_id}")
+        finally:
+            await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY})
+            await lock_conn.commit()
+    report.elapsed_seconds = time.monotonic() - started
+    return report
+
+
+@job_handler("account_deletion.sweep")
+async def _sweep_due_accounts(payload: dict) -> None:
+    """Queue one deletion job per account whose grace period has passed"""
+    async with db_config.get_async_session() as session:
+        user_ids = (await session.execute(
+            DUE_ACCOUNTS_SQL, {"grace_days": ACCOUNT_DELETION_GRACE_DAYS, "limit": ACCOUNT_DELETION_USERS_PER_RUN}
+        )).scalars().all()
+        for user_id in user_ids:
+            await enqueue(
+                session, "account_deletion", {"user_id": str(user_id)}, dedupe_key=f"account_deletion:{user_id}"
+            )
+
+
+@job_handler("account_deletion")
+async def _delete_account_job(payload: dict) -> None:
+    report = DeletionReport()
+    started = time.monotonic()
+    if await delete_account(uuid.UUID(payload["user_id"]), report):
+        logger.info(
+            f"Deleted account {payload['user_id']} in {report.batches} batches "
+            f"({time.monotonic() - started:.1f}s, slowest batch {report.max_batch_seconds * 1000:.0f} ms)"
+        )
+
+
+async def _main(args) -> None:
+    await db_config.init_db()
+    try:
+        if args.user_id:
+            report = DeletionReport()
+            started = time.monotonic()
+            await delete_account(args.user_id, report, args.batch_size)
+            report.elapsed_seconds = time.monotonic() - started
+        else:
+            report = await delete_due_accounts(batch_size=args.batch_size)
+            if report is None:
+                print("Another account deletion run is in progress")
+                return
+        rows = ", ".join(f"{label}: {count}" for label, count in report.rows_deleted.items() if count)
+        print(
+            f"Deleted {report.users_deleted} account(s) in {report.batches} batches "
+            f"({report.elapsed_seconds:.1f}s, slowest batch {report.max_batch_seconds * 1000:.0f} ms)"
+        )
+        print(f"Rows: {rows or 'none'}")
+    finally:
+        await db_config.close_db()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Hard-delete accounts past their deletion grace period")
+    parser.add_argument("--user-id", type=uuid.UUID, help="Delete this account now (deletion must be requested)")
+    parser.add_argument("--batch-size", type=int, default=ACCOUNT_DELETION_BATCH_SIZE)
+    asyncio.run(_main(parser.parse_args()))
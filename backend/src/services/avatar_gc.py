@@ -0,0 +1,253 @@
+"""
+Avatar Garbage Collector
+Deletes avatar files that no user's avatar_url references any more.
+
+Orphans appear whenever a user uploads a new avatar or their account is
+deleted. Instead of loading every referenced URL into memory, the collector
+merges two sorted streams:
+
+    - referenced paths: avatar_url values read in pages ordered by avatar_url
+      (byte order, COLLATE "C"), each page a keyset query after the last
+      URL seen, so no transaction stays open across the walk and its pauses
+    - files on disk: the avatars directory walked in the same byte order,
+      one shard directory (first two hash digits) listed at a time
+
+A file that sorts before the current referenced path is unreferenced. Memory
+use is bounded by the size of one shard directory.
+
+Files modified within AVATAR_GC_GRACE_SECONDS are never deleted: an upload
+writes (or, for a re-upload, touches) its files before the new avatar_url is
+committed, which also covers URLs that appear behind the walk's position.
+The advisory lock is taken on an autocommit connection, so holding it for
+the whole run does not keep a transaction open. Deletions happen in
+batches with a pause in between so the sweep does not saturate the disk.
+Only one worker sweeps at a time (Postgres advisory lock). Runs as the
+periodic "avatar_gc" job (src/services/jobs.py).
+
+Usage:
+    python -m src.services.avatar_gc [--dry-run]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import text
+
+from src.config import db as db_config
+from src.middleware.static_files import invalidate_upload_files
+from src.services.avatar_images import AVATAR_SIZES, VARIANT_URL_PATTERN
+from src.services.avatars import AVATAR_UPLOAD_DIR, AVATAR_URL_PREFIX
+from src.services.jobs import job_handler
+
+logger = logging.getLogger(__name__)
+
+# Never delete files younger than this
+AVATAR_GC_GRACE_SECONDS = float(os.getenv("AVATAR_GC_GRACE_SECONDS", 3600))
+
+# Files deleted per batch, and pause between batches
+AVATAR_GC_BATCH_SIZE = int(os.getenv("AVATAR_GC_BATCH_SIZE", 200))
+AVATAR_GC_BATCH_PAUSE_SECONDS = float(os.getenv("AVATAR_GC_BATCH_PAUSE_SECONDS", 0.5))
+
+# Referenced URLs read per page (one short query each)
+REFERENCED_PAGE_SIZE = 1000
+
+# Arbitrary constant identifying the collector's advisory lock
+ADVISORY_LOCK_KEY = 7_302_114_001
+
+REFERENCED_AVATARS_PAGE_SQL = text("""
+    SELECT avatar_url
+    FROM users
+    WHERE avatar_url LIKE :prefix
+      AND avatar_url COLLATE "C" > :after
+    ORDER BY avatar_url COLLATE "C"
+    LIMIT :page_size
+""")
+
+
+@dataclass
+class GCReport:
+    """Outcome of one collection run"""
+    files_scanned: int = 0
+    orphans_found: int = 0
+    files_deleted: int = 0
+    bytes_reclaimed: int = 0
+    skipped_recent: int = 0
+    elapsed_seconds: float = 0.0
+
+
+def referenced_relpaths(avatar_url: str) -> list[str]:
+    """
+    Files (relative to the avatars directory) kept alive by one avatar_url,
+    in sorted order. Content-addressed URLs reference every size variant.
+    """
+    relpath = avatar_url[len(AVATAR_URL_PREFIX) + 1:]
+    match = VARIANT_URL_PATTERN.match(avatar_url)
+    if match is None:
+        return [relpath]
+    base = match.group("base")[len(AVATAR_URL_PREFIX) + 1:]
+    return sorted(f"{base}_{size}.webp" for size in AVATAR_SIZES)
+
+
+def _sorted_entries(path: str) -> list[tuple[str, bool]]:
+    """Entries of one directory as (name, is_dir), in byte order of name (+ "/" for dirs)"""
+    with os.scandir(path) as entries:
+        listed = [(entry.name, entry.is_dir(follow_symlinks=False)) for entry in entries]
+    return sorted(listed, key=lambda item: item[0] + "/" if item[1] else item[0])
+
+
+def walk_sorted(root: str):
+    """
+    Yield (relpath, stat) for every file under root in global byte order.
+
+    Sorting directories by "name/" makes each shard's files contiguous in the
+    overall order, so shards can be listed one at a time.
+    """
+    for name, is_dir in _sorted_entries(root):
+        if not is_dir:
+            yield name, os.stat(os.path.join(root, name))
+            continue
+        shard = os.path.join(root, name)
+        for child, child_is_dir in _sorted_entries(shard):
+            if not child_is_dir:
+                yield f"{name}/{child}", os.stat(os.path.join(shard, child))
+
+
+async def _referenced_stream(conn):
+    """Async generator of referenced relpaths in byte order, one page query at a time"""
+    after = ""
+    while True:
+        result = await conn.execute(REFERENCED_AVATARS_PAGE_SQL, {
+            "prefix": f"{AVATAR_URL_PREFIX}/%",
+            "after": after,
+            "page_size": REFERENCED_PAGE_SIZE,
+        })
+        page = result.scalars().all()
+        for avatar_url in page:
+            for relpath in referenced_relpaths(avatar_url):
+                yield relpath
+        if len(page) < REFERENCED_PAGE_SIZE:
+            return
+        after = page[-1]
+
+
+def _delete_batch(root: str, batch: list[tuple[str, int]]) -> tuple[int, int]:
+    deleted = reclaimed = 0
+    removed = []
+    for relpath, size in batch:
+        path = os.path.join(root, relpath)
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            continue
+        removed.append(path)
+        deleted += 1
+        reclaimed += size
+    # Stop serving them from this process's /uploads hot cache
+    invalidate_upload_files(removed)
+    return deleted, reclaimed
+
+
+async def collect_orphaned_avatars(root: str = AVATAR_UPLOAD_DIR, dry_run: bool = False) -> GCReport | None:
+    """
+    Run one collection pass.
+
+    Args:
+        root: Avatars directory
+        dry_run: Only count orphans, delete nothing
+
+    Returns:
+        GCReport | None: None if another worker holds the collector lock
+    """
+    report = GCReport()
+    started = time.monotonic()
+    if not await asyncio.to_thread(os.path.isdir, root):
+        return report
+
+    # Autocommit: the session-level lock is held without an open transaction
+    # and every page query commits on its own
+    async with db_config.async_engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        if not (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})).scalar():
+            return None
+        try:
+            referenced = _referenced_stream(conn)
+            current = await anext(referenced, None)
+            disk = walk_sorted(root)
+            cutoff = time.time() - AVATAR_GC_GRACE_SECONDS
+            batch: list[tuple[str, int]] = []
+
+            while True:
+                # Directory listing and stat calls are blocking
+                item = await asyncio.to_thread(next, disk, None)
+                if item is None:
+                    break
+                relpath, stat_result = item
+                report.files_scanned += 1
+
+                while current is not None and current < relpath:
+                    current = await anext(referenced, None)
+                if current == relpath:
+                    continue
+
+                report.orphans_found += 1
+                if stat_result.st_mtime > cutoff:
+                    report.skipped_recent += 1
+                    continue
+                if dry_run:
+                    report.bytes_reclaimed += stat_result.st_size
+                    continue
+
+                batch.append((relpath, stat_result.st_size))
+                if len(batch) >= AVATAR_GC_BATCH_SIZE:
+                    deleted, reclaimed = await asyncio.to_thread(_delete_batch, root, batch)
+                    report.files_deleted += deleted
+                    report.bytes_reclaimed += reclaimed
+                    batch = []
+                    await asyncio.sleep(AVATAR_GC_BATCH_PAUSE_SECONDS)
+
+            if batch:
+                deleted, reclaimed = await asyncio.to_thread(_delete_batch, root, batch)
+                report.files_deleted += deleted
+                report.bytes_reclaimed += reclaimed
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY})
+
+    report.elapsed_seconds = time.monotonic() - started
+    return report
+
+
+@job_handler("avatar_gc")
+async def _avatar_gc_job(payload: dict) -> None:
+    report = await collect_orphaned_avatars(dry_run=payload.get("dry_run", False))
+    if report is not None and report.orphans_found:
+        logger.info(
+            f"Avatar GC deleted {report.files_deleted} orphaned file(s), "
+            f"reclaimed {report.bytes_reclaimed / 1024 / 1024:.1f} MB"
+        )
+
+
+async def _main(args) -> None:
+    await db_config.init_db()
+    try:
+        report = await collect_orphaned_avatars(dry_run=args.dry_run)
+        if report is None:
+            print("Another avatar GC run is in progress")
+            return
+        action = "would reclaim" if args.dry_run else "reclaimed"
+        print(
+            f"Scanned {report.files_scanned} file(s), {report.orphans_found} orphaned "
+            f"({report.skipped_recent} within grace period), deleted {report.files_deleted}, "
+            f"{action} {report.bytes_reclaimed / 1024 / 1024:.1f} MB in {report.elapsed_seconds:.1f}s"
+        )
+    finally:
+        await db_config.close_db()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Delete avatar files no user references")
+    parser.add_argument("--dry-run", action="store_true", help="Report orphans without deleting them")
+    asyncio.run(_main(parser.parse_args()))
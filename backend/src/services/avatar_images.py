@@ -0,0 +1,121 @@
+"""
+Avatar Image Processing
+Decodes uploaded avatars and renders fixed-size WebP variants in a process pool.
+
+Files are content-addressed by the SHA-256 of the uploaded bytes and sharded
+by the first two hex digits:
+
+    uploads/avatars/3f/3fa9...c2_40.webp
+    uploads/avatars/3f/3fa9...c2_96.webp
+    uploads/avatars/3f/3fa9...c2_256.webp
+
+Identical uploads map to the same files, so they are rendered and stored once.
+Variants never change after they are written, which lets them be cached forever.
+
+This module only depends on Pillow and the standard library so that pool
+worker processes stay lightweight.
+"""
+import io
+import os
+import re
+import tempfile
+
+from PIL import Image, ImageOps
+
+# Square variant sizes in pixels (40 header, 96 cards/lists, 256 profile @2x)
+AVATAR_SIZES = tuple(int(size) for size in os.getenv("AVATAR_SIZES", "40,96,256").split(","))
+
+# Size stored in users.avatar_url (other sizes are derived from it)
+AVATAR_DEFAULT_SIZE = max(AVATAR_SIZES)
+
+AVATAR_WEBP_QUALITY = int(os.getenv("AVATAR_WEBP_QUALITY", 80))
+
+# Refuse to decode images larger than this (decompression bomb guard)
+AVATAR_MAX_PIXELS = int(os.getenv("AVATAR_MAX_PIXELS", 40_000_000))
+
+# Hex digits of the content hash used in file names
+HASH_LENGTH = 32
+
+VARIANT_URL_PATTERN = re.compile(r"^(?P<base>.+/[0-9a-f]+)_(?P<size>\d+)\.webp$")
+VARIANT_NAME_PATTERN = re.compile(rf"^[0-9a-f]{{{HASH_LENGTH}}}_\d+\.webp$")
+
+
+def variant_relpath(digest: str, size: int) -> str:
+    """Path of one variant relative to the avatars directory, e.g. 3f/3fa9..._96.webp"""
+    name = digest[:HASH_LENGTH]
+    return f"{name[:2]}/{name}_{size}.webp"
+
+
+def avatar_variant_urls(avatar_url: str | None) -> dict[str, str]:
+    """
+    Map each variant size to its URL, given the stored avatar_url.
+
+    Avatars uploaded before variants existed only have one file, which is
+    returned for every size.
+    """
+    if not avatar_url:
+        return {}
+    match = VARIANT_URL_PATTERN.match(avatar_url)
+    if match is None:
+        return {str(size): avatar_url for size in AVATAR_SIZES}
+    return {str(size): f"{match.group('base')}_{size}.webp" for size in AVATAR_SIZES}
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    """Write a file via temp file + rename so readers never see partial variants"""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def render_avatar_variants(source_path: str, output_dir: str, digest: str, sizes=AVATAR_SIZES) -> dict[int, int]:
+    """
+    Decode an image and write square WebP variants for each size.
+    Runs in a worker process.
+
+    EXIF orientation is applied before metadata is dropped; no EXIF, ICC or
+    XMP data is written to the variants. Animated images use their first frame.
+
+    Args:
+        source_path: Uploaded image file
+        output_dir: Avatars root directory
+        digest: SHA-256 hex digest of the upload
+        sizes: Variant edge lengths in pixels
+
+    Returns:
+        dict[int, int]: Size -> bytes written
+
+    Raises:
+        ValueError: Image is too large to decode safely
+        PIL.UnidentifiedImageError / OSError: Image could not be decoded
+    """
+    with Image.open(source_path) as image:
+        if image.width * image.height > AVATAR_MAX_PIXELS:
+            raise ValueError(f"Image exceeds {AVATAR_MAX_PIXELS} pixels")
+
+        # Let JPEG decode at reduced scale when the source is much larger
+        largest = max(sizes)
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        image.info = {}
+
+    written = {}
+    os.makedirs(os.path.join(output_dir, digest[:2]), exist_ok=True)
+    # Largest first: each smaller variant is resampled from the previous one
+    for size in sorted(sizes, reverse=True):
+        image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, "WEBP", quality=AVATAR_WEBP_QUALITY, method=4)
+        _atomic_write(os.path.join(output_dir, variant_relpath(digest, size)), buffer.getvalue())
+        written[size] = buffer.tell()
+    return written
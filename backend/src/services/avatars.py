@@ -0,0 +1,336 @@
+"""
+Avatar Upload Service
+Streams multipart avatar uploads straight to disk without buffering them in memory.
+
+The request body is fed chunk by chunk into a multipart parser:
+    - oversized uploads are rejected from Content-Length before reading, and
+      otherwise as soon as the running byte count passes AVATAR_MAX_BYTES
+    - the image type is sniffed from the magic bytes of the first chunk
+      (the client's Content-Type header and filename are not trusted)
+    - data is written to a temp file in the avatars directory from a worker
+      thread, then atomically renamed into place
+
+Memory per upload is bounded by one network chunk, regardless of file size.
+
+The received file is then decoded in a process pool and stored as
+content-addressed WebP variants (see src.services.avatar_images); the
+original upload is not kept.
+"""
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from fastapi import HTTPException, Request, status
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from src.services.avatar_images import (
+    AVATAR_DEFAULT_SIZE, AVATAR_SIZES, render_avatar_variants, variant_relpath
+)
+
+AVATAR_UPLOAD_DIR = os.getenv("AVATAR_UPLOAD_DIR", "uploads/avatars")
+AVATAR_URL_PREFIX = "/uploads/avatars"
+AVATAR_MAX_BYTES = int(os.getenv("AVATAR_MAX_BYTES", 5 * 1024 * 1024))
+
+# Form field carrying the image
+AVATAR_FIELD = "file"
+
+# Allowance for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+# Bytes needed to recognise every supported format
+SNIFF_BYTES = 12
+
+# Data is handed to the writer thread in blocks of at least this size:
+# fewer thread hops per upload, at the cost of this much memory per upload
+AVATAR_WRITE_BUFFER_BYTES = int(os.getenv("AVATAR_WRITE_BUFFER_BYTES", 64 * 1024))
+
+# Worker processes for decoding and thumbnailing (defaults to CPU count)
+AVATAR_PROCESS_WORKERS = int(os.getenv("AVATAR_PROCESS_WORKERS", 0)) or None
+
+_avatar_pool: ProcessPoolExecutor | None = None
+
+
+@dataclass
+class ReceivedUpload:
+    """An upload that was fully written to a temp file"""
+    temp_path: str
+    size: int
+    sha256: str
+    content_type: str
+    extension: str
+
+
+def sniff_image_type(head: bytes) -> tuple[str, str] | None:
+    """
+    Detect the image format from its leading bytes.
+
+    Returns:
+        tuple[str, str] | None: (content type, file extension), or None if not a supported image
+    """
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg", "jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png", "png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif", "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    return None
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File size must be less than {AVATAR_MAX_BYTES // (1024 * 1024)}MB"
+    )
+
+
+def _unsupported_type() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Only JPEG, PNG, GIF, and WebP images are allowed"
+    )
+
+
+class _AvatarPartCollector:
+    """
+    Multipart parser callbacks that collect the avatar field's data.
+
+    Parser callbacks are synchronous, so data is only queued here; the
+    async caller drains `pending` after every chunk it feeds in.
+    """
+
+    def __init__(self):
+        self.pending: list[bytes] = []
+        self.found = False
+        self._in_avatar = False
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._headers: dict[bytes, bytes] = {}
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": lambda data, start, end: self._header_field.extend(data[start:end]),
+            "on_header_value": lambda data, start, end: self._header_value.extend(data[start:end]),
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        }
+
+    def _on_part_begin(self):
+        self._headers = {}
+        self._in_avatar = False
+
+    def _on_header_end(self):
+        self._headers[bytes(self._header_field).lower()] = bytes(self._header_value)
+        self._header_field.clear()
+        self._header_value.clear()
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        # Only the first part named AVATAR_FIELD is used
+        self._in_avatar = options.get(b"name") == AVATAR_FIELD.encode() and not self.found
+        self.found = self.found or self._in_avatar
+
+    def _on_part_data(self, data, start, end):
+        if self._in_avatar:
+            self.pending.append(bytes(data[start:end]))
+
+    def _on_part_end(self):
+        self._in_avatar = False
+
+
+async def receive_avatar_upload(request: Request, upload_dir: str = AVATAR_UPLOAD_DIR) -> ReceivedUpload:
+    """
+    Stream the avatar from a multipart/form-data request into a temp file.
+
+    Args:
+        request: Incoming request (body not read yet)
+        upload_dir: Directory the temp file is created in (same filesystem
+                    as the final location, so the rename is atomic)
+
+    Returns:
+        ReceivedUpload: Temp file path, size, SHA-256 and sniffed type.
+                        The caller must move or delete the temp file.
+
+    Raises:
+        HTTPException: 413 if too large, 400 if not a multipart upload with a
+                       supported image in the "file" field
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > AVATAR_MAX_BYTES + MULTIPART_OVERHEAD_BYTES:
+        raise _too_large()
+
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Avatar must be sent as multipart/form-data"
+        )
+
+    collector = _AvatarPartCollector()
+    parser = MultipartParser(boundary, collector.callbacks())
+
+    await asyncio.to_thread(os.makedirs, upload_dir, exist_ok=True)
+    fd, temp_path = await asyncio.to_thread(tempfile.mkstemp, dir=upload_dir, suffix=".part")
+    handle = os.fdopen(fd, "wb")
+    digest = hashlib.sha256()
+    received = 0  # whole request body, including other form fields
+    size = 0  # avatar bytes only
+    head = b""
+    sniffed = None
+    buffered: list[bytes] = []
+    buffered_bytes = 0
+
+    def write(data: bytes) -> None:
+        # hashlib releases the GIL for large buffers, so both run off-loop
+        digest.update(data)
+        handle.write(data)
+
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > AVATAR_MAX_BYTES + MULTIPART_OVERHEAD_BYTES:
+                raise _too_large()
+            parser.write(chunk)
+            if not collector.pending:
+                continue
+            data = b"".join(collector.pending)
+            collector.pending.clear()
+
+            size += len(data)
+            if size > AVATAR_MAX_BYTES:
+                raise _too_large()
+
+            if sniffed is None:
+                # Hold back data until enough bytes arrived to recognise the format
+                head += data
+                if len(head) < SNIFF_BYTES:
+                    continue
+                sniffed = sniff_image_type(head)
+                if sniffed is None:
+                    raise _unsupported_type()
+                data, head = head, b""
+
+            buffered.append(data)
+            buffered_bytes += len(data)
+            if buffered_bytes >= AVATAR_WRITE_BUFFER_BYTES:
+                await asyncio.to_thread(write, b"".join(buffered))
+                buffered.clear()
+                buffered_bytes = 0
+
+        parser.finalize()
+        if not collector.found:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Missing '{AVATAR_FIELD}' field"
+            )
+        if sniffed is None:
+            # File shorter than SNIFF_BYTES
+            sniffed = sniff_image_type(head)
+            if sniffed is None:
+                raise _unsupported_type()
+            buffered.append(head)
+        if buffered:
+            await asyncio.to_thread(write, b"".join(buffered))
+        await asyncio.to_thread(handle.close)
+    except BaseException:
+        await asyncio.to_thread(_discard, handle, temp_path)
+        raise
+
+    content_type, extension = sniffed
+    return ReceivedUpload(temp_path, size, digest.hexdigest(), content_type, extension)
+
+
+def _discard_path(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _discard(handle, path: str) -> None:
+    """Close and remove a partially written temp file"""
+    handle.close()
+    _discard_path(path)
+
+
+def get_avatar_pool() -> ProcessPoolExecutor:
+    """
+    Process pool for image decoding/encoding (created on first use).
+
+    Render processes are started by a forkserver (spawn where unavailable),
+    not forked from the API worker: that process already runs threads
+    (to_thread pool, log writer) and holds DB sockets and event loop state.
+    """
+    global _avatar_pool
+    if _avatar_pool is None:
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _avatar_pool = ProcessPoolExecutor(
+            max_workers=AVATAR_PROCESS_WORKERS, mp_context=multiprocessing.get_context(start_method)
+        )
+    return _avatar_pool
+
+
+def shutdown_avatar_pool() -> None:
+    """Stop the image processing pool (called on application shutdown)"""
+    global _avatar_pool
+    if _avatar_pool is not None:
+        _avatar_pool.shutdown(wait=True, cancel_futures=True)
+        _avatar_pool = None
+
+
+def _reuse_variants(upload_dir: str, digest: str) -> bool:
+    """
+    Check whether all variants of an image already exist.
+
+    Existing files are touched so the orphan collector's grace period
+    (src.services.avatar_gc) protects them until the new avatar_url is committed.
+    """
+    try:
+        for size in AVATAR_SIZES:
+            os.utime(os.path.join(upload_dir, variant_relpath(digest, size)))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+async def process_avatar(upload: ReceivedUpload, upload_dir: str = AVATAR_UPLOAD_DIR) -> str:
+    """
+    Render an upload into content-addressed WebP variants and delete the upload.
+
+    If the same image was uploaded before, its variants are reused and
+    nothing is decoded.
+
+    Returns:
+        str: Public URL of the AVATAR_DEFAULT_SIZE variant (stored as avatar_url)
+
+    Raises:
+        HTTPException: 400 if the image cannot be decoded
+    """
+    try:
+        if not await asyncio.to_thread(_reuse_variants, upload_dir, upload.sha256):
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                get_avatar_pool(), render_avatar_variants, upload.temp_path, upload_dir, upload.sha256
+            )
+    except (ValueError, OSError):  # includes PIL.UnidentifiedImageError
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not process image: the file is corrupt or too large to decode"
+        )
+    finally:
+        await asyncio.to_thread(_discard_path, upload.temp_path)
+
+    return f"{AVATAR_URL_PREFIX}/{variant_relpath(upload.sha256, AVATAR_DEFAULT_SIZE)}"
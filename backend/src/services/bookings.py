@@ -0,0 +1,397 @@
+"""
+Booking Service
+Seat reservation and release as single conditional statements.
+
+Reserving seats never reads the ride first and never takes SELECT ... FOR UPDATE:
+the UPDATE on rides only matches while enough seats are left, and the booking
+insert rides along in the same statement. Concurrent bookings for the same ride
+serialize on the row lock held by that UPDATE for the duration of one statement,
+and Postgres re-checks the WHERE clause against the latest row version, so seats
+can never be oversold.
+
+Statements that touch both a ride and its bookings lock the ride row first
+(reservation, cancellation, hold release, batch decisions, waitlist
+promotion), so they queue behind each other instead of deadlocking.
+
+Whenever seats are handed back (cancellation, lapsed hold, driver rejection)
+the ride's waitlist is promoted in the same transaction, see
+src.services.waitlist. Every seat change is announced to live subscribers
+(src.services.seat_updates) once the transaction commits.
+"""
+import os
+import uuid
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.services.seat_updates import publish_seat_changes
+from src.services.waitlist import promote_waitlist
+
+# How long a pending booking holds its seats before the driver must confirm
+SEAT_HOLD_TTL_SECONDS = int(os.getenv("SEAT_HOLD_TTL_SECONDS", 900))
+
+# Reserve seats and create the booking in one round trip.
+# The ride flips to "full" when the last seat is taken.
+RESERVE_SEATS_SQL = text("""
+    WITH reserved AS (
+        UPDATE rides
+        SET updated_at = now(),
+            seats_available = seats_available - :seats,
+            status = CASE WHEN seats_available - :seats = 0 THEN 'full' ELSE status END
+        WHERE id = :ride_id
+          AND status = 'open'
+          AND seats_available >= :seats
+          AND driver_id <> :passenger_id
+        RETURNING id, departure_time, seats_available, status
+    ), booked AS (
+        INSERT INTO bookings (
+            id, ride_id, ride_departure_time, passenger_id, seats_reserved, status, hold_expires_at
+        )
+        SELECT CAST(:booking_id AS uuid), id, departure_time,
+               CAST(:passenger_id AS uuid), CAST(:seats AS integer), 'pending',
+               now() + make_interval(secs => :hold_seconds)
+        FROM reserved
+        RETURNING id, ride_id, passenger_id, seats_reserved, amount_paid, status, booked_at, hold_expires_at
+    )
+    SELECT booked.*, reserved.seats_available AS ride_seats_available, reserved.status AS ride_status
+    FROM booked CROSS JOIN reserved
+""")
+
+# Cancel an active booking and hand its seats back to the ride (if the ride is still bookable).
+# The ride row is locked before the booking, like every other ride + booking statement.
+CANCEL_BOOKING_SQL = text("""
+    WITH ride AS (
+        SELECT id FROM rides
+        WHERE id = (SELECT ride_id FROM bookings WHERE id = :booking_id AND passenger_id = :passenger_id)
+        FOR UPDATE
+    ), cancelled AS (
+        UPDATE bookings
+        SET status = 'cancelled'
+        FROM ride
+        WHERE bookings.id = :booking_id
+          AND bookings.ride_id = ride.id
+          AND bookings.passenger_id = :passenger_id
+          AND bookings.status IN ('pending', 'confirmed')
+        RETURNING bookings.id, bookings.ride_id, bookings.passenger_id, bookings.seats_reserved,
+                  bookings.amount_paid, bookings.status, bookings.booked_at, bookings.hold_expires_at
+    ), released AS (
+        UPDATE rides
+        SET updated_at = now(),
+            seats_available = rides.seats_available + cancelled.seats_reserved,
+            status = CASE WHEN rides.status = 'full' THEN 'open' ELSE rides.status END
+        FROM cancelled
+        WHERE rides.id = cancelled.ride_id
+          AND rides.status IN ('open', 'full')
+        RETURNING rides.id, rides.seats_available, rides.status
+    )
+    SELECT cancelled.*, released.seats_available AS ride_seats_available, released.status AS ride_status
+    FROM cancelled LEFT JOIN released ON released.id = cancelled.ride_id
+""")
+
+# Driver confirms a pending booking while its hold is still valid
+CONFIRM_BOOKING_SQL = text("""
+    UPDATE bookings
+    SET status = 'confirmed', hold_expires_at = NULL
+    FROM rides
+    WHERE bookings.id = :booking_id
+      AND bookings.status = 'pending'
+      AND bookings.hold_expires_at > now()
+      AND rides.id = bookings.ride_id
+      AND rides.driver_id = :driver_id
+    RETURNING bookings.id, bookings.ride_id, bookings.passenger_id, bookings.seats_reserved,
+              bookings.amount_paid, bookings.status, bookings.booked_at, bookings.hold_expires_at
+""")
+
+# Cancel a batch of lapsed holds and return their seats, one UPDATE per table.
+# Rides are locked before their bookings; SKIP LOCKED lets several workers
+# sweep at once without waiting on each other or on a ride being cancelled
+# or batch-decided (its holds are picked up again on the sweeper's next resync). The
+# status = 'pending' guard makes every hold release exactly once.
+RELEASE_EXPIRED_HOLDS_SQL = text("""
+    WITH candidates AS (
+        SELECT id, booked_at, ride_id
+        FROM bookings
+        WHERE id = ANY(CAST(:booking_ids AS uuid[]))
+          AND status = 'pending'
+          AND hold_expires_at <= now()
+    ), locked_rides AS (
+        SELECT id FROM rides
+        WHERE id IN (SELECT ride_id FROM candidates)
+        ORDER BY id
+        FOR UPDATE SKIP LOCKED
+    ), due AS (
+        SELECT bookings.id, bookings.booked_at
+        FROM bookings
+        JOIN candidates ON candidates.id = bookings.id AND candidates.booked_at = bookings.booked_at
+        JOIN locked_rides ON locked_rides.id = candidates.ride_id
+        WHERE bookings.status = 'pending'
+          AND bookings.hold_expires_at <= now()
+        FOR UPDATE OF bookings SKIP LOCKED
+    ), expired AS (
+        UPDATE bookings
+        SET status = 'cancelled'
+        FROM due
+        WHERE bookings.id = due.id AND bookings.booked_at = due.booked_at
+        RETURNING bookings.ride_id, bookings.seats_reserved
+    ), per_ride AS (
+        SELECT ride_id, sum(seats_reserved) AS seats
+        FROM expired
+        GROUP BY ride_id
+    )
+    UPDATE rides
+    SET updated_at = now(),
+        seats_available = rides.seats_available + per_ride.seats,
+        status = CASE WHEN rides.status = 'full' THEN 'open' ELSE rides.status END
+    FROM per_ride
+    WHERE rides.id = per_ride.ride_id
+      AND rides.status IN ('open', 'full')
+    RETURNING rides.id, rides.seats_available, rides.status
+""")
+
+
+async def reserve_seats(db: AsyncSession, ride_id, passenger_id, seats: int):
+    """
+    Atomically reserve seats on a ride and create a pending booking.
+    The seats are held for SEAT_HOLD_TTL_SECONDS unless the driver confirms.
+
+    Args:
+        db: Database session (caller commits)
+        ride_id: Ride to book
+        passenger_id: User making the booking
+        seats: Number of seats to reserve
+
+    Returns:
+        Row: The new booking plus ride_seats_available / ride_status
+
+    Raises:
+        HTTPException: If the ride does not exist, is not open, belongs to
+                       the passenger, or has too few seats left
+    """
+    result = await db.execute(RESERVE_SEATS_SQL, {
+        "booking_id": uuid.uuid4(),
+        "ride_id": ride_id,
+        "passenger_id": passenger_id,
+        "seats": seats,
+        "hold_seconds": float(SEAT_HOLD_TTL_SECONDS),
+    })
+    booking = result.one_or_none()
+    if booking is not None:
+        await publish_seat_changes(db, [ride_id])
+        return booking
+
+    # Cold path: explain why the conditional update matched nothing
+    result = await db.execute(
+        text("SELECT driver_id, status, seats_available FROM rides WHERE id = :ride_id"),
+        {"ride_id": ride_id}
+    )
+    ride = result.one_or_none()
+    if ride is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ride not found"
+        )
+    if ride.driver_id == passenger_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You cannot book your own ride"
+        )
+    if ride.status != "open":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Ride is not open for booking (status: {ride.status})"
+        )
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Not enough seats available (remaining: {ride.seats_available})"
+    )
+
+
+async def cancel_booking(db: AsyncSession, booking_id, passenger_id) -> tuple:
+    """
+    Cancel a pending/confirmed booking and return its seats to the ride.
+    Freed seats go to the ride's waitlist (oldest entries first).
+
+    Args:
+        db: Database session (caller commits)
+        booking_id: Booking to cancel
+        passenger_id: Must be the booking's passenger
+
+    Returns:
+        tuple: (booking, promoted) - the cancelled booking plus the ride's seat
+               count before promotion (None if no active booking matched), and
+               the pending bookings created from the waitlist
+    """
+    result = await db.execute(CANCEL_BOOKING_SQL, {
+        "booking_id": booking_id,
+        "passenger_id": passenger_id,
+    })
+    booking = result.one_or_none()
+    if booking is None or not booking.ride_seats_available:
+        return booking, []
+    promoted = await promote_waitlist(
+        db, booking.ride_id, booking.ride_seats_available, SEAT_HOLD_TTL_SECONDS
+    )
+    await publish_seat_changes(db, [booking.ride_id])
+    return booking, promoted
+
+
+async def confirm_booking(db: AsyncSession, booking_id, driver_id):
+    """
+    Confirm a pending booking (driver only) and clear its hold expiry.
+
+    Args:
+        db: Database session (caller commits)
+        booking_id: Booking to confirm
+        driver_id: Must be the driver of the booked ride
+
+    Returns:
+        Row | None: The confirmed booking, or None if it is not a pending
+                    booking on one of the driver's rides with a live hold
+    """
+    result = await db.execute(CONFIRM_BOOKING_SQL, {
+        "booking_id": booking_id,
+        "driver_id": driver_id,
+    })
+    return result.one_or_none()
+
+
+async def release_expired_holds(db: AsyncSession, booking_ids: list) -> tuple[list, list]:
+    """
+    Cancel the given bookings if their holds have lapsed and return their seats.
+    Freed seats go to each ride's waitlist (one statement per ride that got seats back).
+
+    Only rows still pending with hold_expires_at in the past are touched, so
+    passing ids that were confirmed, cancelled, or already swept is harmless.
+
+    Args:
+        db: Database session (caller commits)
+        booking_ids: Candidate booking ids (one batch)
+
+    Returns:
+        tuple: (rides, promoted) - (id, seats_available, status) for every ride
+               that got seats back, and the pending bookings created from waitlists
+    """
+    result = await db.execute(RELEASE_EXPIRED_HOLDS_SQL, {"booking_ids": list(booking_ids)})
+    rides = result.all()
+    promoted = []
+    for ride in rides:
+        promoted.extend(await promote_waitlist(db, ride.id, ride.seats_available, SEAT_HOLD_TTL_SECONDS))
+    await publish_seat_changes(db, [ride.id for ride in rides])
+    return rides, promoted
+
+
+# Lock the driver's ride, then confirm/reject the listed pending bookings
+# with one set-based UPDATE each (ride before bookings, as everywhere else). Always yields at least one row if the
+# ride belongs to the driver (booking_id is NULL when nothing matched).
+BATCH_DECIDE_SQL = text("""
+    WITH ride AS (
+        SELECT id FROM rides
+        WHERE id = :ride_id AND driver_id = :driver_id
+        FOR UPDATE
+    ), confirmed AS (
+        UPDATE bookings
+        SET status = 'confirmed', hold_expires_at = NULL
+        FROM ride
+        WHERE bookings.ride_id = ride.id
+          AND bookings.id = ANY(CAST(:confirm_ids AS uuid[]))
+          AND bookings.status = 'pending'
+          AND bookings.hold_expires_at > now()
+        RETURNING bookings.id, bookings.status
+    ), rejected AS (
+        UPDATE bookings
+        SET status = 'cancelled'
+        FROM ride
+        WHERE bookings.ride_id = ride.id
+          AND bookings.id = ANY(CAST(:reject_ids AS uuid[]))
+          AND bookings.status = 'pending'
+        RETURNING bookings.id, bookings.status
+    )
+    SELECT ride.id AS ride_id, decided.id AS booking_id, decided.status
+    FROM ride
+    LEFT JOIN (SELECT * FROM confirmed UNION ALL SELECT * FROM rejected) decided ON true
+""")
+
+# Recompute the ride's free seats from its active bookings in one UPDATE.
+# check_seats_range rejects the whole transaction if the result is out of range.
+RECOUNT_SEATS_SQL = text("""
+    UPDATE rides
+    SET updated_at = now(),
+        seats_available = rides.seats_total - held.seats,
+        status = CASE
+            WHEN rides.status NOT IN ('open', 'full') THEN rides.status
+            WHEN rides.seats_total - held.seats = 0 THEN 'full'
+            ELSE 'open'
+        END
+    FROM (
+        SELECT coalesce(sum(seats_reserved), 0) AS seats
+        FROM bookings
+        WHERE ride_id = :ride_id AND status IN ('pending', 'confirmed')
+    ) held
+    WHERE rides.id = :ride_id
+    RETURNING rides.seats_available, rides.status
+""")
+
+
+async def batch_decide_bookings(db: AsyncSession, ride_id, driver_id, confirm_ids: list, reject_ids: list) -> dict:
+    """
+    Confirm and reject many pending bookings of one ride in a single transaction.
+
+    Two statements: a set-based UPDATE per decision (with the ride row locked so
+    concurrent reservations wait), then one seat recount on the ride.
+
+    Args:
+        db: Database session (caller commits; an IntegrityError from
+            check_seats_range means the caller must roll back)
+        ride_id: Ride the bookings belong to
+        driver_id: Must be the ride's driver
+        confirm_ids: Pending bookings to confirm
+        reject_ids: Pending bookings to reject (their seats are released)
+
+    Returns:
+        dict: confirmed/rejected/skipped booking ids, the ride's new seat state
+              and bookings promoted from the waitlist into the rejected seats
+
+    Raises:
+        HTTPException: If the ride does not exist or is not the driver's
+    """
+    result = await db.execute(BATCH_DECIDE_SQL, {
+        "ride_id": ride_id,
+        "driver_id": driver_id,
+        "confirm_ids": list(confirm_ids),
+        "reject_ids": list(reject_ids),
+    })
+    rows = result.all()
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ride not found"
+        )
+
+    decided = {row.booking_id: row.status for row in rows if row.booking_id is not None}
+    confirmed = [booking_id for booking_id, state in decided.items() if state == "confirmed"]
+    rejected = [booking_id for booking_id, state in decided.items() if state == "cancelled"]
+    skipped = [booking_id for booking_id in [*confirm_ids, *reject_ids] if booking_id not in decided]
+
+    result = await db.execute(RECOUNT_SEATS_SQL, {"ride_id": ride_id})
+    ride = result.one()
+    seats_available, ride_status = ride.seats_available, ride.status
+
+    promoted = []
+    if rejected and ride_status in ("open", "full"):
+        promoted = await promote_waitlist(db, ride_id, seats_available, SEAT_HOLD_TTL_SECONDS)
+        if promoted:
+            seats_available -= sum(booking.seats_reserved for booking in promoted)
+            ride_status = "full" if seats_available == 0 else "open"
+    if rejected:
+        await publish_seat_changes(db, [ride_id])
+
+    return {
+        "ride_id": ride_id,
+        "confirmed": confirmed,
+        "rejected": rejected,
+        "skipped": skipped,
+        "promoted": promoted,
+        "ride_seats_available": seats_available,
+        "ride_status": ride_status,
+    }
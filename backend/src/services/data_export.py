@@ -0,0 +1,309 @@
+"""
+Data Export Service
+Builds GDPR data export archives: a user's profile, rides, bookings,
+waitlist entries and reviews as one ZIP file on disk.
+
+Each section is read with a server-side cursor (EXPORT_FETCH_SIZE rows per
+round trip) and written straight into its ZIP entry, so memory stays flat no
+matter how many rows a user has. Every section uses its own short-lived
+connection, which goes back to the pool as soon as that section is written.
+
+Exports run as "data_export" jobs on the job queue (src/services/jobs.py).
+Archives are written to "<id>.zip.part" and renamed when complete, then kept
+for EXPORT_TTL_HOURS; the periodic "data_export.purge" job deletes them.
+"""
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import uuid
+import zipfile
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import TextClause
+
+from src.config import db as db_config
+from src.services.jobs import enqueue, job_handler
+
+logger = logging.getLogger(__name__)
+
+# Where finished archives are stored
+EXPORT_DIR = os.getenv("EXPORT_DIR", "exports")
+
+# How long a finished archive stays downloadable
+EXPORT_TTL_HOURS = int(os.getenv("EXPORT_TTL_HOURS", 72))
+
+# Rows per server-side cursor fetch (and per ZIP write)
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", 2000))
+
+# Exports built at the same time by one worker
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", 2))
+
+# A running export older than this is assumed lost (e.g. worker restarted)
+EXPORT_STALE_MINUTES = int(os.getenv("EXPORT_STALE_MINUTES", 60))
+
+_export_slots = asyncio.Semaphore(EXPORT_CONCURRENCY)
+
+
+@dataclass(frozen=True)
+class ExportSection:
+    """One file inside the export archive"""
+    filename: str
+    format: str  # "json" (single object), "csv" or "ndjson"
+    query: TextClause
+
+
+EXPORT_SECTIONS = (
+    ExportSection("profile.json", "json", text("""
+        SELECT id, full_name, email, role, verification_status, verification_method,
+               rating_avg, rating_count, status, avatar_url,
+               vehicle_make, vehicle_model, vehicle_year, vehicle_color, vehicle_license_plate,
+               created_at
+        FROM users
+        WHERE id = :user_id
+    """)),
+    ExportSection("rides.csv", "csv", text("""
+        SELECT id, origin_label, destination_label,
+               ST_Y(origin_geom::geometry) AS origin_lat, ST_X(origin_geom::geometry) AS origin_lng,
+               ST_Y(destination_geom::geometry) AS destination_lat,
+               ST_X(destination_geom::geometry) AS destination_lng,
+               departure_time, seats_total, seats_available, price_share, status,
+               vehicle_make, vehicle_model, vehicle_color, vehicle_year, created_at
+        FROM rides
+        WHERE driver_id = :user_id
+        ORDER BY departure_time
+    """)),
+    ExportSection("bookings.csv", "csv", text("""
+        SELECT b.id, b.ride_id, r.origin_label, r.destination_label, b.ride_departure_time,
+               b.seats_reserved, b.amount_paid, b.status, b.booked_at
+        FROM bookings b
+        JOIN rides r ON r.id = b.ride_id AND r.departure_time = b.ride_departure_time
+        WHERE b.passenger_id = :user_id
+        ORDER BY b.booked_at
+    """)),
+    ExportSection("waitlist.csv", "csv", text("""
+        SELECT ride_id, ride_departure_time, seats_requested, created_at
+        FROM ride_waitlist
+        WHERE passenger_id = :user_id
+        ORDER BY id
+    """)),
+    ExportSection("reviews_written.ndjson", "ndjson", text("""
+        SELECT id, ride_id, reviewee_id, rating, comment, created_at
+        FROM reviews
+        WHERE reviewer_id = :user_id
+        ORDER BY created_at
+    """)),
+    ExportSection("reviews_received.ndjson", "ndjson", text("""
+        SELECT id, ride_id, reviewer_id, rating, comment, created_at
+        FROM reviews
+        WHERE reviewee_id = :user_id
+        ORDER BY created_at
+    """)),
+)
+
+# At most one queued/running export per user (idx_data_exports_one_active)
+REQUEST_EXPORT_SQL = text("""
+    WITH inserted AS (
+        INSERT INTO data_exports (user_id)
+        VALUES (:user_id)
+        ON CONFLICT (user_id) WHERE status IN ('queued', 'running') DO NOTHING
+        RETURNING id, status
+    )
+    SELECT id, status, true AS created FROM inserted
+    UNION ALL
+    SELECT id, status, false FROM data_exports
+    WHERE user_id = :user_id AND status IN ('queued', 'running')
+    LIMIT 1
+""")
+
+
+def _plain(value):
+    """Convert a column value to something CSV/JSON can hold"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def _encode_rows(section: ExportSection, keys: list[str], rows) -> bytes:
+    """Encode one batch of rows in the section's format"""
+    if section.format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([_plain(value) for value in row] for row in rows)
+        return buffer.getvalue().encode()
+    objects = [dict(zip(keys, map(_plain, row))) for row in rows]
+    if section.format == "json":
+        return json.dumps(objects[0] if objects else {}, indent=2, ensure_ascii=False).encode()
+    return "".join(json.dumps(obj, ensure_ascii=False) + "\n" for obj in objects).encode()
+
+
+async def _write_section(archive: zipfile.ZipFile, section: ExportSection, user_id) -> int:
+    """
+    Stream one section from a server-side cursor into its ZIP entry.
+
+    Returns:
+        int: Number of rows written
+    """
+    written = 0
+    entry = await asyncio.to_thread(archive.open, section.filename, "w", force_zip64=True)
+    try:
+        async with db_config.async_engine.connect() as conn:
+            result = await conn.stream(
+                section.query.execution_options(yield_per=EXPORT_FETCH_SIZE), {"user_id": user_id}
+            )
+            keys = list(result.keys())
+            if section.format == "csv":
+                await asyncio.to_thread(entry.write, _encode_rows(section, keys, [keys]))
+            async for rows in result.partitions():
+                await asyncio.to_thread(entry.write, _encode_rows(section, keys, rows))
+                written += len(rows)
+    finally:
+        await asyncio.to_thread(entry.close)
+    return written
+
+
+async def build_export_archive(user_id, path: str) -> int:
+    """
+    Write the full export of one user to a ZIP file.
+
+    Args:
+        user_id: Whose data to export
+        path: Final archive path (written via "<path>.part")
+
+    Returns:
+        int: Archive size in bytes
+    """
+    part_path = f"{path}.part"
+    archive = await asyncio.to_thread(zipfile.ZipFile, part_path, "w", zipfile.ZIP_DEFLATED)
+    try:
+        for section in EXPORT_SECTIONS:
+            rows = await _write_section(archive, section, user_id)
+            logger.debug(f"Export {path}: {section.filename} ({rows} rows)")
+    except BaseException:
+        await asyncio.to_thread(archive.close)
+        await asyncio.to_thread(_discard, part_path)
+        raise
+    await asyncio.to_thread(archive.close)
+    await asyncio.to_thread(os.replace, part_path, path)
+    return os.path.getsize(path)
+
+
+def _discard(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+async def request_data_export(db: AsyncSession, user_id) -> tuple[uuid.UUID, bool]:
+    """
+    Queue an export for a user, or return the one already in progress.
+    The export row and its job are written in the caller's transaction.
+
+    Args:
+        db: Database session (caller commits)
+        user_id: Whose data to export
+
+    Returns:
+        tuple[UUID, bool]: (export id, whether a new export was queued)
+
+    Raises:
+        HTTPException 409: A concurrent request is queuing an export right now
+    """
+    # Let the user retry an export whose worker died mid-way
+    await db.execute(
+        text("""
+            UPDATE data_exports SET status = 'failed', error = 'Interrupted'
+            WHERE user_id = :user_id AND status IN ('queued', 'running')
+              AND created_at < now() - make_interval(mins => :stale)
+        """),
+        {"user_id": user_id, "stale": EXPORT_STALE_MINUTES}
+    )
+    row = (await db.execute(REQUEST_EXPORT_SQL, {"user_id": user_id})).one_or_none()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A data export is already being prepared"
+        )
+    if row.created:
+        await enqueue(db, "data_export", {"export_id": str(row.id)}, dedupe_key=f"data_export:{row.id}")
+    return row.id, row.created
+
+
+async def run_data_export(export_id) -> None:
+    """
+    Build a queued export. An export left "running" by a worker that died is
+    rebuilt from scratch when the job queue retries it; finished or failed
+    exports are left alone.
+    """
+    async with _export_slots:
+        async with db_config.get_async_session() as session:
+            result = await session.execute(
+                text("""
+                    UPDATE data_exports SET status = 'running'
+                    WHERE id = :id AND status IN ('queued', 'running')
+                    RETURNING user_id
+                """),
+                {"id": export_id}
+            )
+            user_id = result.scalar()
+        if user_id is None:
+            return
+
+        path = os.path.join(EXPORT_DIR, f"{export_id}.zip")
+        try:
+            await asyncio.to_thread(os.makedirs, EXPORT_DIR, exist_ok=True)
+            size = await build_export_archive(user_id, path)
+        except Exception as e:
+            logger.exception(f"Data export {export_id} failed")
+            async with db_config.get_async_session() as session:
+                await session.execute(
+                    text("UPDATE data_exports SET status = 'failed', error = :error WHERE id = :id"),
+                    {"id": export_id, "error": f"{type(e).__name__}: {e}"[:1000]}
+                )
+            return
+
+        async with db_config.get_async_session() as session:
+            await session.execute(
+                text("""
+                    UPDATE data_exports
+                    SET status = 'ready', file_path = :path, size_bytes = :size, completed_at = now(),
+                        expires_at = now() + make_interval(hours => :ttl)
+                    WHERE id = :id
+                """),
+                {"id": export_id, "path": path, "size": size, "ttl": EXPORT_TTL_HOURS}
+            )
+        logger.info(f"Data export {export_id} ready ({size / 1024:.0f} KB)")
+
+
+@job_handler("data_export")
+async def _data_export_job(payload: dict) -> None:
+    await run_data_export(uuid.UUID(payload["export_id"]))
+
+
+@job_handler("data_export.purge")
+async def purge_expired_exports(payload: dict | None = None) -> int:
+    """
+    Delete archives past their expiry along with their export records.
+
+    Returns:
+        int: Number of exports purged
+    """
+    async with db_config.get_async_session() as session:
+        result = await session.execute(text("""
+            DELETE FROM data_exports
+            WHERE expires_at <= now()
+            RETURNING file_path
+        """))
+        paths = [path for (path,) in result if path]
+    for path in paths:
+        await asyncio.to_thread(_discard, path)
+    return len(paths)
@@ -0,0 +1,66 @@
+"""
+Conditional GET Helpers
+ETags built from row versions (updated_at) instead of response bodies.
+
+Polling clients send the last ETag back in If-None-Match. Because the tag
+only depends on ids and updated_at values, a handler can compare it after a
+cheap version query and answer 304 before running the full query (with its
+selectin relationship loads) or serializing anything.
+
+Every write to users and rides bumps updated_at: ORM writes through the
+column's onupdate, raw SQL UPDATEs by setting it explicitly.
+"""
+import hashlib
+from datetime import datetime
+
+from fastapi import Request, Response, status
+
+# Bump when a response shape changes so clients holding old tags re-fetch
+ETAG_REPRESENTATION_VERSION = "1"
+
+# Browsers keep the response but revalidate it on every poll
+PUBLIC_CACHE_CONTROL = "no-cache"
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def version_etag(resource: str, *versions: tuple[object, datetime]) -> str:
+    """
+    Build a strong ETag from (id, updated_at) pairs.
+
+    Args:
+        resource: Name of the representation, e.g. "user-profile"
+        versions: (id, updated_at) for every row the response is built from
+
+    Returns:
+        str: Quoted ETag value
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(f"{resource}:{ETAG_REPRESENTATION_VERSION}".encode())
+    for row_id, updated_at in versions:
+        digest.update(f"|{row_id}@{updated_at.isoformat()}".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match covers `etag` (weak comparison, per RFC 9110)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == tag for candidate in header.split(","))
+
+
+def not_modified(etag: str, cache_control: str = PUBLIC_CACHE_CONTROL) -> Response:
+    """Empty 304 response carrying the current validator"""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
+
+
+def set_etag(response: Response, etag: str, cache_control: str = PUBLIC_CACHE_CONTROL) -> None:
+    """Attach the validator to a full (200) response"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
@@ -0,0 +1,194 @@
+"""
+Health Prober
+Background database prober behind the readiness and health endpoints.
+
+Probes used to open a full session and commit on every request; with
+several load balancers probing every worker that is constant pool churn.
+Instead each worker runs one prober:
+
+    - every HEALTH_PROBE_INTERVAL_SECONDS it checks out a pooled connection,
+      runs SELECT 1 (no session, no transaction commit) and times the round trip
+    - a sampler measures event-loop lag (how late a short sleep wakes up)
+    - /readyz and /health return the cached snapshot; /livez never touches it
+
+A worker is ready when its last probe succeeded, the snapshot is fresh
+(younger than HEALTH_MAX_STALENESS_SECONDS) and the event loop is not
+lagging beyond HEALTH_MAX_LOOP_LAG_SECONDS. Pool saturation is reported but
+does not fail readiness on its own: an exhausted pool makes the probe itself
+time out.
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+
+from sqlalchemy import text
+
+from src.config import db as db_config
+from src.services.metrics import record_health
+
+logger = logging.getLogger(__name__)
+
+HEALTH_PROBE_INTERVAL_SECONDS = float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", 5))
+
+# A probe that takes longer than this counts as a failure
+HEALTH_PROBE_TIMEOUT_SECONDS = float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", 2))
+
+# Snapshots older than this mean the prober itself is stuck
+HEALTH_MAX_STALENESS_SECONDS = float(
+    os.getenv("HEALTH_MAX_STALENESS_SECONDS", 3 * HEALTH_PROBE_INTERVAL_SECONDS)
+)
+
+# Event-loop lag above this fails readiness (the worker cannot serve in time)
+HEALTH_MAX_LOOP_LAG_SECONDS = float(os.getenv("HEALTH_MAX_LOOP_LAG_SECONDS", 1.0))
+
+# How often the loop-lag sampler wakes up
+LOOP_LAG_SAMPLE_SECONDS = 0.25
+
+PROBE_SQL = text("SELECT 1")
+
+
+@dataclass
+class HealthSnapshot:
+    """Result of the latest probe, as served by /readyz"""
+    ready: bool = False
+    reason: str | None = "starting"
+    checked_at: float | None = None  # epoch seconds
+    database: str = "unknown"  # connected, error, timeout
+    database_error: str | None = None
+    round_trip_ms: float | None = None
+    last_success_at: float | None = None
+    last_success_round_trip_ms: float | None = None
+    loop_lag_ms: float = 0.0  # worst lag since the previous probe
+    pool: dict = field(default_factory=dict)
+
+
+def pool_stats() -> dict:
+    """Checked-out connections against the pool's capacity (size + overflow)"""
+    engine = db_config.async_engine
+    if engine is None:
+        return {}
+    pool = engine.pool
+    capacity = db_config.DB_POOL_SIZE + db_config.DB_MAX_OVERFLOW
+    checked_out = pool.checkedout()
+    return {
+        "size": pool.size(),
+        "checked_out": checked_out,
+        "idle": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        "capacity": capacity,
+        "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+    }
+
+
+class HealthProber:
+    """Per-worker background prober with a cached snapshot"""
+
+    def __init__(self, interval: float = HEALTH_PROBE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.snapshot = HealthSnapshot()
+        self.draining = False
+        self._max_lag = 0.0
+        self._tasks: list[asyncio.Task] = []
+
+    async def probe(self) -> HealthSnapshot:
+        """Run one probe and replace the cached snapshot"""
+        previous = self.snapshot
+        snapshot = HealthSnapshot(
+            checked_at=time.time(),
+            last_success_at=previous.last_success_at,
+            last_success_round_trip_ms=previous.last_success_round_trip_ms,
+            loop_lag_ms=round(self._max_lag * 1000, 1),
+        )
+        self._max_lag = 0.0
+
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(HEALTH_PROBE_TIMEOUT_SECONDS):
+                async with db_config.async_engine.connect() as conn:
+                    await conn.execute(PROBE_SQL)
+            snapshot.round_trip_ms = round((time.perf_counter() - started) * 1000, 2)
+            snapshot.database = "connected"
+            snapshot.last_success_at = snapshot.checked_at
+            snapshot.last_success_round_trip_ms = snapshot.round_trip_ms
+        except TimeoutError:
+            snapshot.database = "timeout"
+            snapshot.database_error = f"no answer within {HEALTH_PROBE_TIMEOUT_SECONDS:g}s"
+        except Exception as e:
+            snapshot.database = "error"
+            snapshot.database_error = str(e)
+        snapshot.pool = pool_stats()
+        record_health(snapshot.pool, snapshot.last_success_round_trip_ms, snapshot.loop_lag_ms)
+
+        if snapshot.database != "connected":
+            snapshot.reason = f"database {snapshot.database}"
+        elif snapshot.loop_lag_ms > HEALTH_MAX_LOOP_LAG_SECONDS * 1000:
+            snapshot.reason = f"event loop lagging {snapshot.loop_lag_ms:.0f}ms"
+        else:
+            snapshot.reason = None
+        snapshot.ready = snapshot.reason is None
+
+        if snapshot.ready != previous.ready and previous.checked_at is not None:
+            if snapshot.ready:
+                logger.info("Worker is ready again")
+            else:
+                logger.warning(f"Worker not ready: {snapshot.reason}")
+        self.snapshot = snapshot
+        return snapshot
+
+    def readiness(self) -> tuple[bool, dict]:
+        """
+        Readiness from the cached snapshot (no I/O).
+
+        Returns:
+            tuple[bool, dict]: (ready, snapshot as a dict with a "status" key)
+        """
+        body = asdict(self.snapshot)
+        ready = self.snapshot.ready
+        if self.draining:
+            ready, body["reason"] = False, "shutting down"
+        elif self.snapshot.checked_at is None or time.time() - self.snapshot.checked_at > HEALTH_MAX_STALENESS_SECONDS:
+            ready, body["reason"] = False, body["reason"] or "stale probe"
+        body["ready"] = ready
+        body["status"] = "ready" if ready else "not ready"
+        return ready, body
+
+    async def _probe_loop(self) -> None:
+        while True:
+            try:
+                await self.probe()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Health probe error: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _sample_loop_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(LOOP_LAG_SAMPLE_SECONDS)
+            self._max_lag = max(self._max_lag, loop.time() - started - LOOP_LAG_SAMPLE_SECONDS)
+
+    def start(self) -> None:
+        """Start probing on the running event loop"""
+        if self._tasks:
+            return
+        self.draining = False
+        self._tasks = [
+            asyncio.create_task(self._probe_loop(), name="health-prober"),
+            asyncio.create_task(self._sample_loop_lag(), name="health-loop-lag"),
+        ]
+
+    async def stop(self) -> None:
+        """Report not ready from now on and stop probing"""
+        self.draining = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+# One prober per worker process
+health_prober = HealthProber()
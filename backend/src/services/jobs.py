@@ -0,0 +1,440 @@
+"""
+Job Queue
+Durable background jobs stored in the jobs table and run by asyncio workers.
+
+    - enqueue() inserts a job in the caller's transaction, so a job is only
+      visible once the work that produced it has committed
+    - workers claim batches with FOR UPDATE SKIP LOCKED: any number of
+      worker processes share the queue without blocking each other
+    - finished jobs are deleted (acknowledged) in batches; failed jobs are
+      retried with exponential backoff until max_attempts
+    - a running job is leased to its worker; the lease is extended while
+      the job runs and jobs on a crashed worker are re-queued once it lapses
+    - periodic jobs (PERIODIC_JOBS) are rescheduled instead of deleted
+
+Handlers are async functions taking the job payload, registered with
+@job_handler("kind") in the module that owns the work.
+
+Usage:
+    python -m src.services.jobs worker      # run a standalone worker
+    python -m src.services.jobs enqueue avatar_gc
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import random
+import socket
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import db as db_config
+from src.config.logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# Jobs run concurrently by one worker, and max jobs claimed per query
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", 20))
+JOB_CLAIM_BATCH_SIZE = int(os.getenv("JOB_CLAIM_BATCH_SIZE", 100))
+
+# Idle workers look for new jobs this often
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", 1.0))
+
+# A running job's lease; extended every third of it while the job runs
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 300))
+
+# Retry delay: base * 2^(attempt - 1), capped, +/- 20% jitter
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", 10))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", 3600))
+
+# How long shutdown waits for running jobs before handing them back to the queue
+JOB_SHUTDOWN_GRACE_SECONDS = float(os.getenv("JOB_SHUTDOWN_GRACE_SECONDS", 10))
+
+# Set to 0 to run the API without an in-process worker (e.g. dedicated worker processes)
+JOB_WORKER_ENABLED = os.getenv("JOB_WORKER_ENABLED", "1") == "1"
+
+# Modules that register handlers, imported when a worker starts
+JOB_HANDLER_MODULES = (
+    "src.services.data_export",
+    "src.services.account_deletion",
+    "src.services.avatar_gc",
+    "src.services.ratings",
+    "src.config.partitions",
+)
+
+# kind -> seconds between runs, for jobs that reschedule themselves
+PERIODIC_JOBS = {
+    "avatar_gc": float(os.getenv("AVATAR_GC_INTERVAL_SECONDS", 6 * 3600)),
+    "account_deletion.sweep": float(os.getenv("ACCOUNT_DELETION_INTERVAL_SECONDS", 3600)),
+    "data_export.purge": 3600.0,
+    "partitions.ensure": 24 * 3600.0,
+    "ratings.reconcile": float(os.getenv("RATING_RECONCILE_INTERVAL_SECONDS", 24 * 3600)),
+}
+
+_handlers: dict = {}
+
+ENQUEUE_SQL = text("""
+    INSERT INTO jobs (kind, payload, priority, run_at, max_attempts, dedupe_key)
+    VALUES (:kind, CAST(:payload AS jsonb), :priority,
+            COALESCE(CAST(:run_at AS timestamptz), now()) + make_interval(secs => :delay),
+            :max_attempts, :dedupe_key)
+    ON CONFLICT (dedupe_key) WHERE dedupe_key IS NOT NULL AND status IN ('queued', 'running') DO NOTHING
+    RETURNING id
+""")
+
+ENQUEUE_MANY_SQL = text("""
+    INSERT INTO jobs (kind, payload, priority)
+    SELECT :kind, payload, :priority
+    FROM unnest(CAST(:payloads AS jsonb[])) AS payload
+""")
+
+# Claim the head of the queue; rows locked by other workers are skipped, not waited on
+CLAIM_JOBS_SQL = text("""
+    WITH claimed AS (
+        SELECT id FROM jobs
+        WHERE status = 'queued' AND run_at <= now()
+        ORDER BY priority DESC, run_at, id
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE jobs
+    SET status = 'running', attempts = jobs.attempts + 1,
+        locked_until = now() + make_interval(secs => :lease)
+    FROM claimed
+    WHERE jobs.id = claimed.id
+    RETURNING jobs.id, jobs.kind, jobs.payload, jobs.attempts, jobs.max_attempts
+""")
+
+ACK_JOBS_SQL = text("DELETE FROM jobs WHERE id = ANY(CAST(:ids AS bigint[]))")
+
+# Periodic jobs start over with a fresh attempt budget at their next run
+RESCHEDULE_JOBS_SQL = text("""
+    UPDATE jobs
+    SET status = 'queued', attempts = 0, locked_until = NULL,
+        run_at = now() + make_interval(secs => next.delay)
+    FROM unnest(CAST(:ids AS bigint[]), CAST(:delays AS double precision[])) AS next(id, delay)
+    WHERE jobs.id = next.id
+""")
+
+FAIL_JOB_SQL = text("""
+    UPDATE jobs
+    SET status = CASE WHEN :retry THEN 'queued' ELSE 'failed' END,
+        run_at = now() + make_interval(secs => :delay),
+        locked_until = NULL, last_error = :error
+    WHERE id = :id
+""")
+
+# Hand unfinished jobs back on shutdown without using up an attempt
+RELEASE_JOBS_SQL = text("""
+    UPDATE jobs
+    SET status = 'queued', attempts = greatest(0, attempts - 1), locked_until = NULL
+    WHERE id = ANY(CAST(:ids AS bigint[])) AND status = 'running'
+""")
+
+EXTEND_LEASES_SQL = text("""
+    UPDATE jobs SET locked_until = now() + make_interval(secs => :lease)
+    WHERE id = ANY(CAST(:ids AS bigint[])) AND status = 'running'
+""")
+
+# Re-queue jobs whose worker stopped renewing the lease
+REQUEUE_LAPSED_SQL = text("""
+    UPDATE jobs
+    SET status = CASE WHEN attempts >= max_attempts AND kind <> ALL(CAST(:periodic AS text[]))
+                      THEN 'failed' ELSE 'queued' END,
+        locked_until = NULL, last_error = 'Lease expired (worker lost)'
+    WHERE status = 'running' AND locked_until < now()
+    RETURNING id
+""")
+
+
+@dataclass
+class ClaimedJob:
+    """A job claimed by this worker"""
+    id: int
+    kind: str
+    payload: dict
+    attempts: int
+    max_attempts: int
+
+
+def job_handler(kind: str):
+    """Register an async function as the handler for a job kind"""
+    def register(func):
+        _handlers[kind] = func
+        return func
+    return register
+
+
+def load_job_handlers() -> dict:
+    """Import every handler module and return the registry"""
+    for module in JOB_HANDLER_MODULES:
+        importlib.import_module(module)
+    return _handlers
+
+
+async def enqueue(
+    db: AsyncSession,
+    kind: str,
+    payload: dict | None = None,
+    *,
+    priority: int = 0,
+    run_at: datetime | None = None,
+    delay_seconds: float = 0,
+    max_attempts: int = 5,
+    dedupe_key: str | None = None,
+) -> int | None:
+    """
+    Add a job to the queue in the caller's transaction.
+
+    Args:
+        db: Database session (caller commits; the job is invisible until then)
+        kind: Registered handler name
+        payload: JSON-serializable handler arguments
+        priority: Higher priorities are claimed first
+        run_at / delay_seconds: Earliest run time (default now)
+        max_attempts: Attempts before the job is marked failed
+        dedupe_key: Skip the insert if a queued/running job has this key
+
+    Returns:
+        int | None: Job id, or None if deduplicated
+    """
+    result = await db.execute(ENQUEUE_SQL, {
+        "kind": kind,
+        "payload": json.dumps(payload or {}),
+        "priority": priority,
+        "run_at": run_at,
+        "delay": float(delay_seconds),
+        "max_attempts": max_attempts,
+        "dedupe_key": dedupe_key,
+    })
+    return result.scalar()
+
+
+async def enqueue_many(db: AsyncSession, kind: str, payloads: list[dict], priority: int = 0) -> int:
+    """Add many jobs of one kind with a single INSERT (caller commits)"""
+    if not payloads:
+        return 0
+    await db.execute(ENQUEUE_MANY_SQL, {
+        "kind": kind,
+        "priority": priority,
+        "payloads": [json.dumps(payload) for payload in payloads],
+    })
+    return len(payloads)
+
+
+async def ensure_periodic_jobs() -> None:
+    """Queue every periodic job that is not already queued or running"""
+    async with db_config.get_async_session() as session:
+        for kind in PERIODIC_JOBS:
+            await enqueue(session, kind, dedupe_key=kind, delay_seconds=60)
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff before the next attempt after `attempts` failed ones"""
+    delay = min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class JobWorker:
+    """
+    Claims jobs in batches and runs up to `concurrency` of them at a time.
+
+    Completions are buffered and acknowledged with one statement per loop
+    iteration, so a busy worker spends a handful of queries per batch
+    rather than several per job.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = JOB_WORKER_CONCURRENCY,
+        batch_size: int = JOB_CLAIM_BATCH_SIZE,
+        poll_interval: float = JOB_POLL_INTERVAL_SECONDS,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+    ):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._running: dict[asyncio.Task, ClaimedJob] = {}
+        self._done: list[ClaimedJob] = []
+        self._failed: list[tuple[ClaimedJob, str]] = []
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._next_lease_renewal = 0.0
+        self.processed = 0
+
+    async def claim(self, limit: int) -> list[ClaimedJob]:
+        async with db_config.get_async_session() as session:
+            result = await session.execute(CLAIM_JOBS_SQL, {"batch_size": limit, "lease": self.lease_seconds})
+            return [ClaimedJob(*row) for row in result]
+
+    async def _execute(self, job: ClaimedJob) -> None:
+        handler = _handlers.get(job.kind)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind {job.kind!r}")
+            await handler(job.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"Job {job.id} ({job.kind}) failed on attempt {job.attempts}")
+            self._failed.append((job, f"{type(e).__name__}: {e}"[:2000]))
+        else:
+            self._done.append(job)
+        finally:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        """Acknowledge finished jobs and record failures"""
+        done, self._done = self._done, []
+        failed, self._failed = self._failed, []
+        if not done and not failed:
+            return
+        periodic = [job for job in done if job.kind in PERIODIC_JOBS]
+        finished = [job.id for job in done if job.kind not in PERIODIC_JOBS]
+        try:
+            async with db_config.get_async_session() as session:
+                if finished:
+                    await session.execute(ACK_JOBS_SQL, {"ids": finished})
+                if periodic:
+                    await session.execute(RESCHEDULE_JOBS_SQL, {
+                        "ids": [job.id for job in periodic],
+                        "delays": [PERIODIC_JOBS[job.kind] for job in periodic],
+                    })
+                for job, error in failed:
+                    exhausted = job.attempts >= job.max_attempts
+                    await session.execute(FAIL_JOB_SQL, {
+                        "id": job.id,
+                        # Periodic jobs are never given up on, just retried at their next interval
+                        "retry": not exhausted or job.kind in PERIODIC_JOBS,
+                        "delay": PERIODIC_JOBS.get(job.kind, 0) if exhausted else retry_delay(job.attempts),
+                        "error": error,
+                    })
+        except BaseException:
+            # Keep them for the next flush; the leases still protect the rows
+            self._done[:0] = done
+            self._failed[:0] = failed
+            raise
+        self.processed += len(done)
+
+    async def _maintain_leases(self) -> None:
+        """Renew leases of running jobs and re-queue jobs abandoned by dead workers"""
+        now = time.monotonic()
+        if now < self._next_lease_renewal:
+            return
+        self._next_lease_renewal = now + self.lease_seconds / 3
+        async with db_config.get_async_session() as session:
+            if self._running:
+                await session.execute(EXTEND_LEASES_SQL, {
+                    "ids": [job.id for job in self._running.values()], "lease": self.lease_seconds,
+                })
+            requeued = (await session.execute(REQUEUE_LAPSED_SQL, {"periodic": list(PERIODIC_JOBS)})).all()
+        if requeued:
+            logger.warning(f"Re-queued {len(requeued)} job(s) with lapsed leases")
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.flush()
+                await self._maintain_leases()
+                free = self.concurrency - len(self._running)
+                jobs = await self.claim(min(free, self.batch_size)) if free > 0 else []
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker error: {e}")
+                jobs, free = [], 0
+                await asyncio.sleep(self.poll_interval)
+
+            for job in jobs:
+                task = asyncio.create_task(self._execute(job), name=f"job-{job.id}")
+                self._running[task] = job
+                task.add_done_callback(self._running.pop)
+
+            # Claim again right away while the queue keeps filling whole batches
+            if free > 0 and len(jobs) == min(free, self.batch_size):
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        """Start claiming jobs on the running event loop"""
+        if self._task is None:
+            load_job_handlers()
+            self._task = asyncio.create_task(self.run(), name="job-worker")
+
+    async def stop(self, grace_seconds: float = JOB_SHUTDOWN_GRACE_SECONDS) -> None:
+        """
+        Stop claiming, give running jobs `grace_seconds` to finish, then
+        cancel the rest and hand them back to the queue.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        if self._running:
+            await asyncio.wait(list(self._running), timeout=grace_seconds)
+        unfinished = list(self._running.items())
+        for task, _ in unfinished:
+            task.cancel()
+        if unfinished:
+            await asyncio.gather(*(task for task, _ in unfinished), return_exceptions=True)
+
+        await self.flush()
+        if unfinished:
+            async with db_config.get_async_session() as session:
+                await session.execute(RELEASE_JOBS_SQL, {"ids": [job.id for _, job in unfinished]})
+
+
+# One worker per API process (disable with JOB_WORKER_ENABLED=0)
+job_worker = JobWorker()
+
+
+async def _main(args) -> None:
+    await db_config.init_db()
+    try:
+        if args.command == "enqueue":
+            async with db_config.get_async_session() as session:
+                job_id = await enqueue(session, args.kind, json.loads(args.payload), priority=args.priority)
+            print(f"Enqueued job {job_id}" if job_id else "An identical job is already queued")
+            return
+        await ensure_periodic_jobs()
+        worker = JobWorker(concurrency=args.concurrency)
+        worker.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await worker.stop()
+    finally:
+        await db_config.close_db()
+
+
+if __name__ == "__main__":
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Background job queue")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    worker_parser = subparsers.add_parser("worker", help="Run a job worker until interrupted")
+    worker_parser.add_argument("--concurrency", type=int, default=JOB_WORKER_CONCURRENCY)
+    enqueue_parser = subparsers.add_parser("enqueue", help="Queue one job")
+    enqueue_parser.add_argument("kind")
+    enqueue_parser.add_argument("--payload", default="{}", help="JSON payload")
+    enqueue_parser.add_argument("--priority", type=int, default=0)
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
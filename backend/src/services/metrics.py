@@ -0,0 +1,162 @@
+"""
+Prometheus Metrics
+Metric definitions and the /metrics exposition for every worker process.
+
+    fareshare_http_request_duration_seconds{method,route}  histogram, route = path template
+    fareshare_http_responses_total{method,route,status}    counter
+    fareshare_http_requests_in_flight                      gauge
+    fareshare_db_pool_connections{state}                   gauge (checked_out, idle, overflow)
+    fareshare_db_pool_capacity                             gauge
+    fareshare_db_probe_round_trip_seconds                  gauge (last health probe)
+    fareshare_event_loop_lag_seconds                       gauge (worst lag between probes)
+    fareshare_password_hash_seconds{operation}             histogram (bcrypt hash / verify)
+    fareshare_cache_lookups_total{cache,result}            counter (hit / miss)
+
+Cache hit ratio = rate(..{result="hit"}) / rate(fareshare_cache_lookups_total).
+
+Multiple workers: set PROMETHEUS_MULTIPROC_DIR to an empty directory before
+the workers start. Every worker then writes its values to mmap-backed files
+there, and /metrics (served by any worker) merges all of them. The directory
+must be wiped on server start, and files of exited workers marked dead (see
+prometheus_client.multiprocess.mark_process_dead). Without it, each worker
+reports only its own values.
+
+Pool and loop-lag gauges are refreshed by the health prober every probe
+interval, so scrapes never touch the pool themselves.
+"""
+import asyncio
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+from prometheus_client import multiprocess
+
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+# Seconds; API handlers mostly finish in a few ms, searches and uploads take longer
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# bcrypt at the default cost takes a few hundred ms
+PASSWORD_HASH_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0)
+
+# Anything else is reported as OTHER to keep label values bounded
+KNOWN_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"}
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+REQUEST_DURATION = Histogram(
+    "fareshare_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=REQUEST_BUCKETS,
+)
+RESPONSES = Counter(
+    "fareshare_http_responses_total",
+    "HTTP responses by route template and status code",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "fareshare_http_requests_in_flight",
+    "HTTP requests currently being handled",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "fareshare_db_pool_connections",
+    "Database pool connections by state",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CAPACITY = Gauge(
+    "fareshare_db_pool_capacity",
+    "Database pool size plus max overflow",
+    multiprocess_mode="livesum",
+)
+DB_PROBE_ROUND_TRIP = Gauge(
+    "fareshare_db_probe_round_trip_seconds",
+    "SELECT 1 round trip of the last successful health probe",
+    multiprocess_mode="liveall",
+)
+EVENT_LOOP_LAG = Gauge(
+    "fareshare_event_loop_lag_seconds",
+    "Worst event-loop lag seen between health probes",
+    multiprocess_mode="liveall",
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "fareshare_password_hash_seconds",
+    "bcrypt password hashing and verification time",
+    ["operation"],
+    buckets=PASSWORD_HASH_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "fareshare_cache_lookups_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"],
+)
+
+# Label children resolved once: .labels() validates and locks on every call
+PASSWORD_HASH_TIMER = PASSWORD_HASH_DURATION.labels(operation="hash")
+PASSWORD_VERIFY_TIMER = PASSWORD_HASH_DURATION.labels(operation="verify")
+
+_request_children: dict[tuple[str, str], object] = {}
+_response_children: dict[tuple[str, str, int], object] = {}
+_cache_children: dict[tuple[str, bool], object] = {}
+
+
+def observe_request(method: str, route: str, status_code: int, seconds: float) -> None:
+    """Record one finished HTTP request"""
+    if method not in KNOWN_METHODS:
+        method = "OTHER"
+    key = (method, route)
+    histogram = _request_children.get(key)
+    if histogram is None:
+        histogram = _request_children[key] = REQUEST_DURATION.labels(method, route)
+    histogram.observe(seconds)
+
+    response_key = (method, route, status_code)
+    counter = _response_children.get(response_key)
+    if counter is None:
+        counter = _response_children[response_key] = RESPONSES.labels(method, route, str(status_code))
+    counter.inc()
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count one cache lookup (hit or miss)"""
+    key = (cache, hit)
+    counter = _cache_children.get(key)
+    if counter is None:
+        counter = _cache_children[key] = CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss")
+    counter.inc()
+
+
+def record_health(pool: dict, round_trip_ms: float | None, loop_lag_ms: float) -> None:
+    """Publish the health prober's latest pool, DB and loop-lag readings"""
+    if pool:
+        DB_POOL_CONNECTIONS.labels("checked_out").set(pool["checked_out"])
+        DB_POOL_CONNECTIONS.labels("idle").set(pool["idle"])
+        DB_POOL_CONNECTIONS.labels("overflow").set(pool["overflow"])
+        DB_POOL_CAPACITY.set(pool["capacity"])
+    if round_trip_ms is not None:
+        DB_PROBE_ROUND_TRIP.set(round_trip_ms / 1000)
+    EVENT_LOOP_LAG.set(loop_lag_ms / 1000)
+
+
+def _collect() -> bytes:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+async def render_metrics() -> tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text format.
+    In multiprocess mode this reads every worker's files, so it runs in a thread.
+
+    Returns:
+        tuple[bytes, str]: (body, content type)
+    """
+    if MULTIPROCESS:
+        return await asyncio.to_thread(_collect), CONTENT_TYPE_LATEST
+    return _collect(), CONTENT_TYPE_LATEST
@@ -0,0 +1,228 @@
+"""
+Ride Ranking Service
+Scores candidate rides in one vectorized NumPy pass instead of a per-row Python loop.
+
+The search route fetches candidate rides from PostGIS (already filtered by radius,
+seats and time window), loads them into column arrays with RideCandidates.from_rows,
+and calls rank_candidates to get the top-K best matches.
+"""
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Sequence
+
+import numpy as np
+
+# Mean Earth radius used by the haversine formula
+EARTH_RADIUS_KM = 6371.0088
+
+
+@dataclass(frozen=True)
+class RankingWeights:
+    """
+    Cost weights for the ride score (lower score = better match).
+
+    Each weight converts one feature into "cost points":
+        - pickup_km: per km between the passenger's origin and the ride's origin
+        - dropoff_km: per km between the passenger's destination and the ride's destination
+        - time_minutes: per minute the departure differs from the requested time
+        - price: per dollar of price_share
+        - rating: per star of the driver's rating_avg (subtracted, so good drivers rank higher)
+    """
+    pickup_km: float = 1.0
+    dropoff_km: float = 1.0
+    time_minutes: float = 0.1
+    price: float = 0.2
+    rating: float = 2.0
+
+    @classmethod
+    def from_env(cls) -> "RankingWeights":
+        """
+        Build weights from RIDE_RANK_WEIGHT_* environment variables.
+        Unset variables keep their defaults.
+        """
+        defaults = cls()
+        return cls(**{
+            name: float(os.getenv(f"RIDE_RANK_WEIGHT_{name.upper()}", getattr(defaults, name)))
+            for name in cls.__dataclass_fields__
+        })
+
+
+# Weights used by the search route unless a caller passes its own
+DEFAULT_WEIGHTS = RankingWeights.from_env()
+
+
+class RideCandidates:
+    """
+    Column-oriented view of candidate rides.
+
+    Every attribute is a 1-D array of the same length, so scoring
+    runs as a handful of NumPy operations over the whole batch.
+    """
+
+    # Order of the numeric columns expected by from_rows (after the ride id)
+    COLUMNS = (
+        "origin_lng", "origin_lat", "dest_lng", "dest_lat",
+        "departure_ts", "price_share", "rating_avg",
+    )
+
+    def __init__(
+        self,
+        ids: Sequence,
+        origin_lng: np.ndarray,
+        origin_lat: np.ndarray,
+        dest_lng: np.ndarray,
+        dest_lat: np.ndarray,
+        departure_ts: np.ndarray,
+        price_share: np.ndarray,
+        rating_avg: np.ndarray,
+    ):
+        self.ids = ids
+        self.origin_lng = origin_lng
+        self.origin_lat = origin_lat
+        self.dest_lng = dest_lng
+        self.dest_lat = dest_lat
+        self.departure_ts = departure_ts
+        self.price_share = price_share
+        self.rating_avg = rating_avg
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence]) -> "RideCandidates":
+        """
+        Build column arrays from query rows.
+
+        Args:
+            rows: Rows shaped (id, origin_lng, origin_lat, dest_lng, dest_lat,
+                  departure_time, price_share, rating_avg). departure_time may be
+                  a datetime or a POSIX timestamp.
+
+        Returns:
+            RideCandidates: Column arrays for the batch
+        """
+        if not rows:
+            return cls([], *(np.empty(0, dtype=np.float64) for _ in cls.COLUMNS))
+
+        # Transpose rows into columns once, then convert each column in bulk
+        ids, *columns = zip(*rows)
+        departures = columns[4]
+        if isinstance(departures[0], datetime):
+            departures = [departure.timestamp() for departure in departures]
+        columns[4] = departures
+        return cls(list(ids), *(np.asarray(column, dtype=np.float64) for column in columns))
+
+
+def haversine_km(
+    lng1: np.ndarray, lat1: np.ndarray, lng2: float, lat2: float
+) -> np.ndarray:
+    """
+    Great-circle distance in km from every (lng1, lat1) to a single (lng2, lat2).
+
+    Args:
+        lng1, lat1: Arrays of coordinates in degrees
+        lng2, lat2: Reference point in degrees
+
+    Returns:
+        np.ndarray: Distances in kilometres
+    """
+    lng1 = np.radians(lng1)
+    lat1 = np.radians(lat1)
+    lng2 = np.radians(lng2)
+    lat2 = np.radians(lat2)
+
+    dlat = lat1 - lat2
+    dlng = lng1 - lng2
+    a = np.sin(dlat / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def score_candidates(
+    candidates: RideCandidates,
+    origin: tuple[float, float],
+    destination: tuple[float, float],
+    departure: datetime,
+    weights: RankingWeights = DEFAULT_WEIGHTS,
+) -> dict[str, np.ndarray]:
+    """
+    Compute per-candidate features and the weighted score in one batch.
+
+    Args:
+        candidates: Candidate rides as column arrays
+        origin: Passenger pickup point as (lng, lat)
+        destination: Passenger drop-off point as (lng, lat)
+        departure: Requested departure time (timezone-aware)
+        weights: Scoring weights
+
+    Returns:
+        dict: Arrays for "pickup_km", "dropoff_km", "time_diff_minutes" and "score"
+    """
+    pickup_km = haversine_km(candidates.origin_lng, candidates.origin_lat, *origin)
+    dropoff_km = haversine_km(candidates.dest_lng, candidates.dest_lat, *destination)
+    time_diff_minutes = np.abs(candidates.departure_ts - departure.timestamp()) / 60.0
+
+    score = (
+        weights.pickup_km * pickup_km
+        + weights.dropoff_km * dropoff_km
+        + weights.time_minutes * time_diff_minutes
+        + weights.price * candidates.price_share
+        - weights.rating * candidates.rating_avg
+    )
+
+    return {
+        "pickup_km": pickup_km,
+        "dropoff_km": dropoff_km,
+        "time_diff_minutes": time_diff_minutes,
+        "score": score,
+    }
+
+
+def rank_candidates(
+    candidates: RideCandidates,
+    origin: tuple[float, float],
+    destination: tuple[float, float],
+    departure: datetime,
+    k: int = 20,
+    weights: RankingWeights = DEFAULT_WEIGHTS,
+) -> list[dict]:
+    """
+    Return the top-K candidates ordered from best to worst.
+
+    Uses argpartition to select the K lowest scores in O(n), then sorts
+    only those K entries.
+
+    Args:
+        candidates: Candidate rides as column arrays
+        origin: Passenger pickup point as (lng, lat)
+        destination: Passenger drop-off point as (lng, lat)
+        departure: Requested departure time (timezone-aware)
+        k: Number of results to return
+        weights: Scoring weights
+
+    Returns:
+        list[dict]: One entry per ranked ride with its id, score and features
+    """
+    n = len(candidates)
+    if n == 0 or k <= 0:
+        return []
+
+    features = score_candidates(candidates, origin, destination, departure, weights)
+    score = features["score"]
+
+    if k < n:
+        top = np.argpartition(score, k - 1)[:k]
+    else:
+        top = np.arange(n)
+    top = top[np.argsort(score[top], kind="stable")]
+
+    return [
+        {
+            "id": candidates.ids[i],
+            "score": round(float(score[i]), 4),
+            "pickup_km": round(float(features["pickup_km"][i]), 3),
+            "dropoff_km": round(float(features["dropoff_km"][i]), 3),
+            "time_diff_minutes": round(float(features["time_diff_minutes"][i]), 1),
+        }
+        for i in top
+    ]
@@ -0,0 +1,530 @@
+"""
+Rating Aggregation Service
+Keeps users.rating_sum / rating_count / rating_avg in step with the reviews table.
+
+New reviews adjust the reviewee's aggregate with one arithmetic UPDATE in the
+same statement as the insert - no scan over reviews_received. Concurrent reviews
+of the same user serialize on that user's row lock, and each UPDATE re-reads
+the latest row version, so no increment is lost.
+
+The same statements maintain user_rating_rollups (star histogram and a
+time-decayed score), which driver cards read in bulk with one query.
+
+Aggregates can still drift (manual fixes, rows written before rating_sum
+existed), so reconcile_ratings / rebuild_rating_rollups recompute them in
+keyset-paginated chunks (daily as the "ratings.reconcile" job).
+
+Usage:
+    python -m src.services.ratings reconcile [--chunk-size 1000]
+    python -m src.services.ratings rollups [--chunk-size 1000]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import uuid
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import db as db_config
+from src.services.jobs import job_handler
+
+logger = logging.getLogger(__name__)
+
+# Users recomputed per reconciliation transaction
+RECONCILE_CHUNK_SIZE = int(os.getenv("RATING_RECONCILE_CHUNK_SIZE", 1000))
+
+# A review's weight in the recency-weighted score halves every this many days
+RATING_DECAY_HALF_LIFE_DAYS = float(os.getenv("RATING_DECAY_HALF_LIFE_DAYS", 180))
+HALF_LIFE_SECONDS = RATING_DECAY_HALF_LIFE_DAYS * 86400
+
+STAR_COLUMNS = [f"stars_{stars}" for stars in range(1, 6)]
+
+
+def _decay(later: str, earlier: str) -> str:
+    """SQL weight factor for moving a decayed value from `earlier` to `later`"""
+    return (
+        f"power(0.5, greatest(0, CAST(extract(epoch FROM {later} - {earlier}) AS double precision))"
+        f" / :half_life_seconds)"
+    )
+
+
+# Fold one review (rating, created_at) into its reviewee's rollup.
+# The stored values and the new review are both decayed to the later of the
+# two timestamps, so out-of-order commits are still weighted correctly.
+_ROLLUP_UPSERT = (
+    "INSERT INTO user_rating_rollups (user_id, " + ", ".join(STAR_COLUMNS)
+    + ", decayed_sum, decayed_count, decayed_at)\n"
+    + "        SELECT reviewee_id, "
+    + ", ".join(f"CAST(rating = {stars} AS integer)" for stars in range(1, 6))
+    + ", rating, 1, created_at FROM inserted\n"
+    + "        ON CONFLICT (user_id) DO UPDATE SET "
+    + ", ".join(f"{column} = user_rating_rollups.{column} + EXCLUDED.{column}" for column in STAR_COLUMNS)
+    + ",\n            decayed_sum = user_rating_rollups.decayed_sum * "
+    + _decay("EXCLUDED.decayed_at", "user_rating_rollups.decayed_at")
+    + " + EXCLUDED.decayed_sum * " + _decay("user_rating_rollups.decayed_at", "EXCLUDED.decayed_at")
+    + ",\n            decayed_count = user_rating_rollups.decayed_count * "
+    + _decay("EXCLUDED.decayed_at", "user_rating_rollups.decayed_at")
+    + " + EXCLUDED.decayed_count * " + _decay("user_rating_rollups.decayed_at", "EXCLUDED.decayed_at")
+    + ",\n            decayed_at = greatest(user_rating_rollups.decayed_at, EXCLUDED.decayed_at)"
+)
+
+# Insert a review between the driver and a passenger of a completed ride and
+# fold its rating into the reviewee's aggregate in the same statement.
+CREATE_REVIEW_SQL = text("""
+    WITH ride AS (
+        SELECT id, departure_time, driver_id
+        FROM rides
+        WHERE id = :ride_id AND status = 'completed'
+    ), pair AS (
+        SELECT ride.id, ride.departure_time
+        FROM ride
+        WHERE CAST(:reviewer_id AS uuid) <> CAST(:reviewee_id AS uuid)
+          AND ride.driver_id IN (CAST(:reviewer_id AS uuid), CAST(:reviewee_id AS uuid))
+          AND EXISTS (
+              SELECT 1 FROM bookings
+              WHERE bookings.ride_id = ride.id
+                AND bookings.status IN ('confirmed', 'completed')
+                AND bookings.passenger_id = CASE
+                    WHEN ride.driver_id = CAST(:reviewer_id AS uuid) THEN CAST(:reviewee_id AS uuid)
+                    ELSE CAST(:reviewer_id AS uuid)
+                END
+          )
+    ), inserted AS (
+        INSERT INTO reviews (id, ride_id, ride_departure_time, reviewer_id, reviewee_id, rating, comment)
+        SELECT CAST(:review_id AS uuid), pair.id, pair.departure_time,
+               CAST(:reviewer_id AS uuid), CAST(:reviewee_id AS uuid),
+               CAST(:rating AS integer), CAST(:comment AS text)
+        FROM pair
+        ON CONFLICT ON CONSTRAINT unique_review_per_ride_pair DO NOTHING
+        RETURNING id, ride_id, reviewer_id, reviewee_id, rating, comment, created_at
+    ), rated AS (
+        UPDATE users
+        SET updated_at = now(),
+            rating_sum = users.rating_sum + inserted.rating,
+            rating_count = users.rating_count + 1,
+            rating_avg = round((users.rating_sum + inserted.rating)::numeric / (users.rating_count + 1), 2)
+        FROM inserted
+        WHERE users.id = inserted.reviewee_id
+        RETURNING users.rating_avg, users.rating_count
+    ), rolled AS (
+        """ + _ROLLUP_UPSERT + """
+    )
+    SELECT inserted.*, rated.rating_avg AS reviewee_rating_avg, rated.rating_count AS reviewee_rating_count
+    FROM inserted CROSS JOIN rated
+""")
+
+# Delete a review written by the caller and take it back out of the
+# reviewee's aggregate and rollup (its weight is decayed to the rollup's time).
+DELETE_REVIEW_SQL = text("""
+    WITH deleted AS (
+        DELETE FROM reviews
+        WHERE id = :review_id AND reviewer_id = :reviewer_id
+        RETURNING reviewee_id, rating, created_at
+    ), rated AS (
+        UPDATE users
+        SET updated_at = now(),
+            rating_sum = users.rating_sum - deleted.rating,
+            rating_count = users.rating_count - 1,
+            rating_avg = CASE WHEN users.rating_count <= 1 THEN 0
+                              ELSE round((users.rating_sum - deleted.rating)::numeric / (users.rating_count - 1), 2) END
+        FROM deleted
+        WHERE users.id = deleted.reviewee_id
+        RETURNING users.id
+    ), rolled AS (
+        UPDATE user_rating_rollups
+        SET """ + ", ".join(
+            f"{column} = user_rating_rollups.{column} - CAST(deleted.rating = {stars} AS integer)"
+            for stars, column in enumerate(STAR_COLUMNS, start=1)
+        ) + """,
+            decayed_sum = greatest(0, user_rating_rollups.decayed_sum - deleted.rating * """
+            + _decay("user_rating_rollups.decayed_at", "deleted.created_at") + """),
+            decayed_count = greatest(0, user_rating_rollups.decayed_count - """
+            + _decay("user_rating_rollups.decayed_at", "deleted.created_at") + """)
+        FROM deleted
+        WHERE user_rating_rollups.user_id = deleted.reviewee_id
+        RETURNING user_rating_rollups.user_id
+    )
+    SELECT deleted.reviewee_id FROM deleted
+""")
+
+# Batch removal of every review a user wrote or received (account deletion).
+# Several deleted reviews can share a reviewee, so they are summed per
+# reviewee before adjusting aggregates; the deleted user's own aggregates
+# are left alone since the row is about to go.
+DELETE_USER_REVIEWS_BATCH_SQL = text("""
+    WITH deleted AS (
+        DELETE FROM reviews
+        WHERE id IN (
+            SELECT id FROM reviews
+            WHERE reviewer_id = :user_id OR reviewee_id = :user_id
+            LIMIT :batch_size
+        )
+        RETURNING reviewee_id, rating, created_at
+    ), totals AS (
+        SELECT reviewee_id, sum(rating) AS rating_sum, count(*) AS rating_count, """ + ", ".join(
+            f"count(*) FILTER (WHERE rating = {stars}) AS {column}"
+            for stars, column in enumerate(STAR_COLUMNS, start=1)
+        ) + """
+        FROM deleted
+        WHERE reviewee_id <> :user_id
+        GROUP BY reviewee_id
+    ), rated AS (
+        UPDATE users
+        SET updated_at = now(),
+            rating_sum = users.rating_sum - totals.rating_sum,
+            rating_count = users.rating_count - totals.rating_count,
+            rating_avg = CASE WHEN users.rating_count <= totals.rating_count THEN 0
+                              ELSE round((users.rating_sum - totals.rating_sum)::numeric
+                                         / (users.rating_count - totals.rating_count), 2) END
+        FROM totals
+        WHERE users.id = totals.reviewee_id
+        RETURNING users.id
+    ), decayed AS (
+        SELECT deleted.reviewee_id,
+               sum(deleted.rating * """ + _decay("rollups.decayed_at", "deleted.created_at") + """) AS decayed_sum,
+               sum(""" + _decay("rollups.decayed_at", "deleted.created_at") + """) AS decayed_count
+        FROM deleted
+        JOIN user_rating_rollups rollups ON rollups.user_id = deleted.reviewee_id
+        WHERE deleted.reviewee_id <> :user_id
+        GROUP BY deleted.reviewee_id
+    ), rolled AS (
+        UPDATE user_rating_rollups
+        SET """ + ", ".join(
+            f"{column} = user_rating_rollups.{column} - totals.{column}" for column in STAR_COLUMNS
+        ) + """,
+            decayed_sum = greatest(0, user_rating_rollups.decayed_sum - decayed.decayed_sum),
+            decayed_count = greatest(0, user_rating_rollups.decayed_count - decayed.decayed_count)
+        FROM totals
+        JOIN decayed ON decayed.reviewee_id = totals.reviewee_id
+        WHERE user_rating_rollups.user_id = totals.reviewee_id
+        RETURNING user_rating_rollups.user_id
+    )
+    SELECT count(*) FROM deleted
+""")
+
+# Bulk read for driver cards: one index lookup per id, one round trip
+RATING_ROLLUPS_SQL = text("""
+    SELECT user_id, """ + ", ".join(STAR_COLUMNS) + """, decayed_sum, decayed_count
+    FROM user_rating_rollups
+    WHERE user_id = ANY(CAST(:user_ids AS uuid[]))
+""")
+
+# Lock the next keyset chunk of users. Maintenance statements run after
+# this one, so their snapshot includes every review whose statement had
+# already locked one of these users (create/delete review lock the
+# reviewee's users row before touching the rollup).
+LOCK_USER_CHUNK_SQL = text("""
+    SELECT id FROM users
+    WHERE CAST(:after AS uuid) IS NULL OR id > CAST(:after AS uuid)
+    ORDER BY id
+    LIMIT :chunk_size
+    FOR UPDATE
+""")
+
+# Relative difference below which a stored decayed value counts as correct
+# (floating point noise from decaying it to a different time)
+ROLLUP_DECAY_TOLERANCE = 1e-6
+
+# Recompute the rollups of one locked chunk of users from their reviews,
+# writing only rows that differ: star counts compared exactly, decayed values
+# after decaying the stored ones to now()
+REBUILD_ROLLUPS_CHUNK_SQL = text("""
+    WITH chunk AS (
+        SELECT unnest(CAST(:user_ids AS uuid[])) AS id
+    ), actual AS (
+        SELECT reviews.reviewee_id, """ + ", ".join(
+            f"count(*) FILTER (WHERE reviews.rating = {stars})" for stars in range(1, 6)
+        ) + """,
+               sum(reviews.rating * """ + _decay("now()", "reviews.created_at") + """),
+               sum(""" + _decay("now()", "reviews.created_at") + """),
+               now()
+        FROM reviews
+        JOIN chunk ON chunk.id = reviews.reviewee_id
+        GROUP BY reviews.reviewee_id
+    ), upserted AS (
+        INSERT INTO user_rating_rollups (user_id, """ + ", ".join(STAR_COLUMNS) + """, decayed_sum, decayed_count, decayed_at)
+        SELECT * FROM actual
+        ON CONFLICT (user_id) DO UPDATE SET """ + ", ".join(
+            f"{column} = EXCLUDED.{column}" for column in [*STAR_COLUMNS, "decayed_sum", "decayed_count", "decayed_at"]
+        ) + """
+        WHERE (""" + ", ".join(f"user_rating_rollups.{column}" for column in STAR_COLUMNS) + """)
+              IS DISTINCT FROM (""" + ", ".join(f"EXCLUDED.{column}" for column in STAR_COLUMNS) + """)
+           OR abs(user_rating_rollups.decayed_sum * """ + _decay("EXCLUDED.decayed_at", "user_rating_rollups.decayed_at")
+            + """ - EXCLUDED.decayed_sum) > :tolerance * greatest(1, EXCLUDED.decayed_sum)
+           OR abs(user_rating_rollups.decayed_count * """ + _decay("EXCLUDED.decayed_at", "user_rating_rollups.decayed_at")
+            + """ - EXCLUDED.decayed_count) > :tolerance * greatest(1, EXCLUDED.decayed_count)
+        RETURNING user_id
+    ), emptied AS (
+        DELETE FROM user_rating_rollups
+        USING chunk
+        WHERE user_rating_rollups.user_id = chunk.id
+          AND NOT EXISTS (SELECT 1 FROM actual WHERE actual.reviewee_id = chunk.id)
+        RETURNING user_id
+    )
+    SELECT (SELECT count(*) FROM upserted) + (SELECT count(*) FROM emptied) AS fixed
+""")
+
+# Recompute one locked chunk of users from their reviews, touching only
+# users whose stored aggregate differs
+RECONCILE_CHUNK_SQL = text("""
+    WITH chunk AS (
+        SELECT unnest(CAST(:user_ids AS uuid[])) AS id
+    ), actual AS (
+        SELECT chunk.id, count(reviews.id) AS review_count, coalesce(sum(reviews.rating), 0) AS review_sum
+        FROM chunk
+        LEFT JOIN reviews ON reviews.reviewee_id = chunk.id
+        GROUP BY chunk.id
+    ), fixed AS (
+        UPDATE users
+        SET updated_at = now(),
+            rating_count = actual.review_count,
+            rating_sum = actual.review_sum,
+            rating_avg = CASE WHEN actual.review_count = 0 THEN 0
+                              ELSE round(actual.review_sum::numeric / actual.review_count, 2) END
+        FROM actual
+        WHERE users.id = actual.id
+          AND (users.rating_count, users.rating_sum) IS DISTINCT FROM (actual.review_count, actual.review_sum)
+        RETURNING users.id
+    )
+    SELECT count(*) AS fixed FROM fixed
+""")
+
+
+async def create_review(db: AsyncSession, ride_id, reviewer_id, reviewee_id, rating: int, comment: str | None):
+    """
+    Create a review and update the reviewee's rating aggregate.
+
+    Args:
+        db: Database session (caller commits)
+        ride_id: Completed ride the review is about
+        reviewer_id: Author (driver or a passenger of the ride)
+        reviewee_id: Subject (the other side: passenger or driver)
+        rating: 1-5 stars
+        comment: Optional text
+
+    Returns:
+        Row: The new review plus reviewee_rating_avg / reviewee_rating_count
+
+    Raises:
+        HTTPException: If the ride does not exist or is not completed, the two
+                       users were not driver and passenger on it, or the
+                       review already exists
+    """
+    result = await db.execute(CREATE_REVIEW_SQL, {
+        "review_id": uuid.uuid4(),
+        "ride_id": ride_id,
+        "reviewer_id": reviewer_id,
+        "reviewee_id": reviewee_id,
+        "rating": rating,
+        "comment": comment,
+        "half_life_seconds": HALF_LIFE_SECONDS,
+    })
+    review = result.one_or_none()
+    if review is not None:
+        return review
+
+    # Cold path: explain why nothing was inserted
+    result = await db.execute(
+        text("SELECT status FROM rides WHERE id = :ride_id"),
+        {"ride_id": ride_id}
+    )
+    ride_status = result.scalar_one_or_none()
+    if ride_status is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ride not found"
+        )
+    if ride_status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Reviews can only be left for completed rides"
+        )
+    result = await db.execute(
+        text("""
+            SELECT 1 FROM reviews
+            WHERE ride_id = :ride_id AND reviewer_id = :reviewer_id AND reviewee_id = :reviewee_id
+        """),
+        {"ride_id": ride_id, "reviewer_id": reviewer_id, "reviewee_id": reviewee_id}
+    )
+    if result.first() is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="You already reviewed this user for this ride"
+        )
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Only the driver and confirmed passengers of a ride can review each other"
+    )
+
+
+async def delete_review(db: AsyncSession, review_id, reviewer_id) -> bool:
+    """
+    Delete one of the caller's reviews and remove it from the reviewee's
+    aggregate and rollup in the same statement.
+
+    Args:
+        db: Database session (caller commits)
+        review_id: Review to delete
+        reviewer_id: Must be the review's author
+
+    Returns:
+        bool: False if no such review was written by reviewer_id
+    """
+    result = await db.execute(DELETE_REVIEW_SQL, {
+        "review_id": review_id,
+        "reviewer_id": reviewer_id,
+        "half_life_seconds": HALF_LIFE_SECONDS,
+    })
+    return result.first() is not None
+
+
+async def delete_user_reviews_batch(db: AsyncSession, user_id, batch_size: int) -> int:
+    """
+    Delete up to batch_size reviews written or received by a user, removing
+    them from the other party's aggregate and rollup in the same statement.
+
+    Args:
+        db: Database session (caller commits)
+        user_id: User whose reviews are removed
+        batch_size: Max reviews deleted
+
+    Returns:
+        int: Number of reviews deleted
+    """
+    result = await db.execute(DELETE_USER_REVIEWS_BATCH_SQL, {
+        "user_id": user_id,
+        "batch_size": batch_size,
+        "half_life_seconds": HALF_LIFE_SECONDS,
+    })
+    return result.scalar()
+
+
+def summarize_rollup(row) -> dict:
+    """Turn a rollup row into histogram, plain average and recency-weighted score"""
+    stars = [getattr(row, column) for column in STAR_COLUMNS]
+    count = sum(stars)
+    return {
+        "user_id": row.user_id,
+        "stars": stars,
+        "count": count,
+        "average": round(sum(n * weight for n, weight in zip(stars, range(1, 6))) / count, 2) if count else None,
+        "recent_score": round(row.decayed_sum / row.decayed_count, 2) if row.decayed_count > 1e-9 else None,
+    }
+
+
+async def get_rating_rollups(db: AsyncSession, user_ids) -> dict:
+    """
+    Fetch rating summaries for many users in one query.
+
+    Args:
+        db: Database session
+        user_ids: Users to summarize (duplicates are fine)
+
+    Returns:
+        dict: user_id -> summary (see summarize_rollup); users without
+              reviews get an empty histogram
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return {}
+    result = await db.execute(RATING_ROLLUPS_SQL, {"user_ids": user_ids})
+    summaries = {row.user_id: summarize_rollup(row) for row in result}
+    for user_id in user_ids:
+        summaries.setdefault(user_id, {
+            "user_id": user_id, "stars": [0] * 5, "count": 0, "average": None, "recent_score": None,
+        })
+    return summaries
+
+
+async def _walk_user_chunks(statement, chunk_size: int, label: str, **params) -> dict:
+    """
+    Run a maintenance statement over all users in keyset chunks, one
+    transaction per chunk. The chunk's users rows are locked by a separate
+    statement first: in READ COMMITTED the maintenance statement then gets a
+    snapshot taken after the locks are held, so a review committed while we
+    waited is counted rather than overwritten by stale absolute values.
+    """
+    after = None
+    chunks = 0
+    fixed = 0
+    while True:
+        async with db_config.get_async_session() as session:
+            result = await session.execute(LOCK_USER_CHUNK_SQL, {"after": after, "chunk_size": chunk_size})
+            user_ids = result.scalars().all()
+            if not user_ids:
+                break
+            result = await session.execute(statement, {"user_ids": list(user_ids), **params})
+            chunk_fixed = result.scalar_one()
+        chunks += 1
+        fixed += chunk_fixed
+        after = user_ids[-1]
+        if chunk_fixed:
+            logger.info(f"Rewrote {chunk_fixed} {label} up to user {after}")
+    return {"scanned_chunks": chunks, "fixed": fixed}
+
+
+async def reconcile_ratings(chunk_size: int = RECONCILE_CHUNK_SIZE) -> dict:
+    """
+    Recompute every user's rating aggregate from the reviews table.
+
+    Users are walked in id order, one short transaction per chunk, so the
+    job never holds locks on more than chunk_size users at a time and can
+    run while the app is serving traffic. Only drifted users are written.
+
+    Args:
+        chunk_size: Users per transaction
+
+    Returns:
+        dict: {"scanned_chunks": int, "fixed": int}
+    """
+    return await _walk_user_chunks(RECONCILE_CHUNK_SQL, chunk_size, "drifted rating aggregate(s)")
+
+
+async def rebuild_rating_rollups(chunk_size: int = RECONCILE_CHUNK_SIZE) -> dict:
+    """
+    Recompute every user's rating rollup from the reviews table.
+
+    Same chunking and locking as reconcile_ratings. Only rollups that
+    differ from the reviews are rewritten (with decayed values re-expressed
+    at the current time); users without reviews lose their rollup row.
+
+    Returns:
+        dict: {"scanned_chunks": int, "fixed": int}
+    """
+    return await _walk_user_chunks(
+        REBUILD_ROLLUPS_CHUNK_SQL, chunk_size, "rating rollup(s)",
+        half_life_seconds=HALF_LIFE_SECONDS, tolerance=ROLLUP_DECAY_TOLERANCE,
+    )
+
+
+@job_handler("ratings.reconcile")
+async def _reconcile_job(payload: dict) -> None:
+    """Periodic drift repair of aggregates and rollups"""
+    await reconcile_ratings()
+    await rebuild_rating_rollups()
+
+
+async def _main(args) -> None:
+    await db_config.init_db()
+    try:
+        if args.command == "reconcile":
+            summary = await reconcile_ratings(args.chunk_size)
+        else:
+            summary = await rebuild_rating_rollups(args.chunk_size)
+        print(f"Scanned {summary['scanned_chunks']} chunk(s), fixed {summary['fixed']} user(s)")
+    finally:
+        await db_config.close_db()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Maintain user rating aggregates")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    reconcile_parser = subparsers.add_parser("reconcile", help="Recompute drifted rating aggregates")
+    reconcile_parser.add_argument("--chunk-size", type=int, default=RECONCILE_CHUNK_SIZE)
+    rollups_parser = subparsers.add_parser("rollups", help="Rebuild star histograms and decayed scores")
+    rollups_parser.add_argument("--chunk-size", type=int, default=RECONCILE_CHUNK_SIZE)
+    asyncio.run(_main(parser.parse_args()))
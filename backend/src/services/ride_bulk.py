@@ -0,0 +1,213 @@
+"""
+Bulk Ride Creation Service
+Expands recurring ride rules and inserts many rides with batched statements.
+
+Two insert paths:
+    - insert_rides: one INSERT ... SELECT FROM unnest(...) per batch (recurring rides)
+    - copy_rides: COPY into a temp staging table, then one INSERT ... SELECT (admin imports)
+
+Ride ids are generated in Python (uuid4), so neither path needs a per-row
+gen_random_uuid() default or a RETURNING round trip.
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterable, Iterable
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.partitions import ensure_partitions_for_range
+from src.models.user import User
+from src.schemas.ride import RecurringRideCreate, RideImportRow
+
+# Rows per INSERT ... unnest statement (keeps bind arrays a reasonable size)
+INSERT_BATCH_SIZE = 5000
+
+# Column order shared by the unnest arrays and the COPY staging table
+RIDE_COLUMNS = (
+    ("id", "uuid"),
+    ("driver_id", "uuid"),
+    ("vehicle_make", "varchar"),
+    ("vehicle_model", "varchar"),
+    ("vehicle_color", "varchar"),
+    ("vehicle_year", "integer"),
+    ("origin_label", "varchar"),
+    ("destination_label", "varchar"),
+    ("origin_lng", "double precision"),
+    ("origin_lat", "double precision"),
+    ("destination_lng", "double precision"),
+    ("destination_lat", "double precision"),
+    ("departure_time", "timestamptz"),
+    ("seats_total", "integer"),
+    ("seats_available", "integer"),
+    ("price_share", "numeric"),
+    ("status", "varchar"),
+)
+COLUMN_NAMES = [name for name, _ in RIDE_COLUMNS]
+
+# Shared projection from flat lng/lat columns to the rides table
+_RIDE_SELECT = """
+    SELECT id, driver_id, vehicle_make, vehicle_model, vehicle_color, vehicle_year,
+           origin_label, destination_label,
+           ST_SetSRID(ST_MakePoint(origin_lng, origin_lat), 4326)::geography,
+           ST_SetSRID(ST_MakePoint(destination_lng, destination_lat), 4326)::geography,
+           departure_time, seats_total, seats_available, price_share, status
+"""
+
+_RIDE_INSERT = """
+    INSERT INTO rides (
+        id, driver_id, vehicle_make, vehicle_model, vehicle_color, vehicle_year,
+        origin_label, destination_label, origin_geom, destination_geom,
+        departure_time, seats_total, seats_available, price_share, status
+    )
+"""
+
+UNNEST_INSERT_SQL = text(
+    _RIDE_INSERT
+    + _RIDE_SELECT
+    + "FROM unnest("
+    + ", ".join(f"CAST(:{name} AS {pg_type}[])" for name, pg_type in RIDE_COLUMNS)
+    + ") AS r(" + ", ".join(COLUMN_NAMES) + ")"
+)
+
+STAGING_TABLE = "ride_import_staging"
+
+
+def expand_recurrence(rule: RecurringRideCreate, now: datetime | None = None) -> list[datetime]:
+    """
+    Expand a recurring ride rule into concrete departure times.
+
+    Args:
+        rule: Days of week, date range, local time and timezone
+        now: Departures at or before this instant are skipped (defaults to current time)
+
+    Returns:
+        list[datetime]: Timezone-aware departure times in chronological order
+    """
+    tz = ZoneInfo(rule.timezone)
+    now = now or datetime.now(timezone.utc)
+    days = set(rule.days_of_week)
+
+    departures = []
+    day = rule.start_date
+    while day <= rule.end_date:
+        if day.weekday() in days:
+            departure = datetime.combine(day, rule.departure_time, tzinfo=tz)
+            if departure > now:
+                departures.append(departure)
+        day += timedelta(days=1)
+    return departures
+
+
+def recurring_ride_rows(rule: RecurringRideCreate, driver: User) -> list[tuple]:
+    """
+    Build ride rows (in RIDE_COLUMNS order) for every occurrence of a rule.
+    Vehicle details fall back to the driver's profile.
+    """
+    vehicle = (
+        rule.vehicle_make or driver.vehicle_make,
+        rule.vehicle_model or driver.vehicle_model,
+        rule.vehicle_color or driver.vehicle_color,
+        rule.vehicle_year or driver.vehicle_year,
+    )
+    return [
+        (
+            uuid.uuid4(), driver.id, *vehicle,
+            rule.origin.label, rule.destination.label,
+            rule.origin.lng, rule.origin.lat,
+            rule.destination.lng, rule.destination.lat,
+            departure, rule.seats_total, rule.seats_total, rule.price_share, "open",
+        )
+        for departure in expand_recurrence(rule)
+    ]
+
+
+def import_row_to_tuple(row: RideImportRow) -> tuple:
+    """Convert a validated import row to a tuple in RIDE_COLUMNS order"""
+    return (
+        uuid.uuid4(), row.driver_id,
+        row.vehicle_make, row.vehicle_model, row.vehicle_color, row.vehicle_year,
+        row.origin_label, row.destination_label,
+        row.origin_lng, row.origin_lat, row.destination_lng, row.destination_lat,
+        row.departure_time, row.seats_total, row.seats_available, row.price_share, row.status,
+    )
+
+
+async def insert_rides(db: AsyncSession, rows: list[tuple]) -> int:
+    """
+    Insert rides with one INSERT ... SELECT FROM unnest(...) per batch.
+
+    Args:
+        db: Database session (caller commits)
+        rows: Ride rows in RIDE_COLUMNS order
+
+    Returns:
+        int: Number of rides inserted
+    """
+    if not rows:
+        return 0
+
+    departures = [row[12] for row in rows]
+    await ensure_partitions_for_range(db, "rides", min(departures), max(departures))
+
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        batch = rows[start:start + INSERT_BATCH_SIZE]
+        columns = list(zip(*batch))
+        await db.execute(
+            UNNEST_INSERT_SQL,
+            {name: list(values) for name, values in zip(COLUMN_NAMES, columns)}
+        )
+    return len(rows)
+
+
+async def copy_rides(db: AsyncSession, batches: AsyncIterable[list[tuple]]) -> int:
+    """
+    Bulk load rides with COPY into a temp staging table, then move them
+    into rides with a single INSERT ... SELECT.
+
+    The staging table only has plain columns (lng/lat as doubles), so COPY can use
+    asyncpg's binary protocol; geography points are built server-side afterwards.
+
+    Args:
+        db: Database session (caller commits; staging table is dropped on commit)
+        batches: Async iterable of row batches in RIDE_COLUMNS order
+
+    Returns:
+        int: Number of rides inserted
+    """
+    # Executing through the session first opens the transaction the temp table lives in
+    column_defs = ", ".join(f"{name} {pg_type}" for name, pg_type in RIDE_COLUMNS)
+    await db.execute(text(f"CREATE TEMP TABLE {STAGING_TABLE} ({column_defs}) ON COMMIT DROP"))
+
+    # COPY needs the underlying asyncpg connection
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    asyncpg_connection = raw_connection.driver_connection
+
+    async for batch in batches:
+        await asyncpg_connection.copy_records_to_table(
+            STAGING_TABLE, records=batch, columns=COLUMN_NAMES
+        )
+
+    # Imports may contain historical or far-future rides outside the partition window
+    bounds = await db.execute(text(f"SELECT min(departure_time), max(departure_time) FROM {STAGING_TABLE}"))
+    earliest, latest = bounds.one()
+    if earliest is None:
+        return 0
+    await ensure_partitions_for_range(db, "rides", earliest, latest)
+
+    result = await db.execute(text(_RIDE_INSERT + _RIDE_SELECT + f"FROM {STAGING_TABLE}"))
+    return result.rowcount
+
+
+def chunked(rows: Iterable, size: int) -> Iterable[list]:
+    """Yield lists of up to `size` items from an iterable"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,166 @@
+"""
+Seat Hold Sweeper
+Releases seats held by pending bookings whose hold has lapsed.
+
+Instead of scanning the bookings table on a timer, each worker keeps an
+in-process min-heap of upcoming expiries:
+
+    - bookings created by this worker are pushed onto the heap immediately
+    - every RESYNC_SECONDS the worker pulls holds expiring within the next
+      HORIZON_SECONDS from the partial index on (hold_expires_at) WHERE
+      status = 'pending' - this picks up holds created by other workers or
+      before a restart, and costs a range scan over expiring holds only
+    - when the head of the heap is due, up to BATCH_SIZE lapsed holds are
+      released in one statement (see release_expired_holds)
+
+Several workers may try to release the same hold; the conditional UPDATE
+with SKIP LOCKED guarantees each hold is released exactly once.
+"""
+import asyncio
+import heapq
+import logging
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from src.config import db as db_config
+from src.services.bookings import release_expired_holds
+
+logger = logging.getLogger(__name__)
+
+# Max holds released per statement
+BATCH_SIZE = int(os.getenv("SEAT_HOLD_SWEEP_BATCH_SIZE", 500))
+
+# How often to pull upcoming expiries from the database
+RESYNC_SECONDS = float(os.getenv("SEAT_HOLD_RESYNC_SECONDS", 30))
+
+# How far ahead each resync looks (should exceed RESYNC_SECONDS)
+HORIZON_SECONDS = float(os.getenv("SEAT_HOLD_HORIZON_SECONDS", 60))
+
+# Retry delay after a failed release (e.g. a deadlock with another sweeper)
+RETRY_SECONDS = 1.0
+
+UPCOMING_HOLDS_SQL = text("""
+    SELECT id, hold_expires_at
+    FROM bookings
+    WHERE status = 'pending'
+      AND hold_expires_at <= now() + make_interval(secs => :horizon)
+    ORDER BY hold_expires_at
+    LIMIT :limit
+""")
+
+
+class SeatHoldSweeper:
+    """
+    Timer-heap driven releaser of lapsed seat holds.
+
+    Heap entries are (expires_at_epoch, booking_id). Confirmed or cancelled
+    bookings are removed lazily: discard() drops them from the live map and
+    the stale heap entry is skipped when it surfaces.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[float, object]] = []
+        self._deadlines: dict = {}  # booking_id -> expires_at_epoch
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._next_resync = 0.0
+
+    def schedule(self, booking_id, expires_at: datetime) -> None:
+        """Track a hold; wakes the sweeper if this is the new earliest expiry"""
+        deadline = expires_at.timestamp()
+        if self._deadlines.get(booking_id) == deadline:
+            return
+        self._deadlines[booking_id] = deadline
+        heapq.heappush(self._heap, (deadline, booking_id))
+        if self._heap[0][1] == booking_id:
+            self._wakeup.set()
+
+    def discard(self, booking_id) -> None:
+        """Stop tracking a hold (booking confirmed or cancelled)"""
+        self._deadlines.pop(booking_id, None)
+
+    def _pop_due(self, now: float) -> list:
+        """Pop up to BATCH_SIZE live entries whose deadline has passed"""
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < BATCH_SIZE:
+            deadline, booking_id = heapq.heappop(self._heap)
+            if self._deadlines.get(booking_id) == deadline:
+                del self._deadlines[booking_id]
+                due.append(booking_id)
+        return due
+
+    async def _resync(self) -> None:
+        """Load holds expiring soon (from any worker) into the heap"""
+        async with db_config.get_async_session() as session:
+            result = await session.execute(UPCOMING_HOLDS_SQL, {
+                "horizon": HORIZON_SECONDS,
+                "limit": BATCH_SIZE * 20,
+            })
+            for booking_id, expires_at in result:
+                self.schedule(booking_id, expires_at)
+
+    async def _release(self, booking_ids: list) -> None:
+        """Release one batch; on failure put the ids back for a retry"""
+        try:
+            async with db_config.get_async_session() as session:
+                rides, promoted = await release_expired_holds(session, booking_ids)
+            if rides:
+                logger.info(f"Released lapsed seat holds on {len(rides)} ride(s)")
+            # Waitlist promotions start their own holds
+            for booking in promoted:
+                self.schedule(booking.id, booking.hold_expires_at)
+        except DBAPIError as e:
+            logger.warning(f"Seat hold release failed, retrying: {e}")
+            retry_at = time.time() + RETRY_SECONDS
+            for booking_id in booking_ids:
+                self._deadlines[booking_id] = retry_at
+                heapq.heappush(self._heap, (retry_at, booking_id))
+
+    async def run(self) -> None:
+        """Main loop: release due holds, resync periodically, sleep until next deadline"""
+        while True:
+            now = time.time()
+            try:
+                if now >= self._next_resync:
+                    self._next_resync = now + RESYNC_SECONDS
+                    await self._resync()
+
+                due = self._pop_due(time.time())
+                if due:
+                    await self._release(due)
+                    continue  # more may be due right away
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Seat hold sweeper error: {e}")
+
+            next_deadline = self._heap[0][0] if self._heap else float("inf")
+            timeout = max(0.0, min(next_deadline, self._next_resync) - time.time())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        """Start the sweeper loop on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(), name="seat-hold-sweeper")
+
+    async def stop(self) -> None:
+        """Cancel the sweeper loop and wait for it to exit"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# One sweeper per worker process
+seat_hold_sweeper = SeatHoldSweeper()
@@ -0,0 +1,292 @@
+"""
+Seat Update Fan-out
+Pushes ride seat changes to WebSocket subscribers (GET /api/rides/live).
+
+Flow:
+    1. Services that change seats call publish_seat_changes() in their
+       transaction. It reads each ride's new state (seats, status, origin).
+    2. The change reaches every worker's SeatUpdateHub once the transaction
+       commits:
+        - SEAT_PUSH_BACKEND=local (default, single process): handed to the
+          hub by a session after_commit hook
+        - SEAT_PUSH_BACKEND=postgres (several workers): sent with pg_notify
+          (delivered on commit) and received by one LISTEN connection per worker
+        - SEAT_PUSH_BACKEND=off: nothing is published
+    3. Every SEAT_PUSH_TICK_SECONDS the hub sends each subscriber one message
+       with the latest state of every ride it follows that changed during the
+       tick, whether it subscribed by ride id or by geo cell (origin cell).
+
+A subscriber that falls SEAT_PUSH_QUEUE_SIZE messages behind has its queue
+replaced with a single {"type": "resync"} message telling it to re-fetch.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+from collections import defaultdict, deque
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config import db as db_config
+
+logger = logging.getLogger(__name__)
+
+SEAT_PUSH_BACKEND = os.getenv("SEAT_PUSH_BACKEND", "local")
+
+# Coalescing window: at most one message per subscriber per tick
+SEAT_PUSH_TICK_SECONDS = float(os.getenv("SEAT_PUSH_TICK_SECONDS", 0.25))
+
+# Unsent messages a subscriber may have queued before it is told to resync
+SEAT_PUSH_QUEUE_SIZE = int(os.getenv("SEAT_PUSH_QUEUE_SIZE", 16))
+
+# Ride ids plus cells one connection may follow
+SEAT_PUSH_MAX_SUBSCRIPTIONS = int(os.getenv("SEAT_PUSH_MAX_SUBSCRIPTIONS", 500))
+
+# Geo cell size in degrees of latitude/longitude (0.1 ~ 11 km)
+SEAT_CELL_DEGREES = float(os.getenv("SEAT_CELL_DEGREES", 0.1))
+
+SEAT_PUSH_CHANNEL = "ride_seats"
+LISTENER_RECONNECT_SECONDS = 2.0
+RESYNC_MESSAGE = '{"type":"resync"}'
+
+_RIDE_STATE = """
+    SELECT json_build_object(
+        'ride_id', id, 'seats_available', seats_available, 'status', status,
+        'lat', ST_Y(origin_geom::geometry), 'lng', ST_X(origin_geom::geometry)
+    )::text AS payload
+    FROM rides
+    WHERE id = ANY(CAST(:ride_ids AS uuid[]))
+"""
+
+RIDE_STATE_SQL = text(_RIDE_STATE)
+NOTIFY_SEATS_SQL = text(
+    f"SELECT pg_notify('{SEAT_PUSH_CHANNEL}', changed.payload) FROM ({_RIDE_STATE}) AS changed"
+)
+
+# Session.info key for changes waiting for their transaction to commit
+_PENDING_KEY = "seat_updates"
+
+
+def cell_for(lat: float, lng: float) -> str:
+    """Geo cell id containing a point, e.g. "434:-806" """
+    return f"{math.floor(lat / SEAT_CELL_DEGREES)}:{math.floor(lng / SEAT_CELL_DEGREES)}"
+
+
+def cells_near(lat: float, lng: float) -> list[str]:
+    """The cell containing a point plus its eight neighbours"""
+    row, col = math.floor(lat / SEAT_CELL_DEGREES), math.floor(lng / SEAT_CELL_DEGREES)
+    return [f"{row + dr}:{col + dc}" for dr in (-1, 0, 1) for dc in (-1, 0, 1)]
+
+
+async def publish_seat_changes(db: AsyncSession, ride_ids) -> None:
+    """
+    Announce the current seat state of rides changed in this transaction.
+    Subscribers only see it if (and once) the transaction commits.
+
+    Args:
+        db: The session that changed the rides (caller commits)
+        ride_ids: Rides whose seats or status changed
+    """
+    ride_ids = list(ride_ids)
+    if not ride_ids or SEAT_PUSH_BACKEND == "off":
+        return
+    if SEAT_PUSH_BACKEND == "postgres":
+        await db.execute(NOTIFY_SEATS_SQL, {"ride_ids": ride_ids})
+        return
+    payloads = (await db.execute(RIDE_STATE_SQL, {"ride_ids": ride_ids})).scalars().all()
+    db.sync_session.info.setdefault(_PENDING_KEY, []).extend(payloads)
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_committed(session: Session) -> None:
+    for payload in session.info.pop(_PENDING_KEY, ()):
+        seat_update_hub.push(payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+class SeatSubscriber:
+    """One WebSocket connection's subscriptions and outgoing message queue"""
+
+    # A plain deque plus a waiter future: flush() touches every subscriber each
+    # tick, and asyncio.Queue.put_nowait costs about three times as much
+    __slots__ = ("queue", "queue_size", "rides", "cells", "_waiter")
+
+    def __init__(self, queue_size: int = SEAT_PUSH_QUEUE_SIZE):
+        self.queue: deque[str] = deque()
+        self.queue_size = queue_size
+        self.rides: set[str] = set()
+        self.cells: set[str] = set()
+        self._waiter: asyncio.Future | None = None
+
+    def offer(self, message: str) -> None:
+        """Queue a message without ever blocking the hub"""
+        if len(self.queue) >= self.queue_size:
+            # Too slow to keep up: drop the backlog, the client re-fetches instead
+            self.queue.clear()
+            message = RESYNC_MESSAGE
+        self.queue.append(message)
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def next_message(self) -> str:
+        """Wait for the next queued message"""
+        while not self.queue:
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self.queue.popleft()
+
+
+class SeatUpdateHub:
+    """
+    Per-worker fan-out of seat changes to subscribers.
+
+    Changes are coalesced per ride (latest state wins) and flushed once per
+    tick; each change is JSON-encoded once, however many subscribers get it.
+    """
+
+    def __init__(self, tick_seconds: float = SEAT_PUSH_TICK_SECONDS):
+        self.tick_seconds = tick_seconds
+        self._by_ride: dict[str, set[SeatSubscriber]] = defaultdict(set)
+        self._by_cell: dict[str, set[SeatSubscriber]] = defaultdict(set)
+        self._subscribers: set[SeatSubscriber] = set()
+        self._pending: dict[str, tuple[str | None, str]] = {}  # ride_id -> (cell, encoded update)
+        self._tasks: list[asyncio.Task] = []
+        self.messages_sent = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def connect(self) -> SeatSubscriber:
+        subscriber = SeatSubscriber()
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def disconnect(self, subscriber: SeatSubscriber) -> None:
+        self.unsubscribe(subscriber, subscriber.rides, subscriber.cells)
+        self._subscribers.discard(subscriber)
+
+    def subscribe(self, subscriber: SeatSubscriber, rides=(), cells=()) -> bool:
+        """Follow rides/cells; False if that would exceed SEAT_PUSH_MAX_SUBSCRIPTIONS"""
+        rides = set(rides) - subscriber.rides
+        cells = set(cells) - subscriber.cells
+        if len(subscriber.rides) + len(subscriber.cells) + len(rides) + len(cells) > SEAT_PUSH_MAX_SUBSCRIPTIONS:
+            return False
+        for ride_id in rides:
+            self._by_ride[ride_id].add(subscriber)
+        for cell in cells:
+            self._by_cell[cell].add(subscriber)
+        subscriber.rides |= rides
+        subscriber.cells |= cells
+        return True
+
+    def unsubscribe(self, subscriber: SeatSubscriber, rides=(), cells=()) -> None:
+        for index, keys, owned in ((self._by_ride, set(rides), subscriber.rides), (self._by_cell, set(cells), subscriber.cells)):
+            for key in keys & owned:
+                followers = index.get(key)
+                if followers is not None:
+                    followers.discard(subscriber)
+                    if not followers:
+                        del index[key]
+            owned -= keys
+
+    def push(self, payload: str) -> None:
+        """Record a committed change (JSON text from RIDE_STATE_SQL)"""
+        try:
+            update = json.loads(payload)
+            ride_id = update["ride_id"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Ignoring malformed seat update: {payload[:200]}")
+            return
+        if ride_id not in self._by_ride and not self._by_cell:
+            return  # nobody could be interested
+        cell = cell_for(update["lat"], update["lng"]) if update.get("lat") is not None else None
+        self._pending[ride_id] = (cell, json.dumps({
+            "ride_id": ride_id,
+            "seats_available": update["seats_available"],
+            "status": update["status"],
+        }, separators=(",", ":")))
+
+    def flush(self) -> None:
+        """Send every subscriber one message with its rides changed since the last flush"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        batches: dict[SeatSubscriber, dict[str, str]] = defaultdict(dict)
+        for ride_id, (cell, encoded) in pending.items():
+            for subscriber in self._by_ride.get(ride_id, ()):
+                batches[subscriber][ride_id] = encoded
+            if cell is not None:
+                for subscriber in self._by_cell.get(cell, ()):
+                    batches[subscriber][ride_id] = encoded
+        for subscriber, updates in batches.items():
+            subscriber.offer('{"type":"seats","rides":[' + ",".join(updates.values()) + "]}")
+        self.messages_sent += len(batches)
+
+    def resync_all(self) -> None:
+        """Tell every subscriber to re-fetch (changes may have been missed)"""
+        for subscriber in self._subscribers:
+            subscriber.offer(RESYNC_MESSAGE)
+
+    async def _tick(self) -> None:
+        while True:
+            await asyncio.sleep(self.tick_seconds)
+            self.flush()
+
+    async def _listen(self) -> None:
+        """Hold one LISTEN connection for this worker, reconnecting on loss"""
+        import asyncpg
+
+        dsn = db_config.ASYNC_DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+        ssl = True if "render.com" in dsn else None
+        connected_before = False
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn, ssl=ssl)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(
+                    SEAT_PUSH_CHANNEL, lambda _conn, _pid, _channel, payload: self.push(payload)
+                )
+                if connected_before:
+                    self.resync_all()
+                connected_before = True
+                await lost.wait()
+                logger.warning("Seat update listener connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Seat update listener error: {e}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(LISTENER_RECONNECT_SECONDS)
+
+    def start(self) -> None:
+        """Start the tick loop (and the LISTEN connection in postgres mode)"""
+        if self._tasks or SEAT_PUSH_BACKEND == "off":
+            return
+        self._tasks.append(asyncio.create_task(self._tick(), name="seat-push-tick"))
+        if SEAT_PUSH_BACKEND == "postgres":
+            self._tasks.append(asyncio.create_task(self._listen(), name="seat-push-listener"))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+# One hub per worker process
+seat_update_hub = SeatUpdateHub()
@@ -0,0 +1,172 @@
+"""
+Waitlist Service
+FIFO waitlists per ride, promoted into pending bookings when seats free up.
+
+Promotion is a single statement meant to run inside the transaction that
+freed the seats (while that transaction still holds the ride's row lock):
+it reads the head of the queue through idx_waitlist_ride_queue, takes the
+longest prefix whose seats fit, deletes those entries, takes the seats from
+the ride and inserts pending bookings. At most `seats_free` entries are
+read, so the cost does not depend on how long the waitlist is.
+"""
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.services.seat_updates import publish_seat_changes
+
+PROMOTE_WAITLIST_SQL = text("""
+    WITH head AS (
+        SELECT id, passenger_id, seats_requested,
+               sum(seats_requested) OVER (ORDER BY id) AS cumulative
+        FROM (
+            SELECT id, passenger_id, seats_requested
+            FROM ride_waitlist
+            WHERE ride_id = :ride_id
+              AND EXISTS (SELECT 1 FROM rides WHERE id = :ride_id AND status IN ('open', 'full'))
+            ORDER BY id
+            LIMIT :seats_free
+            FOR UPDATE
+        ) queue
+    ), promoted AS (
+        DELETE FROM ride_waitlist
+        USING head
+        WHERE ride_waitlist.id = head.id
+          AND head.cumulative <= :seats_free
+        RETURNING ride_waitlist.passenger_id, ride_waitlist.seats_requested
+    ), taken AS (
+        UPDATE rides
+        SET updated_at = now(),
+            seats_available = rides.seats_available - totals.seats,
+            status = CASE WHEN rides.seats_available - totals.seats = 0 THEN 'full' ELSE 'open' END
+        FROM (SELECT sum(seats_requested) AS seats FROM promoted) totals
+        WHERE rides.id = :ride_id AND totals.seats IS NOT NULL
+        RETURNING rides.id, rides.departure_time
+    )
+    INSERT INTO bookings (
+        id, ride_id, ride_departure_time, passenger_id, seats_reserved, status, hold_expires_at
+    )
+    SELECT gen_random_uuid(), taken.id, taken.departure_time,
+           promoted.passenger_id, promoted.seats_requested, 'pending',
+           now() + make_interval(secs => :hold_seconds)
+    FROM promoted CROSS JOIN taken
+    RETURNING id, ride_id, passenger_id, seats_reserved, amount_paid, status, booked_at, hold_expires_at
+""")
+
+JOIN_WAITLIST_SQL = text("""
+    INSERT INTO ride_waitlist (ride_id, ride_departure_time, passenger_id, seats_requested)
+    VALUES (:ride_id, :ride_departure_time, :passenger_id, :seats)
+    ON CONFLICT (ride_id, passenger_id) DO UPDATE
+        SET seats_requested = EXCLUDED.seats_requested
+""")
+
+WAITLIST_POSITION_SQL = text("""
+    SELECT mine.seats_requested,
+           (SELECT count(*) FROM ride_waitlist ahead
+            WHERE ahead.ride_id = mine.ride_id AND ahead.id <= mine.id) AS position
+    FROM ride_waitlist mine
+    WHERE mine.ride_id = :ride_id AND mine.passenger_id = :passenger_id
+""")
+
+
+async def promote_waitlist(db: AsyncSession, ride_id, seats_free: int, hold_seconds: float) -> list:
+    """
+    Promote waitlisted passengers into pending bookings, oldest first.
+
+    Must run in the same transaction that freed the seats, after the ride row
+    was updated (so the row lock is held and seats_free is current).
+    Promotion stops at the first entry that does not fit, keeping strict FIFO.
+
+    Args:
+        db: Database session (caller commits)
+        ride_id: Ride whose seats were freed
+        seats_free: The ride's seats_available after freeing
+        hold_seconds: Seat hold TTL for the new pending bookings
+
+    Returns:
+        list[Row]: The new pending bookings
+    """
+    if not seats_free or seats_free <= 0:
+        return []
+    result = await db.execute(PROMOTE_WAITLIST_SQL, {
+        "ride_id": ride_id,
+        "seats_free": seats_free,
+        "hold_seconds": float(hold_seconds),
+    })
+    return result.all()
+
+
+async def join_waitlist(db: AsyncSession, ride_id, passenger_id, seats: int, hold_seconds: float) -> list:
+    """
+    Add (or resize) a passenger's waitlist entry for a ride.
+
+    The ride row is locked first, so a cancellation cannot free seats between
+    the insert and the promotion attempt that follows it: if the head of the
+    queue already fits in the free seats it is promoted right away.
+
+    Args:
+        db: Database session (caller commits)
+        ride_id: Ride to wait for
+        passenger_id: Waiting user
+        seats: Seats wanted once promoted
+        hold_seconds: Seat hold TTL for bookings promoted immediately
+
+    Returns:
+        list[Row]: Bookings promoted by this call (may include other passengers
+                   ahead in the queue, or be empty if still waiting)
+
+    Raises:
+        HTTPException: If the ride does not exist, belongs to the passenger,
+                       or is no longer taking passengers
+    """
+    result = await db.execute(
+        text("SELECT driver_id, departure_time, status, seats_available FROM rides WHERE id = :ride_id FOR UPDATE"),
+        {"ride_id": ride_id}
+    )
+    ride = result.one_or_none()
+    if ride is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ride not found"
+        )
+    if ride.driver_id == passenger_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You cannot join the waitlist of your own ride"
+        )
+    if ride.status not in ("open", "full"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Ride is not taking passengers (status: {ride.status})"
+        )
+
+    await db.execute(JOIN_WAITLIST_SQL, {
+        "ride_id": ride_id,
+        "ride_departure_time": ride.departure_time,
+        "passenger_id": passenger_id,
+        "seats": seats,
+    })
+    promoted = await promote_waitlist(db, ride_id, ride.seats_available, hold_seconds)
+    if promoted:
+        await publish_seat_changes(db, [ride_id])
+    return promoted
+
+
+async def leave_waitlist(db: AsyncSession, ride_id, passenger_id) -> bool:
+    """Remove a passenger's waitlist entry; returns False if there was none"""
+    result = await db.execute(
+        text("DELETE FROM ride_waitlist WHERE ride_id = :ride_id AND passenger_id = :passenger_id RETURNING id"),
+        {"ride_id": ride_id, "passenger_id": passenger_id}
+    )
+    return result.one_or_none() is not None
+
+
+async def waitlist_position(db: AsyncSession, ride_id, passenger_id):
+    """
+    Get a passenger's 1-based queue position and requested seats.
+
+    Returns:
+        Row | None: (seats_requested, position), or None if not waitlisted
+    """
+    result = await db.execute(WAITLIST_POSITION_SQL, {"ride_id": ride_id, "passenger_id": passenger_id})
+    return result.one_or_none()
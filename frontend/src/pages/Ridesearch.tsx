@@ -117,6 +117,37 @@ export default function RidePostAndRequestPage() {
     };
   }, [debounceKey]);
 
+  // Live seat updates for the rides currently shown (mock rows are skipped)
+  const rideIds = results.filter((r) => !r.id.startsWith("mock-")).map((r) => r.id).join(",");
+
+  useEffect(() => {
+    if (!rideIds) return;
+
+    const url = new URL("/api/rides/live", import.meta.env.VITE_API_BASE_URL || window.location.origin);
+    url.protocol = url.protocol === "https:" ? "wss:" : "ws:";
+    const socket = new WebSocket(url);
+
+    socket.onopen = () => {
+      socket.send(JSON.stringify({ op: "subscribe", rides: rideIds.split(",") }));
+    };
+    socket.onmessage = (event) => {
+      const message = JSON.parse(event.data);
+      if (message.type === "seats") {
+        const seatsById = new Map<string, number>(
+          message.rides.map((update: { ride_id: string; seats_available: number }) => [update.ride_id, update.seats_available])
+        );
+        setResults((current) =>
+          current.map((r) => (seatsById.has(r.id) ? { ...r, seats_available: seatsById.get(r.id)! } : r))
+        );
+      } else if (message.type === "resync") {
+        // Updates were dropped - search again for fresh numbers
+        setDebounceKey((k) => k + 1);
+      }
+    };
+
+    return () => socket.close();
+  }, [rideIds]);
+
   function resetPagination() {
     setPage(1);
   }
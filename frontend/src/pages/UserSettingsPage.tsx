@@ -103,7 +103,7 @@ export default function UserSettingsPage() {
       
       // Update user with new avatar URL
       if (user) {
-        setUser({ ...user, avatar_url: data.avatar_url });
+        setUser({ ...user, avatar_url: data.avatar_url, avatar_urls: data.avatar_urls });
       }
       
       setSuccessMessage('Profile picture updated successfully!');
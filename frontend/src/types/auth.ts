@@ -59,6 +59,7 @@ export interface User {
     verification_status: VerificationStatus;
     status: AccountStatus;
     avatar_url: string | null;
+    avatar_urls: Record<string, string>; // Variant size in pixels -> URL
     rating_avg: number;
     rating_count: number;
     created_at: string; // ISO datetime string